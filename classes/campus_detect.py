@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: campus_detect.py
+# Description: Picks the campus interface out of the routing table and the
+#              interface addresses, so unattended runs do not prompt
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import ipaddress
+import logging
+
+import netifaces
+
+
+ROUTE_FILE = "/proc/net/route"
+
+# Interfaces that are never the campus network
+EXCLUDED_PREFIXES = ["lo", "veth", "cni", "podman", "docker", "virbr", "vnet", "tap", "tun"]
+
+# Score of each property of a candidate
+SCORE_DEFAULT_ROUTE = 50
+SCORE_LOWEST_METRIC = 10
+SCORE_PUBLIC_IP = 30
+SCORE_PRIVATE_IP = 10
+SCORE_CAMPUS_NAME = 20
+
+# A candidate is only picked without asking when it has at least this score
+CONFIDENT_SCORE = SCORE_DEFAULT_ROUTE
+
+
+def read_default_routes(route_file=ROUTE_FILE):
+    # {interface: lowest metric} of the IPv4 default routes
+    routes = {}
+    try:
+        with open(route_file, "r") as routes_file:
+            lines = routes_file.readlines()[1:]
+    except OSError:
+        return routes
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        interface, destination, metric, mask = fields[0], fields[1], fields[6], fields[7]
+        if destination == "00000000" and mask == "00000000":
+            metric = int(metric)
+            if interface not in routes or metric < routes[interface]:
+                routes[interface] = metric
+    return routes
+
+
+class campus_detect(object):
+    """
+        Scores every interface of the system as campus candidate
+
+        + default route through the interface, more for the lowest metric
+        + public IPv4 address, less for a private one
+        + interface named campus
+        Interfaces without IPv4, virtual ones and those with an address in
+        one of the reserved netblocks (RAS, CNI, SSR) are left out.
+    """
+
+    def __init__(self, reserved_netblocks, log=None, route_file=ROUTE_FILE):
+        self.reserved_netblocks = [ipaddress.ip_network(net) for net in reserved_netblocks]
+        self.log = log or logging.getLogger("campus_detect")
+        self.route_file = route_file
+        self.candidates = []
+
+    def detect(self):
+        # Returns (interface, IPv4, confident). Interface is None if no candidate
+        default_routes = read_default_routes(self.route_file)
+        lowest_metric = min(default_routes.values()) if len(default_routes) > 0 else None
+        self.candidates = []
+        for interface in netifaces.interfaces():
+            candidate = self.__score(interface, default_routes, lowest_metric)
+            if candidate is not None:
+                self.candidates.append(candidate)
+        self.candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+
+        for candidate in self.candidates:
+            self.log.debug(
+                "Campus candidate " +
+                candidate['interface'] +
+                " " +
+                candidate['ip'] +
+                " scored " +
+                str(candidate['score']) +
+                ": " +
+                ", ".join(candidate['reasons'])
+            )
+        if len(self.candidates) == 0:
+            self.log.warning(
+                "No interface qualifies as campus interface"
+            )
+            return None, None, False
+
+        best = self.candidates[0]
+        tie = len(self.candidates) > 1 and self.candidates[1]['score'] == best['score']
+        confident = best['score'] >= CONFIDENT_SCORE and not tie
+        if confident:
+            self.log.info(
+                "Campus interface detected as " +
+                best['interface'] +
+                " with IP " +
+                best['ip'] +
+                " because of " +
+                ", ".join(best['reasons'])
+            )
+        else:
+            self.log.warning(
+                "Campus interface detection is not conclusive, best candidate is " +
+                best['interface'] +
+                " with IP " +
+                best['ip'] +
+                (" tied with " + self.candidates[1]['interface'] if tie else "")
+            )
+        return best['interface'], best['ip'], confident
+
+    def __score(self, interface, default_routes, lowest_metric):
+        for prefix in EXCLUDED_PREFIXES:
+            if interface.startswith(prefix):
+                self.log.debug(interface + " is not a campus candidate, virtual or loopback")
+                return None
+        try:
+            ip_address = netifaces.ifaddresses(interface)[netifaces.AF_INET][0]['addr']
+            address = ipaddress.ip_address(ip_address)
+        except (KeyError, IndexError, ValueError):
+            self.log.debug(interface + " is not a campus candidate, no IPv4 address")
+            return None
+        for netblock in self.reserved_netblocks:
+            if address in netblock:
+                self.log.debug(
+                    interface +
+                    " is not a campus candidate, its IP belongs to reserved netblock " +
+                    str(netblock)
+                )
+                return None
+
+        score = 0
+        reasons = []
+        if interface in default_routes:
+            score += SCORE_DEFAULT_ROUTE
+            reasons.append("default route")
+            if default_routes[interface] == lowest_metric:
+                score += SCORE_LOWEST_METRIC
+                reasons.append("lowest default route metric")
+        if address.is_global:
+            score += SCORE_PUBLIC_IP
+            reasons.append("public IP")
+        elif address.is_private:
+            score += SCORE_PRIVATE_IP
+            reasons.append("private IP")
+        if interface == "campus":
+            score += SCORE_CAMPUS_NAME
+            reasons.append("named campus")
+        return {
+            'interface': interface,
+            'ip': ip_address,
+            'score': score,
+            'reasons': reasons
+        }
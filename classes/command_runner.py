@@ -0,0 +1,349 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: command_runner.py
+# Description: Runs external commands without a shell, with timeouts,
+#              retries, streamed output and a per-run command ledger
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import datetime
+import json
+import logging
+import shlex
+import subprocess
+import threading
+import time
+
+from classes.retry_policy import TRANSIENT_ERRORS, retry_policy
+
+
+# Default timeout in seconds for a single command
+DEFAULT_TIMEOUT = 120
+
+# Timeout in seconds for long running commands as image pull or load
+LONG_TIMEOUT = 3600
+
+# RC reported when a command was killed by its timeout, same as timeout(1)
+RC_TIMEOUT = 124
+
+# RC reported when the command binary cannot be executed, same as the shell
+RC_NOT_FOUND = 127
+
+
+def format_argv(argv):
+    # Printable form of an argv list, only used for logs and the ledger
+    return " ".join(shlex.quote(str(arg)) for arg in argv)
+
+
+class command_result(object):
+    """
+        Outcome of one command as returned by command_runner.run
+    """
+
+    def __init__(self, argv, rc, output, error, duration, attempts, timed_out):
+        self.argv = argv
+        self.rc = rc
+        self.output = output
+        self.error = error
+        self.duration = duration
+        self.attempts = attempts
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.rc == 0
+
+
+class command_runner(object):
+    """
+        Runs external commands as argv lists, never through a shell
+
+        Every command gets its own timeout, which is capped by the global
+        deadline of the run when one is set. Commands that fail with a known
+        transient error can be retried. Output can be streamed line by line
+        into the run log. Each command run is recorded into the ledger with
+        its duration and exit code.
+
+        A retry_policy passed as policy decides the retries, their delay and
+        which errors they are for, retries and retry_delay are for the
+        plain transient errors only, a command killed by its timeout is not
+        run again through them.
+    """
+
+    def __init__(self, log=None, deadline=None):
+        self.log = log or logging.getLogger("command_runner")
+        self.ledger = []
+        self.ledger_file = None
+        self.deadline = None
+        self.__lock = threading.Lock()
+        if deadline is not None:
+            self.set_deadline(deadline)
+
+    def set_deadline(self, seconds):
+        # Global deadline, counted from now, for all the commands of this run
+        self.deadline = time.monotonic() + float(seconds)
+        self.log.debug(
+            "Global command deadline set to " +
+            str(seconds) +
+            " seconds from now"
+        )
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def run(self, argv, timeout=DEFAULT_TIMEOUT, retries=0, retry_delay=2,
+            stream=False, check=False, input_data=None, cwd=None, env=None,
+            input_writer=None, output_file=None, policy=None):
+        argv = [str(arg) for arg in argv]
+        if policy is None:
+            policy = retry_policy("command", retries + 1, retry_delay, retry_delay * (2 ** retries),
+                                  retryable=TRANSIENT_ERRORS, retry_timeouts=False, jitter=0)
+        attempt = 0
+        started = time.monotonic()
+        start_stamp = datetime.datetime.now().isoformat()
+        while True:
+            attempt += 1
+            result = self.__run_once(argv, timeout, stream, input_data, cwd, env, input_writer, output_file)
+            delay = policy.next_delay(
+                attempt, policy.classify(result), "command " + format_argv(argv) + " RC " + str(result.rc),
+                self.log, self.remaining()
+            )
+            if delay is None:
+                break
+            time.sleep(delay)
+        result.attempts = attempt
+        result.duration = time.monotonic() - started
+        self.__record(result, start_stamp, policy.name)
+        if check and not result.ok:
+            if result.timed_out:
+                raise subprocess.TimeoutExpired(
+                    argv, timeout, output=result.output, stderr=result.error
+                )
+            raise subprocess.CalledProcessError(
+                result.rc, argv, output=result.output, stderr=result.error
+            )
+        return result
+
+    def call(self, argv, **kwargs):
+        # Same contract as subprocess.call, returns the RC only
+        return self.run(argv, **kwargs).rc
+
+    def output(self, argv, **kwargs):
+        # Same contract as subprocess.check_output, returns stripped stdout
+        kwargs['check'] = True
+        return self.run(argv, **kwargs).output.strip()
+
+    def __run_once(self, argv, timeout, stream, input_data, cwd, env, input_writer, output_file):
+        effective_timeout = timeout
+        remaining = self.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                self.log.error(
+                    "Global deadline reached, not running " +
+                    format_argv(argv)
+                )
+                return command_result(argv, RC_TIMEOUT, "", "", 0.0, 1, True)
+            if effective_timeout is None or remaining < effective_timeout:
+                effective_timeout = remaining
+        self.log.debug("Running command " + format_argv(argv))
+        started = time.monotonic()
+        if output_file is not None:
+            # Large outputs go to a file instead of memory, a retry starts it over
+            output_file.seek(0)
+            output_file.truncate()
+        try:
+            proc = subprocess.Popen(
+                argv,
+                stdin=subprocess.PIPE if input_data is not None or input_writer is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE if output_file is None else output_file,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                env=env
+            )
+        except OSError as err:
+            self.log.debug(
+                "Could not execute " +
+                format_argv(argv) +
+                ": " +
+                str(err)
+            )
+            return command_result(
+                argv, RC_NOT_FOUND, "", str(err), time.monotonic() - started, 1, False
+            )
+        out_lines = []
+        err_lines = []
+        readers = [
+            threading.Thread(
+                target=self.__read_pipe,
+                args=(proc.stderr, err_lines, stream)
+            )
+        ]
+        if output_file is None:
+            readers.append(
+                threading.Thread(
+                    target=self.__read_pipe,
+                    args=(proc.stdout, out_lines, stream)
+                )
+            )
+        for reader in readers:
+            reader.daemon = True
+            reader.start()
+        writer_errors = []
+        if input_writer is not None:
+            # Streams stdin from its own thread, the pipes are drained meanwhile
+            writer = threading.Thread(
+                target=self.__write_pipe,
+                args=(proc, input_writer, writer_errors)
+            )
+            writer.daemon = True
+            writer.start()
+            readers.append(writer)
+        if input_data is not None:
+            try:
+                if isinstance(input_data, str):
+                    input_data = input_data.encode()
+                proc.stdin.write(input_data)
+                proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        timed_out = False
+        try:
+            rc = proc.wait(timeout=effective_timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.kill()
+            proc.wait()
+            rc = RC_TIMEOUT
+            self.log.error(
+                "Command " +
+                format_argv(argv) +
+                " did not finish in " +
+                str(round(effective_timeout, 1)) +
+                " seconds and was killed"
+            )
+        for reader in readers:
+            # Children left behind by a killed command can hold the pipes
+            reader.join(timeout=5 if timed_out else None)
+        for writer_error in writer_errors:
+            err_lines.append("Input of the command failed: " + str(writer_error) + "\n")
+            if rc == 0:
+                rc = 1
+        return command_result(
+            argv,
+            rc,
+            "".join(out_lines),
+            "".join(err_lines),
+            time.monotonic() - started,
+            1,
+            timed_out
+        )
+
+    def __write_pipe(self, proc, input_writer, errors):
+        # A failed writer kills the command, so it never acts on partial input
+        try:
+            input_writer(proc.stdin)
+            proc.stdin.close()
+        except BaseException as err:
+            errors.append(err)
+            self.log.error(
+                "Writing the input of " +
+                format_argv(proc.args) +
+                " failed: " +
+                str(err)
+            )
+            proc.kill()
+
+    def __read_pipe(self, pipe, lines, stream):
+        for raw_line in iter(pipe.readline, b''):
+            line = raw_line.decode('utf-8', errors='replace')
+            lines.append(line)
+            if stream:
+                self.log.info(line.rstrip())
+        pipe.close()
+
+    def __record(self, result, start_stamp, policy_name):
+        entry = {
+            'command': format_argv(result.argv),
+            'start': start_stamp,
+            'duration': round(result.duration, 3),
+            'rc': result.rc,
+            'attempts': result.attempts,
+            'policy': policy_name,
+            'timed_out': result.timed_out
+        }
+        with self.__lock:
+            self.ledger.append(entry)
+        self.log.debug(
+            "Command " +
+            entry['command'] +
+            " returned RC " +
+            str(result.rc) +
+            " in " +
+            str(entry['duration']) +
+            " seconds"
+        )
+
+    def log_summary(self, top=5):
+        with self.__lock:
+            entries = list(self.ledger)
+        if len(entries) == 0:
+            return
+        total = sum(entry['duration'] for entry in entries)
+        self.log.info(
+            "Run executed " +
+            str(len(entries)) +
+            " external commands in " +
+            str(round(total, 3)) +
+            " seconds"
+        )
+        slowest = sorted(entries, key=lambda entry: entry['duration'], reverse=True)
+        for entry in slowest[0:top]:
+            self.log.debug(
+                "Slow command " +
+                str(entry['duration']) +
+                "s RC " +
+                str(entry['rc']) +
+                ": " +
+                entry['command']
+            )
+
+    def write_ledger(self, path=None):
+        path = path or self.ledger_file
+        if path is None:
+            return False
+        with self.__lock:
+            entries = list(self.ledger)
+        try:
+            with open(path, "w") as ledger_file:
+                json.dump(entries, ledger_file, indent=2)
+        except OSError:
+            self.log.warning("Cannot write the command ledger to " + path)
+            return False
+        return True
+
+
+_runner = None
+
+
+def get_runner():
+    # One runner per process so all modules share the same ledger and deadline
+    global _runner
+    if _runner is None:
+        _runner = command_runner()
+    return _runner
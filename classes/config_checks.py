@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: config_checks.py
+# Description: Checks of the values of rclmgr.yml, and of the resource
+#              profile against the host
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# config_schema checks rclmgr.yml with these, without importing the modules
+# of the features the keys are for. The features import their parsers and
+# limits from here, so a value is read the same way it was checked:
+#
+#   check_size("2g")        None, or what is wrong with the value
+#   parse_window("01:00-05:00")
+# -----------------------------------------------------------------------------
+
+import os
+import re
+
+from classes.rcl_instances import DEFAULT_INSTANCE, instance_config, instance_names
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# cgroup v2 controller each key needs delegated to the rootless user
+CONTROLLERS = {
+    'CONTAINER_MEMORY': 'memory',
+    'CONTAINER_CPUS': 'cpu',
+    'CONTAINER_PIDS_LIMIT': 'pids',
+    'CONTAINER_BLKIO_WEIGHT': 'io'
+}
+
+# Share of the host memory all the containers together may be given, the
+# rest stays with the host and the EMS VM
+MAX_MEMORY_SHARE = 0.5
+
+# CPUs always left to the host and the EMS VM
+HOST_CPUS_KEPT = 1
+
+MIN_MEMORY = 256 * 1024 * 1024
+MIN_PIDS = 64
+BLKIO_WEIGHT_RANGE = (10, 1000)
+
+# Lowest PULL_RATE_LIMIT, and slowest a shaped pull is backed off to, in
+# bytes per second
+MIN_RATE = 64 * 1024
+
+# Prefetch window, start-end in local time
+WINDOW_REGEX = re.compile(r'^([01]?\d|2[0-3]):([0-5]\d)-([01]?\d|2[0-3]):([0-5]\d)$')
+
+# Sizes and rates as podman takes them, "2g", "512m" or bytes
+SIZE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*$', re.IGNORECASE)
+UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def version_key(version):
+    # "7.0.0.2" -> (7, 0, 0, 2), None for tags as "latest"
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        return None
+
+
+def parse_size(value):
+    # "2g", "512m" or a number of bytes, as podman takes them
+    match = SIZE.match(str(value))
+    if match is None:
+        raise ValueError("not a size: " + str(value))
+    return int(float(match.group(1)) * UNITS[match.group(2).lower()])
+
+
+def format_size(size):
+    for unit, factor in [("GiB", 1024 ** 3), ("MiB", 1024 ** 2), ("KiB", 1024)]:
+        if size >= factor:
+            return "%.1f %s" % (size / float(factor), unit)
+    return str(size) + " B"
+
+
+def check_size(value):
+    try:
+        if parse_size(value) >= MIN_MEMORY:
+            return None
+    except ValueError:
+        pass
+    return "value " + str(value) + " is not a memory size of at least " + format_size(MIN_MEMORY)
+
+
+def check_cpus(value):
+    try:
+        if float(value) > 0:
+            return None
+    except (ValueError, TypeError):
+        pass
+    return "value " + str(value) + " is not a number of CPUs"
+
+
+def check_pids(value):
+    try:
+        if int(str(value)) >= MIN_PIDS:
+            return None
+    except ValueError:
+        pass
+    return "value " + str(value) + " is not a process limit of at least " + str(MIN_PIDS)
+
+
+def check_blkio_weight(value):
+    try:
+        if BLKIO_WEIGHT_RANGE[0] <= int(str(value)) <= BLKIO_WEIGHT_RANGE[1]:
+            return None
+    except ValueError:
+        pass
+    return "value " + str(value) + " is not a weight between " + \
+        str(BLKIO_WEIGHT_RANGE[0]) + " and " + str(BLKIO_WEIGHT_RANGE[1])
+
+
+KEY_CHECKS = {
+    'CONTAINER_MEMORY': check_size,
+    'CONTAINER_CPUS': check_cpus,
+    'CONTAINER_PIDS_LIMIT': check_pids,
+    'CONTAINER_BLKIO_WEIGHT': check_blkio_weight
+}
+
+
+def parse_window(value):
+    # "01:00-05:00" is (60, 300), minutes after midnight. End before start
+    # means the window goes past midnight
+    match = WINDOW_REGEX.match(str(value).strip())
+    if match is None:
+        raise ValueError("not a window as 01:00-05:00")
+    start = int(match.group(1)) * 60 + int(match.group(2))
+    end = int(match.group(3)) * 60 + int(match.group(4))
+    if start == end:
+        raise ValueError("the window is empty")
+    return start, end
+
+
+def check_window(value):
+    try:
+        parse_window(value)
+        return None
+    except ValueError:
+        return "value " + str(value) + " is not a time window as 01:00-05:00"
+
+
+def check_rate(value):
+    try:
+        if parse_size(value) >= MIN_RATE:
+            return None
+    except ValueError:
+        pass
+    return "value " + str(value) + " is not a rate of at least " + format_size(MIN_RATE) + " per second"
+
+
+def resources_of(instance_cfg):
+    # {key: normalized value} of the keys set for one instance
+    resources = {}
+    if instance_cfg.get('CONTAINER_MEMORY') is not None:
+        resources['CONTAINER_MEMORY'] = parse_size(instance_cfg['CONTAINER_MEMORY'])
+    if instance_cfg.get('CONTAINER_CPUS') is not None:
+        resources['CONTAINER_CPUS'] = float(instance_cfg['CONTAINER_CPUS'])
+    if instance_cfg.get('CONTAINER_PIDS_LIMIT') is not None:
+        resources['CONTAINER_PIDS_LIMIT'] = int(instance_cfg['CONTAINER_PIDS_LIMIT'])
+    if instance_cfg.get('CONTAINER_BLKIO_WEIGHT') is not None:
+        resources['CONTAINER_BLKIO_WEIGHT'] = int(instance_cfg['CONTAINER_BLKIO_WEIGHT'])
+    return resources
+
+
+def host_memory():
+    try:
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def host_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count()
+
+
+def delegated_controllers():
+    # cgroup v2 controllers the rootless user may set limits with, None
+    # when they cannot be read
+    uid = str(os.getuid())
+    path = os.path.join(CGROUP_ROOT, "user.slice", "user-" + uid + ".slice",
+                        "user@" + uid + ".service", "cgroup.controllers")
+    try:
+        with open(path, "r") as controllers:
+            return controllers.read().split()
+    except OSError:
+        return None
+
+
+def resource_rule(container):
+    # Types of the instance overrides, then the profiles of all instances
+    # together against the host
+    violations = []
+    total_memory = 0
+    total_cpus = 0.0
+    used_keys = set()
+    for instance in instance_names(container):
+        instance_cfg = instance_config(container, instance)
+        valid = True
+        for key, check in KEY_CHECKS.items():
+            if instance_cfg.get(key) is None:
+                continue
+            used_keys.add(key)
+            violation = check(instance_cfg[key])
+            if violation is not None:
+                valid = False
+                # The default instance is reported by the key check
+                if instance != DEFAULT_INSTANCE:
+                    violations.append("Key " + key + " of instance " + instance + " " + violation)
+        if not valid:
+            continue
+        resources = resources_of(instance_cfg)
+        total_memory += resources.get('CONTAINER_MEMORY', 0)
+        total_cpus += resources.get('CONTAINER_CPUS', 0)
+    memory = host_memory()
+    if memory is not None and total_memory > memory * MAX_MEMORY_SHARE:
+        violations.append(
+            "CONTAINER_MEMORY of all instances, " + format_size(total_memory) +
+            ", is more than " + str(int(MAX_MEMORY_SHARE * 100)) + "% of the host memory of " +
+            format_size(memory)
+        )
+    cpus = host_cpus()
+    if cpus is not None and total_cpus > cpus - HOST_CPUS_KEPT:
+        violations.append(
+            "CONTAINER_CPUS of all instances, " + str(total_cpus) + ", leaves less than " +
+            str(HOST_CPUS_KEPT) + " of the " + str(cpus) + " host CPUs to the host"
+        )
+    controllers = delegated_controllers()
+    if controllers is not None:
+        for key in sorted(used_keys):
+            if CONTROLLERS[key] not in controllers:
+                violations.append(
+                    key + " needs the " + CONTROLLERS[key] +
+                    " cgroup controller, which is not delegated to user " + str(os.getuid())
+                )
+    return violations
@@ -0,0 +1,386 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: config_schema.py
+# Description: Declarative schema of the CONTAINER section of rclmgr.yml,
+#              compiled once, that validates and generates the file
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import ipaddress
+import re
+import sys
+
+import yaml
+
+from classes.config_checks import (check_blkio_weight, check_cpus, check_pids, check_rate, check_size, check_window,
+                                   resource_rule, version_key)
+from classes.rcl_instances import DEFAULT_INSTANCE, check_instances, instance_config, instance_names
+
+
+# SSR netblock
+SSR_NETBLOCK = "10.111.222.100/30"
+
+# CNI netblock
+CNI_NETBLOCK = "10.88.0.0/16"
+
+# RAS netblock
+RAS_NETBLOCK = "10.23.16.0/29"
+
+RESERVED_NETBLOCKS = [CNI_NETBLOCK, RAS_NETBLOCK, SSR_NETBLOCK]
+
+# Image version deployed when none is given
+DEFAULT_IMAGE_VERSION = '7.0.0.2'
+
+# RFC1035 + RFC3696 prefered options, for hostname.domain
+FQDN_REGEX = re.compile(
+    r'^(([a-zA-Z]{1})|([a-zA-Z]{1}[a-zA-Z]{1})|'
+    r'([a-zA-Z]{1}[0-9]{1})|([0-9]{1}[a-zA-Z]{1})|'
+    r'([a-zA-Z0-9][-.a-zA-Z0-9]{0,61}[a-zA-Z0-9]))\.'
+    r'([a-zA-Z]{2,13}|[a-zA-Z0-9-]{2,30}.[a-zA-Z]{2,3})$'
+)
+
+# Kinds of keys:
+#   static    - value is fixed, the file has to carry exactly it
+#   config    - required, rewritten from the system by startRCLContainer
+#   optional  - may be absent, kept as it is when the file is rewritten
+STATIC = "static"
+CONFIG = "config"
+OPTIONAL = "optional"
+
+
+def is_valid_FQDN(hostname, domain):
+    return FQDN_REGEX.match(str(hostname) + "." + str(domain)) is not None
+
+
+class schema_key(object):
+    """
+        Declaration of one key of the CONTAINER section
+
+        value_type - str, int, port, ipv4, netblock, version, mapping, size,
+                     cpus, pids, weight
+        inside     - netblocks an ipv4 value has to belong to
+        outside    - netblocks an ipv4 or netblock value cannot touch
+    """
+
+    def __init__(self, name, kind, value_type, default=None, inside=None, outside=None,
+                 minimum=None, maximum=None):
+        self.name = name
+        self.kind = kind
+        self.value_type = value_type
+        self.default = default
+        self.inside = inside or []
+        self.outside = outside or []
+        self.minimum = minimum
+        self.maximum = maximum
+
+
+class schema_rule(object):
+    """
+        Check that involves more than one key, func(container) returns the
+        list of violations. A rule runs when the keys it uses passed their
+        own checks, rules on config keys only with config=True.
+    """
+
+    def __init__(self, name, func, keys, uses_config=False):
+        self.name = name
+        self.func = func
+        self.keys = keys
+        self.uses_config = uses_config
+
+
+def container_FQDN_rule(container):
+    if not is_valid_FQDN(container['CONTAINER_HOSTNAME'], container['CONTAINER_DOMAIN_NAME']):
+        return [
+            "Container FQDN " + str(container['CONTAINER_HOSTNAME']) + "." +
+            str(container['CONTAINER_DOMAIN_NAME']) +
+            " does not align with RFC1035 and RFC3696 prefered format"
+        ]
+    return []
+
+
+def domain_rule(container):
+    if not is_valid_FQDN("anyhost", container['CONTAINER_DOMAIN_NAME']):
+        return [
+            "Domain " + str(container['CONTAINER_DOMAIN_NAME']) +
+            " does not align with RFC1035 and RFC3696 prefered format"
+        ]
+    return []
+
+
+def network_rule(container):
+    # Subnets of the instance networks cannot collide with the reserved
+    # netblocks nor with each other, the gateway has to be inside its subnet
+    violations = []
+    seen = {}
+    for instance in instance_names(container):
+        instance_cfg = instance_config(container, instance)
+        subnet = instance_cfg.get('CONTAINER_NETWORK_SUBNET')
+        gateway = instance_cfg.get('CONTAINER_NETWORK_GATEWAY')
+        network = instance_cfg.get('CONTAINER_NETWORK_NAME')
+        if subnet is None:
+            if gateway is not None:
+                violations.append("CONTAINER_NETWORK_GATEWAY of instance " + instance +
+                                  " needs CONTAINER_NETWORK_SUBNET")
+            continue
+        if network is None:
+            violations.append("CONTAINER_NETWORK_SUBNET of instance " + instance +
+                              " needs CONTAINER_NETWORK_NAME, the default podman network cannot be changed")
+            continue
+        try:
+            subnet_net = ipaddress.ip_network(str(subnet))
+        except ValueError:
+            # Reported by the key check of the default instance
+            if instance != DEFAULT_INSTANCE:
+                violations.append("CONTAINER_NETWORK_SUBNET " + str(subnet) + " of instance " +
+                                  instance + " is not a valid network")
+            continue
+        if instance != DEFAULT_INSTANCE:
+            for reserved in COMPILED_RESERVED:
+                if subnet_net.overlaps(reserved):
+                    violations.append("CONTAINER_NETWORK_SUBNET " + str(subnet) + " of instance " +
+                                      instance + " overlaps the reserved netblock " + str(reserved))
+        for other_subnet, other_network in seen.items():
+            if other_network != network and subnet_net.overlaps(other_subnet):
+                violations.append("CONTAINER_NETWORK_SUBNET " + str(subnet) + " of network " +
+                                  network + " overlaps network " + other_network)
+        seen[subnet_net] = network
+        if gateway is not None:
+            try:
+                if ipaddress.ip_address(str(gateway)) not in subnet_net:
+                    violations.append("CONTAINER_NETWORK_GATEWAY " + str(gateway) +
+                                      " is not inside " + str(subnet))
+            except ValueError:
+                violations.append("CONTAINER_NETWORK_GATEWAY " + str(gateway) + " is not a valid IPv4")
+    return violations
+
+
+COMPILED_RESERVED = [ipaddress.ip_network(netblock) for netblock in RESERVED_NETBLOCKS]
+
+
+class config_schema(object):
+    """
+        Compiled form of the schema
+
+        Every key gets its list of check functions once, netblocks are
+        parsed once. validate() walks the container once and returns every
+        violation found, an empty list means the section is valid.
+    """
+
+    def __init__(self, keys, rules):
+        self.keys = keys
+        self.rules = rules
+        self.by_name = {}
+        self.checks = {}
+        for key in keys:
+            self.by_name[key.name] = key
+            self.checks[key.name] = self.__compile(key)
+
+    def validate(self, container, config=True):
+        # config=False skips the values of config keys and the rules using
+        # them, those are about to be rewritten from the system
+        violations = []
+        if not isinstance(container, dict):
+            return ["CONTAINER section is missing or is not a mapping"]
+        failed = set()
+        for key in self.keys:
+            if key.name not in container:
+                if key.kind != OPTIONAL:
+                    violations.append("Key " + key.name + " does not exist")
+                    failed.add(key.name)
+                continue
+            value = container[key.name]
+            if key.kind == OPTIONAL and value is None:
+                continue
+            if key.kind == CONFIG and not config:
+                continue
+            for check in self.checks[key.name]:
+                violation = check(value)
+                if violation is not None:
+                    violations.append("Key " + key.name + " " + violation)
+                    failed.add(key.name)
+                    break
+        for rule in self.rules:
+            if rule.uses_config and not config:
+                continue
+            # Rules assume the keys they use are there and well formed
+            if len(failed.intersection(rule.keys)) > 0:
+                continue
+            violations += rule.func(container)
+        return violations
+
+    def unknown_keys(self, container):
+        return sorted(key for key in container if key not in self.by_name)
+
+    def static_values(self):
+        return dict((key.name, key.default) for key in self.keys if key.kind == STATIC)
+
+    def config_defaults(self):
+        return dict((key.name, key.default) for key in self.keys if key.kind == CONFIG)
+
+    def optional_defaults(self):
+        return dict((key.name, key.default) for key in self.keys if key.kind == OPTIONAL)
+
+    def default_config(self):
+        container = self.static_values()
+        container.update(self.config_defaults())
+        return {'CONTAINER': container}
+
+    def __compile(self, key):
+        checks = []
+        if key.kind == STATIC:
+            expected = str(key.default)
+            checks.append(
+                lambda value: None if str(value) == expected else
+                "value " + str(value) + " is not the expected one of " + expected
+            )
+        checks.append(TYPE_CHECKS[key.value_type])
+        if key.minimum is not None or key.maximum is not None:
+            minimum = key.minimum
+            maximum = key.maximum
+            checks.append(
+                lambda value: "value " + str(value) + " is below the minimum of " + str(minimum)
+                if minimum is not None and int(value) < minimum else None
+            )
+            checks.append(
+                lambda value: "value " + str(value) + " is above the maximum of " + str(maximum)
+                if maximum is not None and int(value) > maximum else None
+            )
+        if len(key.inside) > 0:
+            inside = [ipaddress.ip_network(netblock) for netblock in key.inside]
+            checks.append(
+                lambda value: None if any(ipaddress.ip_address(str(value)) in net for net in inside) else
+                "value " + str(value) + " is not inside " + ", ".join(str(net) for net in inside)
+            )
+        if len(key.outside) > 0:
+            outside = [ipaddress.ip_network(netblock) for netblock in key.outside]
+            checks.append(
+                lambda value: None if not any(ipaddress.ip_network(str(value), strict=False).overlaps(net)
+                                              for net in outside) else
+                "value " + str(value) + " overlaps a reserved netblock " + ", ".join(str(net) for net in outside)
+            )
+        return checks
+
+
+def type_error(description):
+    def check(value, parse):
+        try:
+            if parse(value):
+                return None
+        except (ValueError, TypeError, AttributeError):
+            pass
+        return "value " + str(value) + " is not " + description
+    return check
+
+
+def check_str(value):
+    return None if isinstance(value, str) and value != "" else "value " + str(value) + " is not a text"
+
+
+def check_int(value):
+    return type_error("an integer")(value, lambda value: str(int(value)) == str(value).strip())
+
+
+def check_port(value):
+    return type_error("a port number")(value, lambda value: 1 <= int(value) <= 65535)
+
+
+def check_ipv4(value):
+    return type_error("an IPv4 address")(value, lambda value: ipaddress.ip_address(str(value)).version == 4)
+
+
+def check_netblock(value):
+    return type_error("an IPv4 network")(value, lambda value: ipaddress.ip_network(str(value)).version == 4)
+
+
+def check_version(value):
+    return type_error("a version as 7.0.0.2")(value, lambda value: version_key(str(value)) is not None)
+
+
+def check_hostname(value):
+    return type_error("a valid hostname")(value, lambda value: is_valid_FQDN(value, "local"))
+
+
+def check_mapping(value):
+    return None if isinstance(value, dict) else "value is not a mapping"
+
+
+TYPE_CHECKS = {
+    'str': check_str,
+    'int': check_int,
+    'port': check_port,
+    'ipv4': check_ipv4,
+    'netblock': check_netblock,
+    'version': check_version,
+    'hostname': check_hostname,
+    'mapping': check_mapping,
+    'size': check_size,
+    'cpus': check_cpus,
+    'pids': check_pids,
+    'weight': check_blkio_weight,
+    'window': check_window,
+    'rate': check_rate
+}
+
+
+CONFIG_SCHEMA = config_schema(
+    [
+        schema_key('CONTAINER_HOSTNAME', STATIC, 'hostname', 'utilityBareMetal-rcl-official'),
+        schema_key('RAS_INTERFACE', STATIC, 'str', 'virbr1'),
+        schema_key('RAS_INTERFACE_IP', STATIC, 'ipv4', '10.23.16.1', inside=[RAS_NETBLOCK]),
+        schema_key('IMAGE_NAME', STATIC, 'str', 'cp.icr.io/cp/scalesystem/sss_rcl'),
+        schema_key('SSH_PORT', STATIC, 'port', '10022'),
+        schema_key('LOG', STATIC, 'str', '/home/rcladmin/log'),
+        schema_key('BKUP', STATIC, 'str', '/home/rcladmin/backup'),
+        schema_key('CONTAINER_DOMAIN_NAME', CONFIG, 'str', 'gpfs.local'),
+        schema_key('UTILITY_HOSTNAME', CONFIG, 'hostname', 'utilityBareMetal'),
+        schema_key('CAMPUS_INTERFACE', CONFIG, 'str', 'campus'),
+        schema_key('CAMPUS_INTERFACE_IP', CONFIG, 'ipv4', '192.168.100.10'),
+        schema_key('IMAGE_VERSION', CONFIG, 'version', DEFAULT_IMAGE_VERSION),
+        schema_key('GC_KEEP_PREVIOUS', OPTIONAL, 'int', 1, minimum=0),
+        schema_key('INSTANCES', OPTIONAL, 'mapping', {}),
+        schema_key('CONTAINER_NETWORK_NAME', OPTIONAL, 'str', None),
+        schema_key('CONTAINER_NETWORK_SUBNET', OPTIONAL, 'netblock', None, outside=RESERVED_NETBLOCKS),
+        schema_key('CONTAINER_NETWORK_GATEWAY', OPTIONAL, 'ipv4', None),
+        schema_key('CONTAINER_MEMORY', OPTIONAL, 'size', None),
+        schema_key('CONTAINER_CPUS', OPTIONAL, 'cpus', None),
+        schema_key('CONTAINER_PIDS_LIMIT', OPTIONAL, 'pids', None),
+        schema_key('CONTAINER_BLKIO_WEIGHT', OPTIONAL, 'weight', None),
+        schema_key('PREFETCH_VERSION', OPTIONAL, 'version', None),
+        schema_key('PREFETCH_WINDOW', OPTIONAL, 'window', None),
+        schema_key('PULL_RATE_LIMIT', OPTIONAL, 'rate', None),
+        schema_key('TELEMETRY_INTERVAL', OPTIONAL, 'int', None, minimum=0, maximum=3600),
+        schema_key('ENDPOINT_RANKING_INTERVAL', OPTIONAL, 'int', None, minimum=0, maximum=86400)
+    ],
+    [
+        schema_rule('domain', domain_rule, ['CONTAINER_DOMAIN_NAME'], uses_config=True),
+        schema_rule('container FQDN', container_FQDN_rule,
+                    ['CONTAINER_HOSTNAME', 'CONTAINER_DOMAIN_NAME'], uses_config=True),
+        schema_rule('instances', check_instances, ['CONTAINER_HOSTNAME', 'SSH_PORT', 'LOG', 'BKUP', 'INSTANCES']),
+        schema_rule('networks', network_rule,
+                    ['CONTAINER_HOSTNAME', 'INSTANCES', 'CONTAINER_NETWORK_NAME',
+                     'CONTAINER_NETWORK_SUBNET', 'CONTAINER_NETWORK_GATEWAY']),
+        schema_rule('resources', resource_rule,
+                    ['CONTAINER_HOSTNAME', 'INSTANCES', 'CONTAINER_MEMORY', 'CONTAINER_CPUS',
+                     'CONTAINER_PIDS_LIMIT', 'CONTAINER_BLKIO_WEIGHT'])
+    ]
+)
+
+
+if __name__ == '__main__':
+    # Default rclmgr.yml out of the schema
+    sys.stdout.write("%YAML 1.1\n---\n\n")
+    yaml.dump(CONFIG_SCHEMA.default_config(), sys.stdout, default_flow_style=False)
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: endpoint_ranking.py
+# Description: Ranks the IBM RCL endpoints by connect success and latency and
+#              hands the ranking to the RCL containers
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# The ranking is written to ~/.local/share/sssrcl/endpoints/ranked, one endpoint
+# per line, best first:
+#
+#   # endpoint port success_rate median_ms
+#   170.225.126.12 22 1.00 18.4
+#   170.225.126.11 22 1.00 21.0
+#   170.225.127.11 22 0.00 -
+#
+# Containers mount that directory read only at CONTAINER_ENDPOINTS_DIR and
+# find the file through the RCL_ENDPOINTS_FILE variable. The directory is
+# mounted, not the file, so a ranking replaced by rename is seen by running
+# containers. A systemd user timer refreshes it with:
+#
+#   python3 -m classes.endpoint_ranking
+# -----------------------------------------------------------------------------
+
+import logging
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.retry_policy import get_policy
+from classes.state_files import atomic_write, data_path
+
+
+# RCL ENDPOINTS
+RCL_ENDPOINTS = [
+    "170.225.126.11",
+    "170.225.126.12",
+    "170.225.127.11",
+    "170.225.127.12"
+]
+
+RCL_PORT = 22
+
+# Connects timed per endpoint, and seconds each may take
+SAMPLES = 3
+CONNECT_TIMEOUT = 3
+
+ENDPOINTS_FILE_NAME = "ranked"
+CONTAINER_ENDPOINTS_DIR = "/etc/rcl/endpoints"
+CONTAINER_ENDPOINTS_FILE = CONTAINER_ENDPOINTS_DIR + "/" + ENDPOINTS_FILE_NAME
+
+
+def endpoints_dir():
+    return data_path("endpoints")
+
+
+def connect_time(endpoint, port=RCL_PORT, timeout=CONNECT_TIMEOUT):
+    # Seconds the TCP handshake took, raises OSError when it failed
+    started = time.monotonic()
+    sock = socket.create_connection((endpoint, port), timeout=timeout)
+    elapsed = time.monotonic() - started
+    sock.close()
+    return elapsed
+
+
+def measure(endpoint, port=RCL_PORT, samples=SAMPLES, timeout=CONNECT_TIMEOUT):
+    # A refused or otherwise final error ends the sampling, a timeout is
+    # tried again like the probe policy would
+    probe = get_policy("probe")
+    latencies = []
+    attempts = 0
+    error = None
+    for _ in range(samples):
+        attempts += 1
+        try:
+            latencies.append(connect_time(endpoint, port, timeout))
+        except OSError as err:
+            error = str(err) or err.__class__.__name__
+            if probe.classify_error(err) is None:
+                break
+    latencies.sort()
+    return {
+        'endpoint': endpoint,
+        'port': port,
+        'success_rate': len(latencies) / float(attempts),
+        'median_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        'error': error
+    }
+
+
+def rank_endpoints(endpoints=None, port=RCL_PORT, samples=SAMPLES, timeout=CONNECT_TIMEOUT):
+    # All endpoints at once, the ranking takes as long as the slowest one
+    endpoints = endpoints or RCL_ENDPOINTS
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as pool:
+        results = list(pool.map(lambda endpoint: measure(endpoint, port, samples, timeout), endpoints))
+    # Most reliable first, then fastest, unreachable ones keep their order
+    return sorted(
+        results,
+        key=lambda result: (
+            -result['success_rate'],
+            result['median_ms'] if result['median_ms'] is not None else float("inf")
+        )
+    )
+
+
+def write_ranking(ranking, directory=None):
+    # Running containers read it while it is replaced
+    path = os.path.join(directory or endpoints_dir(), ENDPOINTS_FILE_NAME)
+    with atomic_write(path) as ranking_file:
+        ranking_file.write("# endpoint port success_rate median_ms\n")
+        for result in ranking:
+            ranking_file.write(
+                result['endpoint'] + " " + str(result['port']) + " " +
+                "%.2f" % result['success_rate'] + " " +
+                (str(result['median_ms']) if result['median_ms'] is not None else "-") + "\n"
+            )
+    return path
+
+
+def ensure_ranking(directory=None):
+    # Containers created before any preflight get the endpoints unranked
+    directory = directory or endpoints_dir()
+    if not os.path.isfile(os.path.join(directory, ENDPOINTS_FILE_NAME)):
+        write_ranking(
+            [{'endpoint': endpoint, 'port': RCL_PORT, 'success_rate': 0.0, 'median_ms': None}
+             for endpoint in RCL_ENDPOINTS],
+            directory
+        )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    ranking = rank_endpoints()
+    path = write_ranking(ranking)
+    logging.info(
+        "Endpoints ranked into " +
+        path +
+        ": " +
+        ", ".join(result['endpoint'] + " " + str(result['median_ms']) + "ms" for result in ranking
+                  if result['success_rate'] > 0)
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
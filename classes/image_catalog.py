@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: image_catalog.py
+# Description: Catalog of the RCL image versions available from local podman
+#              storage, image tarballs and the registry, cached on disk
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import glob
+import json
+import logging
+import os
+import shutil
+import tarfile
+import time
+
+from classes.command_runner import get_runner
+from classes.retry_policy import get_policy
+from classes.offline_bundle import BUNDLE_MANIFEST
+from classes.state_files import atomic_write
+from classes.config_checks import version_key
+from classes.storage_gc import field, names_of, split_image_ref
+
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "sssrcl", "image_catalog.json")
+
+# Registry tag listings older than this are refreshed, in seconds
+REGISTRY_TTL = 24 * 3600
+
+CATALOG_FORMAT = 1
+
+
+def mb(size):
+    return str(int(round(size / (1024.0 * 1024.0))))
+
+
+class image_catalog(object):
+    """
+        Index of the RCL image versions and where each one can be found
+
+        local    - podman storage of rcladmin, with image ID, digest and size
+        tarball  - podman save archives in a directory, re-read only when
+                   their size or mtime changes
+        registry - tags of IMAGE_NAME listed with skopeo, with manifest
+                   digest and compressed size, refreshed every REGISTRY_TTL
+
+        The index is kept in CACHE_FILE so that questions as the latest
+        version, whether a version is installed or how much has to be
+        downloaded are answered without a registry round trip.
+    """
+
+    def __init__(self, image_name, cache_file=CACHE_FILE, log=None, runner=None):
+        self.image_name = image_name
+        self.cache_file = cache_file
+        self.log = log or logging.getLogger("image_catalog")
+        self.runner = runner or get_runner()
+        self.index = self.__load()
+
+    def refresh(self, tarball_dir=None, registry=False, force_registry=False):
+        self.refresh_local()
+        if tarball_dir is not None:
+            self.refresh_tarballs(tarball_dir)
+        if registry or force_registry:
+            self.refresh_registry(force_registry)
+        self.save()
+
+    def refresh_local(self):
+        result = self.runner.run(["podman", "images", "--format", "json"], retries=2)
+        try:
+            images = json.loads(result.output) if result.ok else []
+        except ValueError:
+            images = []
+        local = {}
+        for image in images or []:
+            for name in names_of(image):
+                repository, tag = split_image_ref(name)
+                if repository != self.image_name or tag is None:
+                    continue
+                local[tag] = {
+                    'id': field(image, 'Id', 'ID', 'id'),
+                    'digest': field(image, 'Digest', 'digest'),
+                    'size': field(image, 'Size', 'size') or 0
+                }
+        self.index['local'] = local
+        self.index['local_refreshed'] = time.time()
+        self.log.debug(
+            "Catalog found " +
+            str(len(local)) +
+            " versions in local podman storage"
+        )
+
+    def refresh_tarballs(self, tarball_dir):
+        cached = self.index.get('tarballs', {})
+        tarballs = {}
+        for path in sorted(glob.glob(os.path.join(tarball_dir, "*.tar"))):
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = cached.get(path)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                entry = self.__read_tarball(path, stat)
+            if entry is not None:
+                tarballs[path] = entry
+        self.index['tarballs'] = tarballs
+        self.log.debug(
+            "Catalog found " +
+            str(len(tarballs)) +
+            " image tarballs in " +
+            tarball_dir
+        )
+
+    def refresh_registry(self, force=False):
+        refreshed = self.index.get('registry_refreshed', 0)
+        if not force and time.time() - refreshed < REGISTRY_TTL:
+            self.log.debug("Registry tags of the catalog are recent, not refreshed")
+            return
+        if shutil.which("skopeo") is None:
+            self.log.warning("skopeo is not installed, registry tags are not listed")
+            return
+        result = self.runner.run(
+            ["skopeo", "list-tags", "docker://" + self.image_name], policy=get_policy("pull"), timeout=60
+        )
+        try:
+            tags = json.loads(result.output).get('Tags', []) if result.ok else []
+        except ValueError:
+            tags = []
+        registry = {}
+        previous = self.index.get('registry', {})
+        for tag in tags:
+            if version_key(tag) is None:
+                continue
+            # Released tags do not move, only new ones are inspected
+            entry = None if force else previous.get(tag)
+            if entry is None:
+                entry = self.inspect_registry_tag(tag) or previous.get(tag)
+            if entry is not None:
+                registry[tag] = entry
+        if len(registry) > 0:
+            self.index['registry'] = registry
+            self.index['registry_refreshed'] = time.time()
+        self.log.debug(
+            "Catalog found " +
+            str(len(registry)) +
+            " versions in registry " +
+            self.image_name
+        )
+
+    def inspect_registry_tag(self, tag):
+        # Digest and compressed size of one tag, None when it cannot be inspected
+        result = self.runner.run(
+            ["skopeo", "inspect", "docker://" + self.image_name + ":" + tag], policy=get_policy("pull"), timeout=60
+        )
+        if not result.ok:
+            return None
+        try:
+            inspect = json.loads(result.output)
+        except ValueError:
+            return None
+        size = 0
+        for layer in inspect.get('LayersData') or []:
+            size += int(layer.get('Size') or 0)
+        return {
+            'digest': inspect.get('Digest'),
+            'size': size if size > 0 else None
+        }
+
+    def versions(self):
+        # Only what a source listed, empty before the first refresh
+        found = set()
+        found.update(self.index.get('local', {}).keys())
+        found.update(self.index.get('registry', {}).keys())
+        for entry in self.index.get('tarballs', {}).values():
+            found.update(entry['versions'])
+        return sorted(
+            [version for version in found if version_key(version) is not None],
+            key=version_key
+        )
+
+    def latest(self):
+        versions = self.versions()
+        return versions[-1] if len(versions) > 0 else None
+
+    def installed(self, version=None):
+        if version is None:
+            return sorted(self.index.get('local', {}).keys(), key=lambda tag: version_key(tag) or ())
+        return version in self.index.get('local', {})
+
+    def tarball_for(self, version):
+        for path, entry in sorted(self.index.get('tarballs', {}).items()):
+            if version in entry['versions']:
+                return path
+        return None
+
+    def digest(self, version):
+        for source in ['local', 'registry']:
+            entry = self.index.get(source, {}).get(version)
+            if entry is not None and entry.get('digest'):
+                return entry['digest']
+        return None
+
+    def download_bytes(self, version):
+        # None when the size is unknown
+        if self.installed(version) or self.tarball_for(version) is not None:
+            return 0
+        entry = self.index.get('registry', {}).get(version)
+        if entry is None:
+            return None
+        return entry.get('size')
+
+    def describe(self, version):
+        if self.installed(version):
+            return "installed"
+        tarball = self.tarball_for(version)
+        if tarball is not None:
+            return "available in tarball " + tarball
+        size = self.download_bytes(version)
+        if size is None:
+            return "not installed, download size unknown"
+        return "needs download: " + mb(size) + " MB"
+
+    def save(self):
+        self.index['format'] = CATALOG_FORMAT
+        self.index['image_name'] = self.image_name
+        try:
+            with atomic_write(self.cache_file) as cache:
+                json.dump(self.index, cache, indent=2, sort_keys=True)
+        except OSError:
+            self.log.warning("Cannot write image catalog cache " + self.cache_file)
+
+    def __load(self):
+        try:
+            with open(self.cache_file, "r") as cache:
+                index = json.load(cache)
+        except (OSError, ValueError):
+            return {}
+        if index.get('format') != CATALOG_FORMAT or index.get('image_name') != self.image_name:
+            return {}
+        return index
+
+    def __read_tarball(self, path, stat):
+        # Only the small manifest.json member of the archive is read, an
+        # offline bundle carries it in its own manifest
+        try:
+            with tarfile.open(path, "r:") as archive:
+                try:
+                    manifest = json.load(archive.extractfile("manifest.json"))
+                except KeyError:
+                    manifest = json.load(archive.extractfile(BUNDLE_MANIFEST))['manifest'] or []
+        except (tarfile.TarError, KeyError, ValueError, OSError, AttributeError, TypeError):
+            self.log.debug(path + " is not a podman image archive")
+            return None
+        versions = []
+        image_ids = []
+        for image in manifest:
+            image_ids.append("sha256:" + os.path.basename(image.get('Config', '')).replace(".json", ""))
+            for repo_tag in image.get('RepoTags') or []:
+                repository, tag = split_image_ref(repo_tag)
+                if repository.split("/", 1)[-1] == self.image_name.split("/", 1)[-1] and tag is not None:
+                    versions.append(tag)
+        return {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'versions': versions,
+            'image_ids': image_ids
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: image_prefetch.py
+# Description: Off-hours prefetch of the next RCL image version into local
+#              podman storage, verified against its digest
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# The target version and the window are set in the CONTAINER section of
+# rclmgr.yml:
+#
+#   PREFETCH_VERSION: 7.0.0.3
+#   PREFETCH_WINDOW: 01:00-05:00     local time, may go past midnight
+#
+# startRCLContainer installs a systemd user timer firing at the start of the
+# window, which runs:
+#
+#   python3 -m classes.image_prefetch [--now]
+#
+# The image is loaded from a tarball of the tool directory when there is
+# one, else pulled, within PULL_RATE_LIMIT when it is set. Commands are
+# stopped at the end of the window. A verified image is recorded in
+# ~/.local/share/sssrcl/prefetch.json, and the next startRCLContainer run
+# of that version uses it instead of pulling.
+# -----------------------------------------------------------------------------
+
+import argparse
+import datetime
+import json
+import logging
+import sys
+import time
+
+import yaml
+
+from classes.command_runner import LONG_TIMEOUT, get_runner
+from classes.config_checks import parse_window
+from classes.image_catalog import image_catalog
+from classes.pull_shaper import shaped_pull
+from classes.retry_policy import get_policy
+from classes.state_files import atomic_write, data_path
+
+
+# systemd user timer running the prefetch
+PREFETCH_TIMER = "rcl-image-prefetch"
+
+DEFAULT_WINDOW = "01:00-05:00"
+
+# Timer start spread over the window, at most this many seconds
+MAX_RANDOM_SECONDS = 1800
+
+
+def prefetch_file():
+    return data_path("prefetch.json")
+
+
+def window_length(window):
+    start, end = parse_window(window)
+    return ((end - start) % (24 * 60)) * 60
+
+
+def window_seconds_left(window, now=None):
+    # Seconds until the window closes, 0 outside of it
+    start, end = parse_window(window)
+    now = now or datetime.datetime.now()
+    minute = now.hour * 60 + now.minute
+    since_start = (minute - start) % (24 * 60)
+    if since_start * 60 >= window_length(window):
+        return 0
+    return window_length(window) - since_start * 60 - now.second
+
+
+def on_calendar(window):
+    # systemd calendar event of the window start
+    start, _ = parse_window(window)
+    return "*-*-* %02d:%02d:00" % (start // 60, start % 60)
+
+
+def load_records(path=None):
+    try:
+        with open(path or prefetch_file(), "r") as records:
+            return json.load(records)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_record(version, record, path=None):
+    # The upgrade run may read it while the prefetch writes it
+    path = path or prefetch_file()
+    records = load_records(path)
+    records[version] = record
+    with atomic_write(path) as records_file:
+        json.dump(records, records_file, indent=2, sort_keys=True)
+
+
+def local_image(image_ref, runner=None):
+    # ID and digests of an installed image, None when it is not installed
+    runner = runner or get_runner()
+    result = runner.run(["podman", "image", "inspect", image_ref])
+    if not result.ok:
+        return None
+    try:
+        inspect = json.loads(result.output)[0]
+    except (ValueError, IndexError, KeyError):
+        return None
+    digests = [inspect.get('Digest')] + [
+        repo_digest.split("@", 1)[-1] for repo_digest in inspect.get('RepoDigests') or []
+    ]
+    return {
+        'id': inspect.get('Id'),
+        'digests': [digest for digest in digests if digest]
+    }
+
+
+def prefetched(image_name, version, runner=None):
+    # The record of a verified prefetch whose image is still the installed
+    # one, else None
+    record = load_records().get(str(version))
+    if record is None:
+        return None
+    image = local_image(image_name + ":" + str(version), runner)
+    if image is None or image['id'] != record.get('id'):
+        return None
+    return record
+
+
+def prefetch(image_name, version, tarball_dir=".", runner=None, log=None, rate=None):
+    # RC 0 when the image is installed and verified
+    runner = runner or get_runner()
+    log = log or logging.getLogger("image_prefetch")
+    version = str(version)
+    image_ref = image_name + ":" + version
+    if prefetched(image_name, version, runner) is not None:
+        log.info(image_ref + " was already prefetched and is still installed")
+        return 0
+    started = time.monotonic()
+    catalog = image_catalog(image_name, log=log, runner=runner)
+    catalog.refresh_tarballs(tarball_dir)
+    tarball = catalog.tarball_for(version)
+    if tarball is not None:
+        # The image ID is the digest of its config, as named in the tarball
+        expected = catalog.index['tarballs'][tarball]['image_ids']
+        source = tarball
+        log.info("Staging " + image_ref + " from " + tarball)
+        rc = runner.call(["podman", "image", "load", "-i", tarball],
+                         timeout=LONG_TIMEOUT, policy=get_policy("storage"))
+    else:
+        entry = catalog.inspect_registry_tag(version)
+        if entry is None or not entry.get('digest'):
+            log.error("Cannot read the digest of " + image_ref + " from the registry, is skopeo installed?")
+            return 1
+        expected = [entry['digest']]
+        source = "registry"
+        log.info("Pulling " + image_ref + ", digest " + entry['digest'])
+        with shaped_pull(rate, log) as env:
+            rc = runner.call(["podman", "pull", image_ref], timeout=LONG_TIMEOUT, policy=get_policy("pull"), env=env)
+    if rc != 0:
+        log.error("Could not prefetch " + image_ref + ", RC " + str(rc))
+        return 1
+    image = local_image(image_ref, runner)
+    if image is None:
+        log.error(image_ref + " is not installed after the prefetch")
+        return 1
+    verified = [digest for digest in [image['id']] + image['digests'] if digest in expected or
+                "sha256:" + digest in expected]
+    if not verified:
+        log.error(
+            image_ref + " has digests " + ", ".join(image['digests']) +
+            " and ID " + str(image['id']) + ", none is the expected " + ", ".join(expected)
+        )
+        return 1
+    seconds = time.monotonic() - started
+    save_record(version, {
+        'image': image_ref,
+        'id': image['id'],
+        'digest': verified[0],
+        'source': source,
+        'ready_at': datetime.datetime.now().isoformat(),
+        'seconds': round(seconds, 1)
+    })
+    catalog.refresh_local()
+    catalog.save()
+    log.info(image_ref + " prefetched and verified in " + str(int(round(seconds))) + " seconds")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--now', action='store_true', dest='now', default=False,
+                        help='Prefetch now, even outside of PREFETCH_WINDOW.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    with open("rclmgr.yml", "r") as config:
+        container_cfg = yaml.safe_load(config)['CONTAINER']
+    version = container_cfg.get('PREFETCH_VERSION')
+    if version is None or str(version) == str(container_cfg.get('IMAGE_VERSION')):
+        logging.info("No PREFETCH_VERSION other than IMAGE_VERSION in rclmgr.yml, nothing to prefetch")
+        return 0
+    if not args.now:
+        left = window_seconds_left(container_cfg.get('PREFETCH_WINDOW') or DEFAULT_WINDOW)
+        if left <= 0:
+            logging.info("Outside of the prefetch window, nothing done")
+            return 0
+        # A download still running at the end of the window is stopped
+        get_runner().set_deadline(left)
+    return prefetch(container_cfg['IMAGE_NAME'], version, rate=container_cfg.get('PULL_RATE_LIMIT'))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: must_gather.py
+# Description: Collects the diagnostics of the RCL host and containers into
+#              one compressed archive for a support case
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+#   ./startRCLContainer --must-gather
+#   python3 -m classes.must_gather --output case.tar.gz
+#
+# Commands run concurrently, each one with its own timeout and its output in
+# a file instead of memory. Sources are written into the archive as soon as
+# they are complete, every source and the archive as a whole are capped in
+# size. must_gather.json in the archive tells, per source, the RC, the time
+# taken and whether it was truncated or timed out.
+# -----------------------------------------------------------------------------
+
+import argparse
+import datetime
+import glob
+import io
+import json
+import logging
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yaml
+
+from classes.command_runner import get_runner
+from classes.rcl_instances import container_name_of, instance_config, instance_names
+from classes.config_schema import CONFIG_SCHEMA
+from classes.telemetry import ring_path
+
+
+# Seconds a single source may take
+SOURCE_TIMEOUT = 10
+
+# Bytes kept of a single source and of the whole archive, before compression
+SOURCE_CAP = 20 * 1024 * 1024
+ARCHIVE_CAP = 100 * 1024 * 1024
+
+# Sources collected at the same time
+WORKERS = 16
+
+# Bytes read at a time from a file source
+COPY_CHUNK = 1024 * 1024
+
+ARCHIVE_ROOT = "must-gather"
+
+HOST_FILES = [
+    ("host/hosts", "/etc/hosts"),
+    ("host/resolv.conf", "/etc/resolv.conf"),
+    ("host/os-release", "/etc/os-release"),
+    ("host/run_history.db", os.path.join(os.path.expanduser("~"), ".local", "share", "sssrcl", "run_history.db")),
+    ("host/image_catalog.json", os.path.join(os.path.expanduser("~"), ".cache", "sssrcl", "image_catalog.json"))
+]
+
+HOST_COMMANDS = [
+    ("podman/version.txt", ["podman", "version"]),
+    ("podman/info.json", ["podman", "info", "--format", "json"]),
+    ("podman/ps.json", ["podman", "ps", "--all", "--format", "json"]),
+    ("podman/images.json", ["podman", "images", "--format", "json"]),
+    ("podman/system_df.txt", ["podman", "system", "df", "-v"]),
+    ("podman/networks.json", ["podman", "network", "ls", "--format", "json"]),
+    ("host/nft_ruleset.json", ["nft", "-j", "list", "ruleset"]),
+    ("host/ip_addr.json", ["ip", "-j", "addr", "show"]),
+    ("host/ip_route.json", ["ip", "-j", "route", "show"]),
+    ("host/ip_link.json", ["ip", "-j", "-s", "link", "show"]),
+    ("host/uname.txt", ["uname", "-a"]),
+    ("host/df.txt", ["df", "-h", "/home", "/var/tmp"]),
+    ("host/systemctl_user_failed.txt", ["systemctl", "--user", "--failed", "--no-pager"])
+]
+
+
+def unit_name(container_name):
+    return "container-" + container_name + ".service"
+
+
+class must_gather(object):
+    """
+        Diagnostics collector
+
+        A source is a command or a file, with the path it takes in the
+        archive. Commands run in a thread pool through the command runner,
+        so they show in the ledger and obey the global deadline. The
+        archive is written by the calling thread only, in completion order.
+    """
+
+    def __init__(self, archive_path, config_file="rclmgr.yml", log_dir="logs", log=None, runner=None,
+                 timeout=SOURCE_TIMEOUT, source_cap=SOURCE_CAP, archive_cap=ARCHIVE_CAP, workers=WORKERS):
+        self.archive_path = archive_path
+        self.config_file = config_file
+        self.log_dir = log_dir
+        self.log = log or logging.getLogger("must_gather")
+        self.runner = runner or get_runner()
+        self.timeout = timeout
+        self.source_cap = source_cap
+        self.archive_cap = archive_cap
+        self.workers = workers
+        self.written = 0
+
+    def sources(self):
+        # [(archive name, argv or None, file path or None)]
+        sources = [(name, argv, None) for name, argv in HOST_COMMANDS]
+        sources += [(name, None, path) for name, path in HOST_FILES]
+        sources.append(("config/" + os.path.basename(self.config_file), None, self.config_file))
+        for path in sorted(glob.glob(os.path.join(self.log_dir, "*"))):
+            if os.path.isfile(path):
+                sources.append(("logs/" + os.path.basename(path), None, path))
+        container_cfg = self.__container_config()
+        networks = set()
+        for instance in instance_names(container_cfg):
+            name = container_name_of(container_cfg, instance)
+            networks.add(instance_config(container_cfg, instance).get('CONTAINER_NETWORK_NAME'))
+            # The ring can be queried offline with python3 -m classes.telemetry --file
+            ring = ring_path(instance_config(container_cfg, instance)['LOG'], name)
+            sources += [
+                ("containers/" + name + "/inspect.json", ["podman", "container", "inspect", name], None),
+                ("containers/" + name + "/logs.txt",
+                 ["podman", "logs", "--timestamps", "--tail", "10000", name], None),
+                ("containers/" + name + "/unit_status.txt",
+                 ["systemctl", "--user", "status", "--no-pager", "--full", unit_name(name)], None),
+                ("containers/" + name + "/unit_journal.txt",
+                 ["journalctl", "--user", "--no-pager", "-n", "5000", "-u", unit_name(name)], None),
+                ("containers/" + name + "/" + unit_name(name), None,
+                 os.path.join(os.path.expanduser("~"), ".config", "systemd", "user", unit_name(name))),
+                ("containers/" + name + "/telemetry.txt",
+                 [sys.executable, "-m", "classes.telemetry", "--file", ring, "--last", "24h"], None),
+                ("containers/" + name + "/" + os.path.basename(ring), None, ring)
+            ]
+        for network in sorted(network for network in networks if network):
+            sources.append(("podman/network_" + network + ".json", ["podman", "network", "inspect", network], None))
+        return sources
+
+    def collect(self):
+        # Summary of every source, the archive is in place when it returns
+        started = time.monotonic()
+        summary = []
+        partial = self.archive_path + ".part"
+        workdir = tempfile.mkdtemp(prefix="rcl_must_gather_")
+        try:
+            with tarfile.open(partial, "w:gz") as archive:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    futures = [pool.submit(self.__capture, source, workdir) for source in self.sources()]
+                    for future in as_completed(futures):
+                        record, path = future.result()
+                        self.__add(archive, record, path)
+                        summary.append(record)
+                        if os.path.dirname(path) == workdir:
+                            os.remove(path)
+                summary.sort(key=lambda record: record['name'])
+                data = json.dumps({
+                    'created': datetime.datetime.now().isoformat(),
+                    'seconds': round(time.monotonic() - started, 3),
+                    'bytes': self.written,
+                    'sources': summary
+                }, indent=2).encode("utf-8")
+                info = tarfile.TarInfo(ARCHIVE_ROOT + "/must_gather.json")
+                info.size = len(data)
+                info.mtime = time.time()
+                archive.addfile(info, fileobj=io.BytesIO(data))
+            os.rename(partial, self.archive_path)
+        finally:
+            for leftover in glob.glob(os.path.join(workdir, "*")):
+                os.remove(leftover)
+            os.rmdir(workdir)
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.log.info(
+            "Diagnostics of " +
+            str(len(summary)) +
+            " sources written to " +
+            self.archive_path +
+            " in " +
+            str(round(time.monotonic() - started, 1)) +
+            " seconds"
+        )
+        return summary
+
+    def __container_config(self):
+        # The CONTAINER section as it is, the defaults if it cannot be read
+        try:
+            with open(self.config_file, "r") as config:
+                container_cfg = yaml.safe_load(config)['CONTAINER']
+            instance_names(container_cfg)
+            container_name_of(container_cfg)
+            return container_cfg
+        except (OSError, yaml.YAMLError, KeyError, TypeError, AttributeError):
+            self.log.warning("Cannot read " + self.config_file + ", collecting the default container only")
+            return CONFIG_SCHEMA.default_config()['CONTAINER']
+
+    def __capture(self, source, workdir):
+        name, argv, path = source
+        record = {
+            'name': name,
+            'argv': argv,
+            'path': path,
+            'rc': None,
+            'seconds': None,
+            'timed_out': False,
+            'truncated': False,
+            'bytes': 0,
+            'error': None
+        }
+        if argv is None:
+            if not os.path.isfile(path):
+                record['error'] = "file does not exist"
+                return record, path
+            # The copy is archived, a log rotated while tarfile reads it
+            # would leave a member shorter than its header
+            handle, copy_path = tempfile.mkstemp(dir=workdir)
+            try:
+                with os.fdopen(handle, "wb") as copy, open(path, "rb") as source:
+                    left = self.source_cap + 1
+                    while left > 0:
+                        chunk = source.read(min(left, COPY_CHUNK))
+                        if not chunk:
+                            break
+                        copy.write(chunk)
+                        left -= len(chunk)
+            except OSError as err:
+                record['error'] = str(err)
+            return record, copy_path
+        handle, output_path = tempfile.mkstemp(dir=workdir)
+        with os.fdopen(handle, "wb") as output:
+            result = self.runner.run(argv, timeout=self.timeout, output_file=output)
+        record['rc'] = result.rc
+        record['seconds'] = round(result.duration, 3)
+        record['timed_out'] = result.timed_out
+        if result.error.strip() != "":
+            record['error'] = result.error.strip()[-2000:]
+        return record, output_path
+
+    def __add(self, archive, record, path):
+        try:
+            size = os.path.getsize(path)
+            with open(path, "rb") as source:
+                kept = min(size, self.source_cap, self.archive_cap - self.written)
+                if kept <= 0 and size > 0:
+                    record['truncated'] = True
+                    record['error'] = "archive size cap reached, not collected"
+                    return
+                info = tarfile.TarInfo(ARCHIVE_ROOT + "/" + record['name'])
+                info.size = kept
+                info.mtime = time.time()
+                archive.addfile(info, fileobj=source)
+        except (OSError, TypeError) as err:
+            if record['error'] is None:
+                record['error'] = str(err)
+            return
+        record['bytes'] = kept
+        record['truncated'] = kept < size
+        self.written += kept
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Collects the diagnostics of the RCL host and containers.')
+    parser.add_argument('--output', action='store', dest='output', default=None,
+                        help='Archive written. Default: rcl_must_gather_<date>.tar.gz')
+    parser.add_argument('--config', action='store', dest='config_file', default="rclmgr.yml",
+                        help='rclmgr.yml of the containers. Default: rclmgr.yml')
+    parser.add_argument('--timeout', action='store', dest='timeout', type=int, default=SOURCE_TIMEOUT,
+                        help='Seconds allowed to every source. Default: ' + str(SOURCE_TIMEOUT))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    output = args.output or default_archive_name()
+    must_gather(output, config_file=args.config_file, timeout=args.timeout).collect()
+    return 0
+
+
+def default_archive_name():
+    return "rcl_must_gather_" + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + ".tar.gz"
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,434 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: offline_bundle.py
+# Description: Offline bundle of RCL images and tools for air-gapped sites,
+#              zstd compressed and deduplicated by content
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# A bundle is a plain tar file, so the tools can be taken out of it with tar
+# alone before rclmgr exists on the host:
+#
+#   bundle.json              manifest, always the first member
+#   tools/rclmgr             rclmgr, startRCLContainer, rclmgr.yml template,
+#   tools/classes/...        README.md and classes/, uncompressed
+#   blobs/<sha256>.zst       every file of the podman save archive, zstd
+#                            compressed and stored once per content
+#
+# A delta bundle is built against a base version and leaves out the layers
+# of the base image. It is applied where the base image is installed: the
+# layers left out are written as empty placeholders, podman finds them in
+# its storage by their digest and never reads them. The ID of every image
+# loaded is then checked against the sha256 of its config.
+#
+# The manifest lists the members of the podman save archive in order, with
+# the blob of each one. Loading rebuilds that archive on the fly: the blobs
+# are decompressed by one zstd process and written as a tar stream into the
+# stdin of "podman load", reading, decompressing and loading run at the same
+# time and no decompressed copy is written to disk.
+# -----------------------------------------------------------------------------
+
+import datetime
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+
+from classes.command_runner import get_runner, LONG_TIMEOUT
+
+
+BUNDLE_FORMAT = 1
+
+# Delta bundles cannot be loaded by the tools that only know full bundles
+DELTA_BUNDLE_FORMAT = 2
+
+BUNDLE_MANIFEST = "bundle.json"
+
+# Bundles end in .tar so the image catalog indexes them with the tarballs
+BUNDLE_SUFFIX = ".bundle.tar"
+
+# Compression level and window of zstd. A 128 MiB window needs no option to
+# be decompressed, larger ones do
+ZSTD_LEVEL = 19
+ZSTD_WINDOW_LOG = 27
+
+COPY_CHUNK = 1024 * 1024
+
+TOOL_FILES = ["rclmgr", "startRCLContainer", "rclmgr.yml", "README.md"]
+TOOL_GLOBS = ["classes/*.py"]
+
+
+def is_bundle(path):
+    try:
+        with tarfile.open(path, "r:") as archive:
+            first = archive.next()
+    except (tarfile.TarError, OSError):
+        return False
+    return first is not None and first.name == BUNDLE_MANIFEST
+
+
+def read_manifest(path):
+    # Manifest of bundle path, None if it is not a bundle
+    try:
+        with tarfile.open(path, "r:") as archive:
+            return json.loads(archive.extractfile(BUNDLE_MANIFEST).read().decode("utf-8"))
+    except (tarfile.TarError, KeyError, ValueError, OSError, AttributeError):
+        return None
+
+
+def layer_stem(name):
+    # "<sha256>.tar" and "<sha256>/layer.tar" both name a layer by digest
+    if name.endswith("/layer.tar"):
+        name = name[:-len("/layer.tar")]
+    elif name.endswith(".tar"):
+        name = name[:-len(".tar")]
+    return os.path.basename(name)
+
+
+class hashing_reader(object):
+    """
+        File object that hashes what is read through it
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.sha256.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+class offline_bundle(object):
+    """
+        Builds and loads one offline bundle file
+
+        build() saves the images with podman, compresses every member of the
+        archive with zstd using all the cores and stores each content once.
+        load() streams the archive back into podman storage and checks the
+        sha256 of every member on the way.
+    """
+
+    def __init__(self, path, log=None, runner=None):
+        self.path = path
+        self.log = log or logging.getLogger("offline_bundle")
+        self.runner = runner or get_runner()
+        self.manifest = None
+
+    def build(self, image_refs, source_dir=".", base_ref=None):
+        # The manifest written, None when the bundle could not be built.
+        # With base_ref the layers of that image are left out
+        if shutil.which("zstd") is None:
+            self.log.error("zstd is not installed, install the zstd package to build bundles")
+            return None
+        base_layers = set()
+        if base_ref is not None:
+            base_layers = self.image_layers(base_ref)
+            if base_layers is None:
+                self.log.error("Base image " + base_ref + " is not installed, the delta cannot be built")
+                return None
+        workdir = tempfile.mkdtemp(
+            prefix="rcl_bundle_",
+            dir=os.path.dirname(os.path.abspath(self.path))
+        )
+        try:
+            archive_path = os.path.join(workdir, "images.tar")
+            result = self.runner.run(
+                ["podman", "save", "-m", "--format", "docker-archive", "-o", archive_path] + image_refs,
+                timeout=LONG_TIMEOUT, retries=2
+            )
+            if not result.ok:
+                self.log.error(
+                    "Could not save " +
+                    ", ".join(image_refs) +
+                    ": " +
+                    result.error.strip()
+                )
+                return None
+            manifest = {
+                'format': BUNDLE_FORMAT if base_ref is None else DELTA_BUNDLE_FORMAT,
+                'created': datetime.datetime.now().isoformat(),
+                'images': image_refs,
+                'base': base_ref,
+                'zstd_window_log': ZSTD_WINDOW_LOG
+            }
+            manifest.update(self.__compress_archive(archive_path, workdir, base_layers))
+            # The archive is not needed any more, its room goes to the bundle
+            os.remove(archive_path)
+            manifest['tools'] = self.__tools(source_dir)
+            self.__write(manifest, workdir, source_dir)
+        except OSError as err:
+            self.log.error("Could not build bundle " + self.path + ": " + str(err))
+            return None
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.manifest = manifest
+        return manifest
+
+    def load(self, timeout=LONG_TIMEOUT):
+        # command_result of "podman load", fed with the rebuilt archive
+        self.manifest = read_manifest(self.path)
+        if self.manifest is None or self.manifest.get('format') not in [BUNDLE_FORMAT, DELTA_BUNDLE_FORMAT]:
+            raise ValueError(self.path + " is not a bundle this version of rclmgr can load")
+        missing = self.missing_base_layers()
+        if len(missing) > 0:
+            raise ValueError(
+                "Delta bundle " + self.path + " needs the base image " + str(self.manifest['base']) +
+                ", " + str(len(missing)) + " of its layers are not installed"
+            )
+        with tarfile.open(self.path, "r:") as bundle:
+            files = [
+                entry for entry in self.manifest['entries']
+                if entry['type'] == "file" and not entry.get('in_base')
+            ]
+            decompressor = subprocess.Popen(
+                ["zstd", "-d", "-q", "-c", "--long=" + str(self.manifest['zstd_window_log'])],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE
+            )
+            feeder_errors = []
+            feeder = threading.Thread(
+                target=self.__feed,
+                args=(bundle, files, decompressor.stdin, feeder_errors),
+                name="bundle-feeder",
+                daemon=True
+            )
+            feeder.start()
+
+            def write_archive(stdin):
+                with tarfile.open(fileobj=stdin, mode="w|") as archive:
+                    for entry in self.manifest['entries']:
+                        self.__add_entry(archive, entry, decompressor.stdout)
+                if decompressor.stdout.read(1) != b"":
+                    raise ValueError("bundle blobs hold more data than the manifest lists")
+
+            try:
+                result = self.runner.run(["podman", "load"], timeout=timeout, input_writer=write_archive)
+            finally:
+                if decompressor.poll() is None:
+                    decompressor.kill()
+                decompressor.wait()
+                feeder.join()
+        if len(feeder_errors) > 0 and result.ok:
+            result.rc = 1
+            result.error += "Reading the bundle failed: " + str(feeder_errors[0]) + "\n"
+        return result
+
+    def missing_base_layers(self):
+        # Layers a delta bundle leaves out that podman storage does not have
+        if self.manifest.get('base') is None:
+            return []
+        installed = self.image_layers(self.manifest['base']) or set()
+        return [
+            entry['blob'] for entry in self.manifest['entries']
+            if entry.get('in_base') and entry['blob'] not in installed
+        ]
+
+    def verify(self):
+        # Images whose ID after the load is not the sha256 of their config
+        problems = []
+        blobs = dict(
+            (entry['name'], entry['blob']) for entry in self.manifest['entries'] if entry['type'] == "file"
+        )
+        for image in self.manifest.get('manifest') or []:
+            expected = blobs.get(image.get('Config'))
+            for repo_tag in image.get('RepoTags') or []:
+                result = self.runner.run(
+                    ["podman", "image", "inspect", "--format", "{{.Id}}", repo_tag], retries=2
+                )
+                image_id = result.output.strip().replace("sha256:", "") if result.ok else None
+                if image_id != expected:
+                    problems.append(
+                        repo_tag + " has ID " + str(image_id) + " instead of " + str(expected)
+                    )
+        return problems
+
+    def image_layers(self, image_ref):
+        # sha256 of the uncompressed layers of an installed image, None if
+        # it is not installed
+        result = self.runner.run(["podman", "image", "inspect", "--format", "json", image_ref], retries=2)
+        try:
+            inspect = json.loads(result.output) if result.ok else None
+        except ValueError:
+            inspect = None
+        if not inspect:
+            return None
+        layers = (inspect[0].get('RootFS') or {}).get('Layers') or []
+        return set(layer.replace("sha256:", "") for layer in layers)
+
+    def __compress_archive(self, archive_path, workdir, base_layers):
+        entries = []
+        blobs = {}
+        docker_manifest = None
+        with tarfile.open(archive_path, "r:") as archive:
+            for member in archive:
+                if member.isdir():
+                    entries.append({'name': member.name, 'type': "dir"})
+                    continue
+                if member.issym():
+                    entries.append({'name': member.name, 'type': "symlink", 'link': member.linkname})
+                    continue
+                if not member.isfile():
+                    continue
+                source = archive.extractfile(member)
+                if layer_stem(member.name) in base_layers:
+                    # Named after a base layer, left out if the content agrees
+                    digest = self.__hash(source)
+                    if digest in base_layers:
+                        entries.append({
+                            'name': member.name, 'type': "file", 'blob': digest,
+                            'size': member.size, 'in_base': True
+                        })
+                        continue
+                    source = archive.extractfile(member)
+                if member.name == "manifest.json":
+                    data = source.read()
+                    docker_manifest = json.loads(data.decode("utf-8"))
+                    source = io.BytesIO(data)
+                digest, compressed_path = self.__compress(source, workdir)
+                blob_path = os.path.join(workdir, digest + ".zst")
+                if digest in blobs:
+                    os.remove(compressed_path)
+                else:
+                    os.rename(compressed_path, blob_path)
+                    blobs[digest] = {'size': member.size, 'compressed': os.path.getsize(blob_path)}
+                entries.append({'name': member.name, 'type': "file", 'blob': digest, 'size': member.size})
+        self.log.debug(
+            "Bundle holds " +
+            str(len(blobs)) +
+            " blobs for " +
+            str(len([entry for entry in entries if entry['type'] == "file"])) +
+            " archive members, " +
+            str(len([entry for entry in entries if entry.get('in_base')])) +
+            " left to the base image"
+        )
+        return {'entries': entries, 'blobs': blobs, 'manifest': docker_manifest}
+
+    def __hash(self, source):
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: source.read(COPY_CHUNK), b""):
+            sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def __compress(self, source, workdir):
+        handle, compressed_path = tempfile.mkstemp(dir=workdir, suffix=".part")
+        sha256 = hashlib.sha256()
+        with os.fdopen(handle, "wb") as compressed:
+            compressor = subprocess.Popen(
+                ["zstd", "-q", "-c", "-T0", "-" + str(ZSTD_LEVEL), "--long=" + str(ZSTD_WINDOW_LOG)],
+                stdin=subprocess.PIPE,
+                stdout=compressed
+            )
+            try:
+                for chunk in iter(lambda: source.read(COPY_CHUNK), b""):
+                    sha256.update(chunk)
+                    compressor.stdin.write(chunk)
+            finally:
+                compressor.stdin.close()
+                rc = compressor.wait()
+        if rc != 0:
+            raise OSError("zstd failed with RC " + str(rc))
+        return sha256.hexdigest(), compressed_path
+
+    def __tools(self, source_dir):
+        tools = []
+        names = list(TOOL_FILES)
+        for pattern in TOOL_GLOBS:
+            names += sorted(
+                os.path.relpath(path, source_dir)
+                for path in glob.glob(os.path.join(source_dir, pattern))
+            )
+        for name in names:
+            path = os.path.join(source_dir, name)
+            if not os.path.isfile(path):
+                self.log.warning("Tool " + name + " is not in " + source_dir + ", not bundled")
+                continue
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as tool:
+                for chunk in iter(lambda: tool.read(COPY_CHUNK), b""):
+                    sha256.update(chunk)
+            tools.append({'name': name, 'sha256': sha256.hexdigest()})
+        return tools
+
+    def __write(self, manifest, workdir, source_dir):
+        partial = self.path + ".part"
+        with tarfile.open(partial, "w") as bundle:
+            data = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+            info = tarfile.TarInfo(BUNDLE_MANIFEST)
+            info.size = len(data)
+            info.mtime = int(datetime.datetime.now().timestamp())
+            bundle.addfile(info, io.BytesIO(data))
+            for tool in manifest['tools']:
+                bundle.add(os.path.join(source_dir, tool['name']), arcname="tools/" + tool['name'])
+            # Blobs in archive order, load reads the bundle front to back
+            written = set()
+            for entry in manifest['entries']:
+                if entry['type'] == "file" and not entry.get('in_base') and entry['blob'] not in written:
+                    bundle.add(os.path.join(workdir, entry['blob'] + ".zst"), arcname="blobs/" + entry['blob'] + ".zst")
+                    written.add(entry['blob'])
+        os.rename(partial, self.path)
+
+    def __feed(self, bundle, files, stdin, errors):
+        # Compressed blobs into zstd, in the order the archive needs them
+        try:
+            for entry in files:
+                blob = bundle.extractfile("blobs/" + entry['blob'] + ".zst")
+                shutil.copyfileobj(blob, stdin, COPY_CHUNK)
+        except (KeyError, OSError, tarfile.TarError) as err:
+            errors.append(err)
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
+
+    def __add_entry(self, archive, entry, decompressed):
+        info = tarfile.TarInfo(entry['name'])
+        info.mtime = 0
+        if entry['type'] == "dir":
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            archive.addfile(info)
+            return
+        if entry['type'] == "symlink":
+            info.type = tarfile.SYMTYPE
+            info.linkname = entry['link']
+            archive.addfile(info)
+            return
+        info.mode = 0o644
+        if entry.get('in_base'):
+            # podman reuses the installed layer with this digest
+            archive.addfile(info, io.BytesIO(b""))
+            return
+        info.size = entry['size']
+        reader = hashing_reader(decompressed)
+        archive.addfile(info, reader)
+        if reader.hexdigest() != entry['blob']:
+            raise ValueError(
+                "member " + entry['name'] + " of the bundle does not match its sha256, the bundle is damaged"
+            )
@@ -0,0 +1,370 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: podman_events.py
+# Description: Container and image state kept current from the podman
+#              events stream, so lifecycle code waits instead of polling
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# A stream can be recorded and replayed later, one JSON event per line:
+#
+#   python3 -m classes.podman_events --record events.jsonl
+#   python3 -m classes.podman_events --replay events.jsonl
+# -----------------------------------------------------------------------------
+
+import argparse
+import atexit
+import calendar
+import datetime
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+
+from classes.command_runner import get_runner
+from classes.storage_gc import field, names_of
+
+
+# Container state after each podman event status. kill only means a signal
+# was sent, the exit comes with died
+CONTAINER_TRANSITIONS = {
+    'create': 'created',
+    'init': 'initialized',
+    'start': 'running',
+    'restart': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'died': 'exited',
+    'stop': 'exited',
+    'kill': None,
+    'remove': 'removed',
+    'rename': None
+}
+
+# States of podman ps that mean the container is not running
+STOPPED_STATES = ["exited", "created", "stopped", "configured", "initialized"]
+
+# Names of the numeric states older podman ps puts in State
+NUMERIC_STATES = ["unknown", "configured", "created", "running", "stopped", "paused", "exited", "removing",
+                  "stopping"]
+
+
+def state_name(state):
+    # "running" of a podman ps State, 3 and "Running" alike
+    if isinstance(state, int) and 0 <= state < len(NUMERIC_STATES):
+        return NUMERIC_STATES[state]
+    return str(state).lower()
+
+
+def event_time(event):
+    # Seconds since the epoch, podman puts it in different keys by release
+    if event.get('timeNano'):
+        return int(event['timeNano']) / 1e9
+    if isinstance(event.get('time'), (int, float)):
+        return float(event['time'])
+    stamp = event.get('Time') or event.get('time')
+    if isinstance(stamp, str):
+        # "2024-04-03T10:00:00.123456789+02:00", strptime of python 3.6
+        # takes neither nanoseconds nor a colon in the offset
+        try:
+            offset = 0
+            if stamp.endswith("Z"):
+                stamp = stamp[:-1]
+            elif len(stamp) > 6 and stamp[-6] in "+-" and stamp[-3] == ":":
+                sign = 1 if stamp[-6] == "+" else -1
+                offset = sign * (int(stamp[-5:-3]) * 3600 + int(stamp[-2:]) * 60)
+                stamp = stamp[:-6]
+            fraction = 0.0
+            if "." in stamp:
+                stamp, digits = stamp.split(".", 1)
+                fraction = float("0." + digits)
+            parsed = datetime.datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%S")
+            return calendar.timegm(parsed.timetuple()) + fraction - offset
+        except ValueError:
+            pass
+    return time.time()
+
+
+def parse_event(line):
+    # One line of "podman events --format json", None if it is not an event
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    return {
+        'type': str(field(event, 'Type', 'type') or "").lower(),
+        'status': str(field(event, 'Status', 'status', 'Action') or "").lower(),
+        'name': field(event, 'Name', 'name'),
+        'id': field(event, 'ID', 'Id', 'id'),
+        'image': field(event, 'Image', 'image'),
+        'old_name': (field(event, 'Attributes', 'attributes') or {}).get('oldName'),
+        'time': event_time(event)
+    }
+
+
+class podman_events(object):
+    """
+        In-memory model of the containers and images of rcladmin
+
+        The model is seeded with one "podman ps --all" listing and then
+        follows "podman events --format json" from a reader thread. A
+        Condition is notified on every event, wait_for() blocks until a
+        container enters one of the given states and returns the time of
+        the transition as podman recorded it.
+
+        The containers are kept in the shape of "podman ps --format json"
+        entries, with Names, Id, Image and State, plus StateSince.
+    """
+
+    def __init__(self, log=None, runner=None, record_file=None):
+        self.log = log or logging.getLogger("podman_events")
+        self.runner = runner or get_runner()
+        self.record_file = record_file
+        self.condition = threading.Condition()
+        self.container_model = {}
+        self.image_model = {}
+        self.events_seen = 0
+        self.running = False
+        self.__process = None
+        self.__reader = None
+        self.__record = None
+
+    def start(self, seed=True):
+        # False when podman events cannot be followed, callers poll then
+        since = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        if seed:
+            self.seed()
+        try:
+            # Events since the seed, so none falls between the two. Not run
+            # through the command runner, which waits for a command to end:
+            # podman events never ends, it is stopped by stop()
+            self.__process = subprocess.Popen(
+                ["podman", "events", "--format", "json", "--since", since],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL
+            )
+        except OSError:
+            self.log.debug("Cannot follow podman events, state is polled instead")
+            return False
+        # The podman events child must not outlive us, sys.exit included
+        atexit.register(self.stop)
+        if self.record_file is not None:
+            self.__record = open(self.record_file, "a")
+        self.running = True
+        self.__reader = threading.Thread(
+            target=self.__read_stream,
+            args=(self.__process.stdout,),
+            name="podman-events",
+            daemon=True
+        )
+        self.__reader.start()
+        self.log.debug("Following podman events since " + since)
+        return True
+
+    def replay(self, path, speed=None):
+        # Feeds a recorded stream, in real time scaled by speed if given
+        self.running = True
+        previous = None
+        with open(path, "r") as events_file:
+            for line in events_file:
+                event = parse_event(line)
+                if event is None:
+                    continue
+                if speed is not None and previous is not None:
+                    time.sleep(max(0.0, (event['time'] - previous) / speed))
+                previous = event['time']
+                self.apply(event)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def stop(self):
+        if self.__process is not None and self.__process.poll() is None:
+            self.__process.terminate()
+            try:
+                self.__process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.__process.kill()
+        if self.__reader is not None:
+            self.__reader.join(5)
+        if self.__record is not None:
+            self.__record.close()
+            self.__record = None
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def seed(self):
+        result = self.runner.run(["podman", "ps", "--all", "--format", "json"], retries=2)
+        try:
+            containers = json.loads(result.output) if result.ok else []
+        except ValueError:
+            containers = []
+        now = time.time()
+        with self.condition:
+            for container in containers or []:
+                for name in names_of(container):
+                    self.container_model[name] = {
+                        'Names': [name],
+                        'Id': field(container, 'Id', 'ID', 'id'),
+                        'Image': field(container, 'Image', 'image'),
+                        'State': state_name(field(container, 'State', 'state')),
+                        'StateSince': now
+                    }
+            self.condition.notify_all()
+        self.log.debug("Seeded podman state with " + str(len(self.container_model)) + " containers")
+
+    def apply(self, event):
+        with self.condition:
+            self.events_seen += 1
+            if event['type'] == "container" and event['name'] is not None:
+                self.__apply_container(event)
+            elif event['type'] == "image":
+                name = event['name'] or event['id']
+                if name is not None:
+                    self.image_model[name] = {
+                        'id': event['id'],
+                        'status': event['status'],
+                        'time': event['time']
+                    }
+            self.condition.notify_all()
+
+    def state(self, name):
+        # Current state of container name, None if it does not exist
+        with self.condition:
+            container = self.container_model.get(name)
+            if container is None or container['State'] == 'removed':
+                return None
+            return container['State']
+
+    def containers(self):
+        # Existing containers, as "podman ps --all --format json" lists them
+        with self.condition:
+            return [
+                dict(container) for container in self.container_model.values()
+                if container['State'] != 'removed'
+            ]
+
+    def wait_for(self, name, states, timeout):
+        # Time the container entered one of states, None on timeout.
+        # The state "removed" also matches a container that does not exist
+        if isinstance(states, str):
+            states = [states]
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                container = self.container_model.get(name)
+                current = container['State'] if container is not None else 'removed'
+                if current in states:
+                    return container['StateSince'] if container is not None else time.time()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.condition.wait(remaining)
+
+    def __apply_container(self, event):
+        name = event['name']
+        if event['status'] == 'rename':
+            # Not every podman release tells the old name, the ID does not change
+            old_name = event['old_name']
+            if old_name not in self.container_model:
+                for known_name, container in self.container_model.items():
+                    if known_name != name and container['Id'] == event['id']:
+                        old_name = known_name
+                        break
+            if old_name in self.container_model:
+                self.container_model[name] = self.container_model.pop(old_name)
+                self.container_model[name]['Names'] = [name]
+            return
+        new_state = CONTAINER_TRANSITIONS.get(event['status'])
+        if new_state is None:
+            return
+        container = self.container_model.setdefault(name, {
+            'Names': [name],
+            'Id': event['id'],
+            'Image': event['image'],
+            'State': None,
+            'StateSince': None
+        })
+        # A new container under a name just removed
+        if container['Id'] != event['id'] and event['status'] == 'create':
+            container['Id'] = event['id']
+            container['Image'] = event['image']
+        if container['State'] != new_state:
+            self.log.debug(
+                "Container " +
+                name +
+                " went from " +
+                str(container['State']) +
+                " to " +
+                new_state
+            )
+            container['State'] = new_state
+            container['StateSince'] = event['time']
+
+    def __read_stream(self, stream):
+        for raw_line in iter(stream.readline, b''):
+            line = raw_line.decode("utf-8", errors="replace")
+            if self.__record is not None:
+                self.__record.write(line)
+                self.__record.flush()
+            event = parse_event(line)
+            if event is not None:
+                self.apply(event)
+        stream.close()
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Records or replays the podman events stream.')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--record', action='store', dest='record', default=None,
+                      help='Append the live events to this JSON lines file until interrupted.')
+    mode.add_argument('--replay', action='store', dest='replay', default=None,
+                      help='Replay a recorded JSON lines file and print the final state.')
+    parser.add_argument('--speed', action='store', dest='speed', type=float, default=None,
+                        help='Replay in real time scaled by this factor. Default: as fast as possible')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+
+    events = podman_events(record_file=args.record)
+    if args.record is not None:
+        if not events.start(seed=False):
+            return 1
+        try:
+            while events.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        events.stop()
+    else:
+        events.replay(args.replay, args.speed)
+    for container in sorted(events.containers(), key=lambda container: container['Names'][0]):
+        print(container['Names'][0] + " " + container['State'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
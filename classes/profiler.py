@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: profiler.py
+# Description: Profiling mode for startRCLContainer and rclmgr runs
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import cProfile
+import os
+import signal
+import sys
+import threading
+import tracemalloc
+
+# Seconds of CPU time between two stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Allocation sites written into the memory report
+TRACEMALLOC_TOP = 50
+
+
+class stack_sampler(object):
+    """
+        Samples the Python stack of the main thread on a CPU timer and
+        keeps the counts in collapsed stack format, as flamegraph.pl and
+        speedscope read it: "frame;frame;frame count"
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = {}
+        self.__previous_handler = None
+
+    def start(self):
+        self.__previous_handler = signal.signal(signal.SIGPROF, self.__sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        if self.__previous_handler is not None:
+            signal.signal(signal.SIGPROF, self.__previous_handler)
+
+    def __sample(self, signum, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(
+                code.co_name + " (" + os.path.basename(code.co_filename) +
+                ":" + str(code.co_firstlineno) + ")"
+            )
+            frame = frame.f_back
+        stack = ";".join(reversed(frames))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def write(self, path):
+        with open(path, "w") as collapsed_file:
+            for stack, count in sorted(self.stacks.items()):
+                collapsed_file.write(stack + " " + str(count) + "\n")
+
+
+def run_profiled(func, output_prefix, memory=False):
+    """
+        Runs func under cProfile and the stack sampler and, when asked,
+        tracemalloc. Writes <output_prefix>.pstats, <output_prefix>.collapsed
+        and <output_prefix>.tracemalloc.txt. The files are written even when
+        func leaves through sys.exit, and its exception is raised again.
+    """
+    output_dir = os.path.dirname(output_prefix)
+    if output_dir != "" and not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    profile = cProfile.Profile()
+    sampler = stack_sampler()
+    # SIGPROF can only be handled from the main thread
+    sampling = threading.current_thread() is threading.main_thread()
+    if memory:
+        tracemalloc.start()
+    if sampling:
+        sampler.start()
+    profile.enable()
+    try:
+        return func()
+    finally:
+        profile.disable()
+        if sampling:
+            sampler.stop()
+        profile.dump_stats(output_prefix + ".pstats")
+        if sampling:
+            sampler.write(output_prefix + ".collapsed")
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(output_prefix + ".tracemalloc.txt", "w") as memory_file:
+                memory_file.write(
+                    "current " + str(current) + " bytes, peak " + str(peak) + " bytes\n"
+                )
+                for stat in snapshot.statistics('lineno')[0:TRACEMALLOC_TOP]:
+                    memory_file.write(str(stat) + "\n")
+        sys.stderr.write("Profile written to " + output_prefix + ".*\n")
@@ -0,0 +1,407 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: pull_shaper.py
+# Description: Bandwidth shaped image pulls that leave room on the campus
+#              uplink for the live RCL support tunnel
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# With PULL_RATE_LIMIT set in the CONTAINER section of rclmgr.yml, podman
+# pull is pointed through HTTPS_PROXY and HTTP_PROXY at a proxy on
+# 127.0.0.1, which:
+#
+#   - caps the download of all its connections together to the limit
+#   - keeps the receive window of its registry connections small, so the
+#     registry cannot queue more than a fraction of a second on the uplink
+#   - marks its connections to the registry with DSCP CS1, the low priority
+#     class, so a QoS aware uplink serves the tunnel first
+#   - times the TCP connect to the RCL endpoints while the pull runs. When
+#     the lowest of the last round trips is well past the one measured
+#     before the pull, the uplink is queueing and the rate is halved, it
+#     then grows back by a tenth of the limit every interval the round trip
+#     stays normal
+#
+# A proxy already set in the environment is used as the next hop.
+# perf/shaped_pull_check.py tests all this against a throttled registry
+# stand-in, no real registry is needed.
+# -----------------------------------------------------------------------------
+
+import contextlib
+import logging
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from classes.endpoint_ranking import CONNECT_TIMEOUT as CONNECT_TIMEOUT_RTT, RCL_ENDPOINTS, RCL_PORT, connect_time
+from classes.config_checks import MIN_RATE, format_size, parse_size
+
+
+# DSCP CS1, shifted into the TOS byte
+LOW_PRIORITY_TOS = 8 << 2
+
+# Seconds between two round trip samples, and samples of the baseline.
+# start() waits BASELINE_SECONDS at most for them, a connect to an endpoint
+# that does not answer takes its whole timeout
+RTT_INTERVAL = 2
+BASELINE_SAMPLES = 3
+BASELINE_SECONDS = 6
+
+# The current round trip is the lowest of the last samples, a single one
+# caught behind a burst is not queueing
+CURRENT_SAMPLES = 3
+
+# The uplink is queueing when the round trip is above the baseline times
+# RTT_FACTOR plus RTT_SLACK seconds
+RTT_FACTOR = 2.0
+RTT_SLACK = 0.02
+
+# Share of the limit given back every interval without queueing
+INCREASE_SHARE = 0.1
+
+# Receive buffer of the registry connections, the bytes the rate allows in
+# WINDOW_SECONDS, enough for the round trip of a registry far away
+WINDOW_SECONDS = 0.25
+MIN_RECEIVE_BUFFER = 65536
+
+CHUNK_BYTES = 16384
+HEAD_MAX_BYTES = 65536
+CONNECT_TIMEOUT = 30
+
+# Headers of a request head replaced by Connection: close
+HOP_HEADERS = [b"connection", b"proxy-connection", b"keep-alive"]
+
+
+def close_after(head):
+    # Request head asking the server to close once it answered, the next
+    # request of the client may be for another host
+    lines = head.split(b"\r\n\r\n", 1)[0].split(b"\r\n")
+    kept = [line for line in lines[1:] if line.split(b":", 1)[0].strip().lower() not in HOP_HEADERS]
+    return b"\r\n".join([lines[0]] + kept + [b"Connection: close", b"", b""]) + head.split(b"\r\n\r\n", 1)[1]
+
+
+def endpoint_probe(endpoints=None, port=RCL_PORT):
+    # Round trip probe of the first endpoint that answers, it then sticks to
+    # it. A connect timing out counts as the full timeout, a congested
+    # uplink is the likely cause
+    chosen = []
+
+    def probe():
+        for endpoint in chosen or endpoints or RCL_ENDPOINTS:
+            try:
+                rtt = connect_time(endpoint, port)
+            except socket.timeout:
+                if chosen:
+                    return float(CONNECT_TIMEOUT_RTT)
+                continue
+            except OSError:
+                continue
+            if not chosen:
+                chosen.append(endpoint)
+            return rtt
+        return None
+    return probe
+
+
+class token_bucket(object):
+    """
+        Rate shared by the connections of the proxy
+
+        A take past the tokens left puts the bucket in debt and sleeps
+        until the debt is paid, so readers are served in turn.
+    """
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.__refill()
+            self.rate = float(rate)
+
+    def take(self, count):
+        with self.lock:
+            self.__refill()
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def __refill(self):
+        now = time.monotonic()
+        # At most a quarter of a second of burst is kept
+        self.tokens = min(self.rate / 4, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+
+class shaped_proxy(object):
+    """
+        HTTP proxy on 127.0.0.1 shaping what is downloaded through it
+
+        CONNECT tunnels, used for https registries, and absolute form
+        requests, used for http ones, are relayed. Only the download
+        direction is shaped, the requests are small. rtt_probe returns a
+        round trip in seconds or None, endpoint_probe() by default.
+    """
+
+    def __init__(self, rate, rtt_probe=None, log=None, interval=RTT_INTERVAL, next_hop=None):
+        # next_hop False goes direct even with a proxy in the environment
+        self.limit = parse_size(rate)
+        self.rate = self.limit
+        self.bucket = token_bucket(self.limit)
+        self.receive_buffer = max(MIN_RECEIVE_BUFFER, int(self.limit * WINDOW_SECONDS))
+        self.rtt_probe = rtt_probe or endpoint_probe()
+        self.log = log or logging.getLogger("pull_shaper")
+        self.interval = interval
+        self.next_hop = next_hop if next_hop is not None else proxy_from_environment()
+        self.baseline = None
+        self.rtts = []
+        self.backoffs = 0
+        self.min_rate = self.limit
+        self.downloaded = 0
+        self.started = None
+        self.server = None
+        self.url = None
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        self.baseline = self.__baseline()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(16)
+        self.url = "http://127.0.0.1:" + str(self.server.getsockname()[1])
+        self.started = time.monotonic()
+        for target in [self.__accept_loop, self.__adapt_loop]:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        self.log.info(
+            "Pull limited to " +
+            format_size(self.limit) +
+            "/s through " +
+            self.url +
+            (", endpoint round trip " + str(round(self.baseline * 1000, 1)) + " ms before the pull"
+             if self.baseline is not None else ", no endpoint answers, the rate is not adapted")
+        )
+        return self.url
+
+    def stop(self):
+        self.stopping.set()
+        try:
+            self.server.close()
+        except OSError:
+            pass
+        seconds = max(0.001, time.monotonic() - self.started)
+        self.log.info(
+            "Pulled " +
+            format_size(self.downloaded) +
+            " in " +
+            str(round(seconds, 1)) +
+            " seconds, " +
+            format_size(self.downloaded / seconds) +
+            "/s, backed off " +
+            str(self.backoffs) +
+            " times down to " +
+            format_size(self.min_rate) +
+            "/s"
+        )
+
+    def env(self, base=None):
+        # Environment of a command pulling through the proxy
+        env = dict(base if base is not None else os.environ)
+        for name in ["HTTPS_PROXY", "HTTP_PROXY", "https_proxy", "http_proxy"]:
+            env[name] = self.url
+        return env
+
+    def __baseline(self):
+        # The samples taken within BASELINE_SECONDS, the probe thread is
+        # left to end on its own
+        samples = []
+
+        def sample():
+            for _ in range(BASELINE_SAMPLES):
+                rtt = self.rtt_probe()
+                if rtt is not None:
+                    samples.append(rtt)
+        thread = threading.Thread(target=sample, name="pull-shaper-baseline")
+        thread.daemon = True
+        thread.start()
+        thread.join(BASELINE_SECONDS)
+        samples = list(samples)
+        if not samples:
+            return None
+        return sorted(samples)[len(samples) // 2]
+
+    def __adapt_loop(self):
+        # Multiplicative decrease when the uplink queues, additive increase
+        # when it does not
+        while not self.stopping.wait(self.interval):
+            if self.baseline is None:
+                continue
+            rtt = self.rtt_probe()
+            if rtt is None:
+                continue
+            self.rtts.append(rtt)
+            rtt = min(self.rtts[-CURRENT_SAMPLES:])
+            if rtt > self.baseline * RTT_FACTOR + RTT_SLACK:
+                rate = max(MIN_RATE, self.rate / 2)
+                self.backoffs += 1
+                self.log.debug(
+                    "Endpoint round trip " +
+                    str(round(rtt * 1000, 1)) +
+                    " ms, pull rate lowered to " +
+                    format_size(rate) +
+                    "/s"
+                )
+            else:
+                rate = min(self.limit, self.rate + self.limit * INCREASE_SHARE)
+            self.rate = rate
+            self.min_rate = min(self.min_rate, rate)
+            self.bucket.set_rate(rate)
+
+    def __accept_loop(self):
+        while not self.stopping.is_set():
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            thread = threading.Thread(target=self.__serve, args=(client,))
+            thread.daemon = True
+            thread.start()
+
+    def __serve(self, client):
+        upstream = None
+        try:
+            head = b""
+            while b"\r\n\r\n" not in head:
+                chunk = client.recv(CHUNK_BYTES)
+                if chunk == b"" or len(head) > HEAD_MAX_BYTES:
+                    return
+                head += chunk
+            request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+            method, target = request_line.split(" ")[0:2]
+            if self.next_hop:
+                # The next proxy gets the request as it is, and answers it
+                upstream = self.__dial(self.next_hop)
+                upstream.sendall(head)
+            elif method == "CONNECT":
+                host, port = target.rsplit(":", 1)
+                upstream = self.__dial((host.strip("[]"), int(port)))
+                client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                rest = head.split(b"\r\n\r\n", 1)[1]
+                if rest:
+                    upstream.sendall(rest)
+            else:
+                # Origin servers take the absolute form too, RFC 7230 5.3.2.
+                # The connection is routed by this request only, so it ends
+                # with the answer and the client opens a new one
+                url = urlsplit(target)
+                upstream = self.__dial((url.hostname, url.port or 80))
+                upstream.sendall(close_after(head))
+        except (OSError, ValueError) as err:
+            self.log.debug("Proxy request failed: " + str(err))
+            try:
+                client.sendall(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            client.close()
+            if upstream is not None:
+                upstream.close()
+            return
+        sender = threading.Thread(target=self.__relay, args=(client, upstream, False))
+        sender.daemon = True
+        sender.start()
+        self.__relay(upstream, client, True)
+        sender.join()
+
+    def __dial(self, address):
+        error = None
+        for family, socktype, proto, _, sockaddr in socket.getaddrinfo(address[0], address[1], 0,
+                                                                      socket.SOCK_STREAM):
+            upstream = socket.socket(family, socktype, proto)
+            try:
+                # Set before the connect so the window the sender sees is
+                # small, the rate then holds on the uplink and not only here
+                upstream.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+                if family == socket.AF_INET:
+                    upstream.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, LOW_PRIORITY_TOS)
+                elif family == socket.AF_INET6:
+                    upstream.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_TCLASS, LOW_PRIORITY_TOS)
+                upstream.settimeout(CONNECT_TIMEOUT)
+                upstream.connect(sockaddr)
+                upstream.settimeout(None)
+                return upstream
+            except OSError as err:
+                error = err
+                upstream.close()
+        raise error or OSError("cannot resolve " + str(address[0]))
+
+    def __relay(self, source, destination, shaped):
+        try:
+            while True:
+                chunk = source.recv(CHUNK_BYTES)
+                if chunk == b"":
+                    break
+                if shaped:
+                    self.bucket.take(len(chunk))
+                    with self.bucket.lock:
+                        self.downloaded += len(chunk)
+                destination.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            # Half close, the other direction may still be running
+            for sock, how in [(destination, socket.SHUT_WR), (source, socket.SHUT_RD)]:
+                try:
+                    sock.shutdown(how)
+                except OSError:
+                    pass
+            if shaped:
+                source.close()
+                destination.close()
+
+
+def proxy_from_environment():
+    # (host, port) of the proxy the host already uses, None without one
+    for name in ["HTTPS_PROXY", "https_proxy", "HTTP_PROXY", "http_proxy"]:
+        value = os.environ.get(name)
+        if value:
+            url = urlsplit(value if "://" in value else "http://" + value)
+            if url.hostname:
+                return (url.hostname, url.port or 8080)
+    return None
+
+
+@contextlib.contextmanager
+def shaped_pull(rate, log=None, rtt_probe=None):
+    # Environment for a pull, None for an unlimited one
+    if rate is None:
+        yield None
+        return
+    proxy = shaped_proxy(rate, rtt_probe=rtt_probe, log=log)
+    proxy.start()
+    try:
+        yield proxy.env()
+    finally:
+        proxy.stop()
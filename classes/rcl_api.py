@@ -0,0 +1,400 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: rcl_api.py
+# Description: In-process library API of the RCL container lifecycle, with
+#              result objects and typed errors carrying the RC codes
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# The steps of startRCLContainer, callable from one Python process:
+#
+#   from classes import rcl_api
+#
+#   try:
+#       checked = rcl_api.preflight(image_version="7.0.0.2")
+#       rcl_api.install_image()
+#       rcl_api.run()
+#   except rcl_api.rcl_error as err:
+#       print(err.step, err.rc, err.meaning)
+#   for instance in rcl_api.status().instances:
+#       print(instance.container_name, instance.state, instance.reachable)
+#
+# Steps use rclmgr.yml, logs and rclmgr of the tool directory, the current
+# directory of the caller is left alone. They are the same code as the CLI,
+# an RC the CLI would exit with is raised as the rcl_error subclass of its
+# kind instead. The "-- [INFO]" lines printed by rclmgr and the run log
+# lines of rclmgr_yml are captured into the output of the result or error,
+# in the order they came. Every step
+# starts with the whole retry budget and an empty command ledger, as a CLI
+# run does, so a long lived process can call them any number of times.
+# Steps are not meant to be run from several threads at once.
+# -----------------------------------------------------------------------------
+
+import contextlib
+import io
+import json
+import logging
+import os
+import time
+
+import yaml
+
+from classes.command_runner import get_runner
+from classes.rcl_instances import DEFAULT_INSTANCE, container_name_of, instance_config, instance_names
+from classes.readiness import ssh_banner
+from classes.retry_policy import reset_budget
+from classes.run_history import rc_table
+
+
+# Written by preflight in the tool directory, as startRCLContainer does
+CONFIG_FILE = "rclmgr.yml"
+
+# Run log of rclmgr_yml, named after its configuration file
+RUN_LOG = CONFIG_FILE
+
+OUTPUT_FORMAT = '%(levelname)s: %(message)s'
+
+
+class rcl_error(Exception):
+    """
+        A step ended with a non zero RC
+
+        rc      - the RC startRCLContainer would have exited with
+        meaning - its line in the RC table of rclmgr_yml
+        step    - preflight, install_image, run or status
+        output  - lines printed by the step
+    """
+
+    def __init__(self, rc, meaning, step, output=None):
+        Exception.__init__(self, step + " failed with RC " + str(rc) + ": " + str(meaning))
+        self.rc = rc
+        self.meaning = meaning
+        self.step = step
+        self.output = output or []
+
+
+class config_error(rcl_error):
+    """
+        rclmgr.yml is missing, invalid or cannot be written
+    """
+
+
+class host_error(rcl_error):
+    """
+        The utility host is not set up for RCL: user, interfaces, binaries
+    """
+
+
+class network_error(rcl_error):
+    """
+        The IBM endpoints cannot be resolved or reached
+    """
+
+
+class image_error(rcl_error):
+    """
+        The container image cannot be removed or installed
+    """
+
+
+class container_error(rcl_error):
+    """
+        The container is already up, did not start or is not reachable
+    """
+
+
+class tool_error(rcl_error):
+    """
+        The tools themselves failed, rclmgr cannot be copied or loaded
+    """
+
+
+# Error class of every RC of the rclmgr_yml table, rcl_error for the rest
+RC_ERRORS = {
+    2: host_error,
+    3: network_error,
+    4: host_error,
+    5: host_error,
+    6: network_error,
+    7: host_error,
+    8: host_error,
+    9: container_error,
+    10: image_error,
+    12: config_error,
+    13: config_error,
+    15: host_error,
+    21: tool_error,
+    22: tool_error,
+    23: tool_error,
+    24: container_error,
+    25: container_error,
+    26: host_error,
+    28: host_error,
+    31: host_error,
+    50: config_error,
+    51: host_error
+}
+
+
+class preflight_result(object):
+    """
+        Outcome of preflight: the checked configuration and host facts
+    """
+
+    def __init__(self, image_name, image_version, container, campus_ip, ras_ip, endpoints, output):
+        self.image_name = image_name
+        self.image_version = image_version
+        self.container = container
+        self.campus_ip = campus_ip
+        self.ras_ip = ras_ip
+        self.endpoints = endpoints
+        self.output = output
+
+
+class install_result(object):
+    """
+        Outcome of install_image
+    """
+
+    def __init__(self, image_ref, upgrade, seconds, output):
+        self.image_ref = image_ref
+        self.upgrade = upgrade
+        self.seconds = seconds
+        self.output = output
+
+
+class run_result(object):
+    """
+        Outcome of run, the instances started and reachable over SSH
+    """
+
+    def __init__(self, instances, upgrade, seconds, output):
+        self.instances = instances
+        self.upgrade = upgrade
+        self.seconds = seconds
+        self.output = output
+
+
+class instance_status(object):
+    """
+        State of the container of one instance
+    """
+
+    def __init__(self, instance, container_name, state, image, ssh_port, banner):
+        self.instance = instance
+        self.container_name = container_name
+        self.state = state
+        self.image = image
+        self.ssh_port = ssh_port
+        self.banner = banner
+
+    @property
+    def reachable(self):
+        return self.banner is not None
+
+
+class status_result(object):
+    """
+        Outcome of status, one instance_status per instance
+    """
+
+    def __init__(self, instances):
+        self.instances = instances
+
+    @property
+    def all_reachable(self):
+        return all(instance.reachable for instance in self.instances)
+
+
+class rcl_session(object):
+    """
+        Lifecycle steps sharing one process
+
+        preflight keeps the checked configuration, install_image and run
+        use it, so they need a preflight first. status only reads
+        rclmgr.yml and podman.
+    """
+
+    def __init__(self, tool_dir=None, deadline=None):
+        self.tool_dir = tool_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.yml = None
+        self.rc_meanings = None
+        if deadline is not None:
+            get_runner().set_deadline(deadline)
+
+    def preflight(self, image_version=None, image_file=None, campus_interface=None, verbose=False):
+        # Checks the host and writes rclmgr.yml, never prompts. rclmgr_yml
+        # needs netifaces, status does not
+        from classes.rclmgr_yml import rclmgr_yml
+
+        def step():
+            self.yml = rclmgr_yml(verbose, image_file, campus_interface, image_version, unattended=True,
+                                  tool_dir=self.tool_dir)
+            if self.yml.startRCLContainer():
+                return config_error, 1, "rclmgr.yml was written but does not pass the checks"
+            return None
+        output = self.__run_step("preflight", step)
+        return preflight_result(
+            self.yml.IMAGE_NAME,
+            self.yml.IMAGE_VERSION,
+            dict(self.yml.container),
+            self.yml.CAMPUS_IPv4,
+            self.yml.RAS_IPv4,
+            list(self.yml.endpoint_ranking),
+            output
+        )
+
+    def install_image(self, upgrade=False):
+        # Installs IMAGE_VERSION from the preflight tarball or the registry
+        yml = self.__checked("install_image")
+        started = time.monotonic()
+        output = self.__run_step(
+            "install_image",
+            lambda: None if yml.prep_container(upgrade) else (image_error, 6, "Could not prepare the container")
+        )
+        return install_result(
+            yml.IMAGE_NAME + ":" + str(yml.IMAGE_VERSION),
+            upgrade,
+            time.monotonic() - started,
+            output
+        )
+
+    def run(self, instances=None, all_instances=False, upgrade=False):
+        # Starts or upgrades the instances until they answer SSH
+        yml = self.__checked("run")
+        started = time.monotonic()
+        if all_instances:
+            instances = instance_names(yml.container)
+        instances = instances or [DEFAULT_INSTANCE]
+        output = self.__run_step(
+            "run",
+            lambda: None if yml.start_container(upgrade, instances=instances) else
+            (container_error, 5, "The container did not start or upgrade")
+        )
+        return run_result(instances, upgrade, time.monotonic() - started, output)
+
+    def status(self, probe_timeout=3):
+        # Containers of every instance, running ones probed for the banner
+        try:
+            with open(os.path.join(self.tool_dir, CONFIG_FILE), "r") as config:
+                container_cfg = yaml.safe_load(config)['CONTAINER']
+            names = instance_names(container_cfg)
+        except (OSError, yaml.YAMLError, KeyError, TypeError, AttributeError) as err:
+            raise config_error(1, "Cannot read " + CONFIG_FILE + ": " + str(err), "status")
+        del get_runner().ledger[:]
+        result = get_runner().run(["podman", "ps", "--all", "--format", "json"], retries=2)
+        if not result.ok:
+            raise host_error(result.rc, "podman ps failed: " + result.error.strip(), "status")
+        try:
+            pods = json.loads(result.output or "[]")
+        except ValueError:
+            pods = []
+        by_name = {}
+        for pod in pods:
+            pod_names = pod.get('Names') or []
+            for name in [pod_names] if isinstance(pod_names, str) else pod_names:
+                by_name[name] = pod
+        instances = []
+        for instance in names:
+            name = container_name_of(container_cfg, instance)
+            port = instance_config(container_cfg, instance).get('SSH_PORT')
+            pod = by_name.get(name)
+            state = str(pod.get('State')).lower() if pod is not None else None
+            banner = None
+            if state == "running" and port is not None:
+                try:
+                    banner = ssh_banner("127.0.0.1", port, probe_timeout)
+                except (OSError, ValueError):
+                    banner = None
+            instances.append(instance_status(
+                instance, name, state, pod.get('Image') if pod is not None else None, port, banner
+            ))
+        return status_result(instances)
+
+    def __checked(self, step):
+        if self.yml is None:
+            raise config_error(1, "preflight has to run first", step)
+        return self.yml
+
+    def __meaning(self, rc):
+        # An RC is worth more than an ImportError hiding it
+        if self.rc_meanings is None:
+            try:
+                from classes.rclmgr_yml import rclmgr_yml
+                self.rc_meanings = rc_table(rclmgr_yml.__doc__)
+            except ImportError:
+                self.rc_meanings = {}
+        return self.rc_meanings.get(rc, "Generic error")
+
+    def __run_step(self, step, func):
+        # Runs func and returns the lines it printed or logged to the run
+        # log. func returns None or (error class, RC, meaning) for the RCs
+        # the CLI exits with outside of the rclmgr_yml table, a SystemExit
+        # gets the error class and meaning of its RC. Every step gets the
+        # whole retry budget and a ledger of its own commands, as a CLI run
+        reset_budget()
+        del get_runner().ledger[:]
+        buffer = io.StringIO()
+        # The console handler of the run log holds the stderr it started
+        # with, so the run log gets a handler into the buffer of this step
+        handler = logging.StreamHandler(buffer)
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(logging.Formatter(OUTPUT_FORMAT))
+        run_log = logging.getLogger(RUN_LOG)
+        run_log.addHandler(handler)
+        failure = None
+        try:
+            with contextlib.redirect_stdout(buffer):
+                failure = func()
+        except SystemExit as exit_error:
+            rc = exit_error.code if isinstance(exit_error.code, int) else int(exit_error.code is not None)
+            if rc != 0:
+                failure = (RC_ERRORS.get(rc, rcl_error), rc, self.__meaning(rc))
+        finally:
+            run_log.removeHandler(handler)
+        output = buffer.getvalue().splitlines()
+        if failure is not None:
+            error_class, rc, meaning = failure
+            raise error_class(rc, meaning, step, output)
+        return output
+
+
+_session = None
+
+
+def get_session():
+    # One session per process, the module functions below use it
+    global _session
+    if _session is None:
+        _session = rcl_session()
+    return _session
+
+
+def preflight(image_version=None, image_file=None, campus_interface=None, verbose=False):
+    return get_session().preflight(image_version, image_file, campus_interface, verbose)
+
+
+def install_image(upgrade=False):
+    return get_session().install_image(upgrade)
+
+
+def run(instances=None, all_instances=False, upgrade=False):
+    return get_session().run(instances, all_instances, upgrade)
+
+
+def status(probe_timeout=3):
+    return get_session().status(probe_timeout)
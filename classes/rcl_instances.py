@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: rcl_instances.py
+# Description: Named RCL container instances sharing one utility host
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# The CONTAINER section of rclmgr.yml describes the default instance. More
+# instances are declared under INSTANCES, each one overriding the keys below:
+#
+#   INSTANCES:
+#       bb2:
+#           SSH_PORT: 10023
+#           CONTAINER_NETWORK_NAME: rcl_bb2
+#           LOG: /home/rcladmin/log-bb2
+#           BKUP: /home/rcladmin/backup-bb2
+#
+# The container of instance bb2 is named <CONTAINER_HOSTNAME>-bb2 and has its
+# own systemd unit. All instances use the same image, so layers are shared.
+# -----------------------------------------------------------------------------
+
+import re
+
+
+DEFAULT_INSTANCE = "default"
+
+# Keys an instance can override
+INSTANCE_KEYS = ['SSH_PORT', 'CONTAINER_NETWORK_NAME', 'CONTAINER_NETWORK_SUBNET',
+                 'CONTAINER_NETWORK_GATEWAY', 'LOG', 'BKUP', 'CONTAINER_MEMORY', 'CONTAINER_CPUS',
+                 'CONTAINER_PIDS_LIMIT', 'CONTAINER_BLKIO_WEIGHT']
+
+# Keys that must not be shared between instances
+UNIQUE_KEYS = ['SSH_PORT', 'LOG', 'BKUP']
+
+INSTANCE_NAME = re.compile(r'^[a-z0-9]([a-z0-9-]{0,30}[a-z0-9])?$')
+
+
+def instance_names(container_cfg):
+    return [DEFAULT_INSTANCE] + sorted((container_cfg.get('INSTANCES') or {}).keys())
+
+
+def container_name_of(container_cfg, instance=DEFAULT_INSTANCE):
+    if instance in [None, DEFAULT_INSTANCE]:
+        return container_cfg['CONTAINER_HOSTNAME']
+    return container_cfg['CONTAINER_HOSTNAME'] + "-" + instance
+
+
+def instance_config(container_cfg, instance=DEFAULT_INSTANCE):
+    # Flat CONTAINER dictionary of one instance, as rclmgr uses it
+    merged = dict(container_cfg)
+    merged.pop('INSTANCES', None)
+    if instance not in [None, DEFAULT_INSTANCE]:
+        overrides = (container_cfg.get('INSTANCES') or {}).get(instance)
+        if overrides is None:
+            raise KeyError("Instance " + instance + " is not declared under INSTANCES")
+        for key in INSTANCE_KEYS:
+            if key in overrides:
+                merged[key] = overrides[key]
+    merged['CONTAINER_NAME'] = container_name_of(container_cfg, instance)
+    merged['INSTANCE'] = instance or DEFAULT_INSTANCE
+    return merged
+
+
+def check_instances(container_cfg):
+    # Returns the list of problems found, empty when all instances are fine
+    problems = []
+    instances = container_cfg.get('INSTANCES') or {}
+    if not isinstance(instances, dict):
+        return ["INSTANCES must be a mapping of instance name to settings"]
+    seen = {}
+    for instance in instance_names(container_cfg):
+        if instance != DEFAULT_INSTANCE:
+            if not INSTANCE_NAME.match(str(instance)):
+                problems.append("Instance name " + str(instance) + " is not valid")
+                continue
+            overrides = instances[instance] or {}
+            for key in overrides:
+                if key not in INSTANCE_KEYS:
+                    problems.append("Instance " + instance + " cannot override " + str(key))
+            for key in UNIQUE_KEYS:
+                if key not in overrides:
+                    problems.append("Instance " + instance + " must set its own " + key)
+        merged = instance_config(container_cfg, instance)
+        for key in UNIQUE_KEYS:
+            if key not in merged:
+                continue
+            value = str(merged[key]).rstrip("/")
+            if (key, value) in seen:
+                problems.append(
+                    "Instance " + instance + " uses the same " + key + " " + value +
+                    " as instance " + seen[(key, value)]
+                )
+            else:
+                seen[(key, value)] = instance
+        try:
+            port = int(merged.get('SSH_PORT'))
+            if port < 1024 or port > 65535:
+                problems.append("Instance " + instance + " SSH_PORT must be between 1024 and 65535")
+        except (TypeError, ValueError):
+            problems.append("Instance " + instance + " SSH_PORT is not a number")
+    return problems
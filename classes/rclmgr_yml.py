@@ -22,7 +22,6 @@
 import yaml
 import os
 import ipaddress
-import re
 import logging
 import datetime
 import sys
@@ -31,49 +30,42 @@ import netifaces
 import ipaddress
 import socket
 import shutil
-import argparse
 import sqlite3
-import subprocess
 import json
+import filecmp
+import time
+from concurrent.futures import ThreadPoolExecutor
+from classes.command_runner import get_runner
+from classes.storage_gc import names_of, storage_gc
+from classes.campus_detect import campus_detect
+from classes.image_catalog import image_catalog
+from classes.podman_events import STOPPED_STATES, podman_events, state_name
+from classes.run_history import get_history
+from classes.endpoint_ranking import RCL_ENDPOINTS, RCL_PORT, rank_endpoints, write_ranking
+from classes.systemd_user import install_service, install_timer, remove_service, remove_timer, user_unit_dir
+from classes.image_prefetch import (DEFAULT_WINDOW, MAX_RANDOM_SECONDS, PREFETCH_TIMER, on_calendar, prefetched,
+                                    window_length)
+from classes.storage_audit import COPYING_DRIVERS, expected_cost, layer_sizes, overlay_support, storage_info
+from classes.config_checks import format_size, version_key
+from classes.telemetry import TELEMETRY_SERVICE
+from classes.readiness import READY_TIMEOUT, readiness, unit_journal
+from classes.rcl_instances import DEFAULT_INSTANCE, container_name_of, instance_config, instance_names
+from classes.config_schema import CONFIG_SCHEMA, SSR_NETBLOCK, CNI_NETBLOCK, RAS_NETBLOCK
 
 
-# SSR netblock
-SSR_NETBLOCK = "10.111.222.100/30"
+# RAS bridge IP
+RAS_IP = "10.23.16.1"
 
-#CNI netblock
-CNI_NETBLOCK = "10.88.0.0/16"
+# systemd user timer refreshing the endpoint ranking
+RANKING_TIMER = "rcl-endpoint-ranking"
 
-# RAS netblock
-RAS_NETBLOCK = "10.23.16.0/29"
+# The key sets of the CONTAINER section come from the schema
+STATIC_rclmgr_YML = CONFIG_SCHEMA.static_values()
 
-# RAS bridge IP
-RAS_IP = "10.23.16.1"
+CONFIG_rclmgr_YML = CONFIG_SCHEMA.config_defaults()
 
-# RCL ENDPOINTS
-RCL_ENDPOINTS = [
-    "170.225.126.11",
-    "170.225.126.12",
-    "170.225.127.11",
-    "170.225.127.12"
-]
-
-STATIC_rclmgr_YML = {
-    'CONTAINER_HOSTNAME': 'utilityBareMetal-rcl-official',
-    'RAS_INTERFACE': 'virbr1',
-    'RAS_INTERFACE_IP': '10.23.16.1',
-    'IMAGE_NAME': 'cp.icr.io/cp/scalesystem/sss_rcl',
-    'SSH_PORT': '10022',
-    'LOG': '/home/rcladmin/log',
-    'BKUP': '/home/rcladmin/backup'
-}
-
-CONFIG_rclmgr_YML = {
-    'CONTAINER_DOMAIN_NAME': 'gpfs.local',
-    'UTILITY_HOSTNAME': 'utilityBareMetal',
-    'CAMPUS_INTERFACE': 'campus',
-    'CAMPUS_INTERFACE_IP': '192.168.100.10',
-    'IMAGE_VERSION': '7.0.0.2'
-}
+# Keys that may be present in the file and are kept when it is rewritten
+OPTIONAL_rclmgr_YML = CONFIG_SCHEMA.optional_defaults()
 
 
 class rclmgr_yml(object):
@@ -90,7 +82,7 @@ class rclmgr_yml(object):
         RC 7  = RAS IP is not th expected one
         RC 8  = Domain not configured in OS
         RC 9  = Container is already UP
-        RC 10 = Could not delete image
+        RC 10 = FREE
         RC 11 = FREE
         RC 12 = Failure writing YML file
         RC 13 = Initial file does not have required fields or has wrong values for them
@@ -105,7 +97,7 @@ class rclmgr_yml(object):
         RC 22 = Cannot import rclmgr
         RC 23 = Cannot run rclmgr readconf
         RC 24 = Start container returned an error
-        RC 25 = FREE
+        RC 25 = Container does not answer SSH on its published port
         RC 26 = podman binary does not exist
         RC 27 = FREE
         RC 28 = nmcli binary does not exist
@@ -134,23 +126,38 @@ class rclmgr_yml(object):
         RC 51 = Container is resolvable for automatic bridge setup
     """
 
+    # Handlers added to the root logger by the last instance
+    log_handlers = []
+
     def __init__(
             self,
             verbose,
             filename,
             campus_interface,
-            image_version
+            image_version,
+            unattended=False,
+            tool_dir=None
             ):
-        self.filename = "rclmgr.yml"
+        # rclmgr.yml, logs and rclmgr are in tool_dir, the current
+        # directory of the CLI
+        self.tool_dir = tool_dir or os.getcwd()
+        self.filename = os.path.join(self.tool_dir, "rclmgr.yml")
         self.verbose = verbose
-        self.output_dir = "./logs/"
+        # Without a terminal nobody can answer a prompt
+        self.unattended = unattended or not sys.stdin.isatty()
+        self.output_dir = os.path.join(self.tool_dir, "logs") + "/"
         self.total_errors = 0
         self.merged_cfg = {}
         self.st_time = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         self.log_file = self.output_dir + 'RCL_' + self.st_time + ".log"
         self.run_log = self.__start_logger()
+        self.runner = get_runner()
+        self.runner.ledger_file = self.output_dir + 'RCL_' + self.st_time + "_commands.json"
         self.static_rclmgr_yml = STATIC_rclmgr_YML
         self.config_rclmgr_yml = CONFIG_rclmgr_YML
+        self.optional_rclmgr_yml = OPTIONAL_rclmgr_YML
+        self.events = None
+        self.endpoint_ranking = []
         currentDirectory = os.getcwd()
         self.IMAGE_TARBALL = filename
         self.CAMPUS_INTERFACE = campus_interface
@@ -170,9 +177,10 @@ class rclmgr_yml(object):
             )
             sys.exit(1)
         self.container = self.cfg['CONTAINER']
-        self.static_NOK = self.__check_static_vars()
-        self.config_OK = self.__check_config_keys()
-        if self.static_NOK or not(self.config_OK):
+        # Configurable values are about to be gathered again, only their
+        # keys have to be there now
+        violations = self.__validate_config(False)
+        if len(violations) > 0:
             self.run_log.error(
                 "The file " +
                 self.filename +
@@ -235,6 +243,11 @@ class rclmgr_yml(object):
 
         # Lets deal with IMAGE_NAME if applicable
         self.IMAGE_NAME = self.container['IMAGE_NAME']
+        self.catalog = image_catalog(
+            self.IMAGE_NAME,
+            log=self.run_log,
+            runner=self.runner
+        )
         if self.IMAGE_VERSION is None:
             self.IMAGE_VERSION = self.__ask_IMAGE_VERSION()
 
@@ -262,6 +275,9 @@ class rclmgr_yml(object):
         # First we check we are root or root alike
         self.__check_rcladmin_user()
 
+        # A store that copies layers makes every later step slower
+        self.__audit_storage()
+
         # Hardcoded hostname name
         cont_hostname = self.static_rclmgr_yml['CONTAINER_HOSTNAME']
 
@@ -302,6 +318,10 @@ class rclmgr_yml(object):
 
         # the static entries. We should readapt the function that does this
         self.merged_cfg.update(self.static_rclmgr_yml)
+        # optional entries the user set are carried over as they are
+        for key in self.optional_rclmgr_yml.keys():
+            if key in self.container:
+                self.merged_cfg.update({key: self.container[key]})
         self.run_log.debug(
             "Merge configurable parameters to be written"
         )
@@ -363,6 +383,25 @@ class rclmgr_yml(object):
         return entries_NOK
 
     def __ask_CAMPUS_INTERFACE(self):
+        # We pick it from the routing table when the choice is clear
+        self.run_log.debug(
+            "Going to detect the Campus interface from the routing table"
+        )
+        detector = campus_detect(
+            [RAS_NETBLOCK, CNI_NETBLOCK, SSR_NETBLOCK],
+            log=self.run_log
+        )
+        detected_interface, detected_ip, confident = detector.detect()
+        if confident:
+            return detected_interface
+        default_interface = detected_interface or "campus"
+        if self.unattended:
+            self.run_log.warning(
+                "Unattended run, using " +
+                default_interface +
+                " as Campus interface"
+            )
+            return default_interface
         # User wants to change campus interface we change or exit if cancel
         try:
             while True:
@@ -370,10 +409,10 @@ class rclmgr_yml(object):
                     "Going to ask the user for a Campus interface name"
                 )
                 CAMPUS_INTERFACE_user = input(
-                    "Enter the campus interface name (default: campus): "
+                    "Enter the campus interface name (default: " + default_interface + "): "
                 )
                 if CAMPUS_INTERFACE_user == "":
-                    CAMPUS_INTERFACE_user = "campus"
+                    CAMPUS_INTERFACE_user = default_interface
                     break
                 else:
                     break
@@ -389,6 +428,18 @@ class rclmgr_yml(object):
             sys.exit(6)
 
     def __ask_IMAGE_VERSION(self):
+        if self.unattended:
+            self.run_log.info(
+                "Unattended run, using default image version " +
+                self.config_rclmgr_yml['IMAGE_VERSION']
+            )
+            return self.config_rclmgr_yml['IMAGE_VERSION']
+        # Known versions come from the cached catalog, no registry call here.
+        # Before its first refresh it knows none and any version is taken
+        known_versions = self.catalog.versions()
+        default_version = self.config_rclmgr_yml['IMAGE_VERSION']
+        for version in known_versions:
+            print("  " + version + " - " + self.catalog.describe(version))
         # User wants to change hostname we change or exit if cancel
         try:
             while True:
@@ -396,20 +447,19 @@ class rclmgr_yml(object):
                     "Going to ask the user for a Image Version"
                 )
                 IMAGE_VERSION_user = input(
-                    "Enter the image version (default: 7.0.0.2): "
+                    "Enter the image version (default: " + default_version + "): "
                 )
                 if IMAGE_VERSION_user == "":
-                    IMAGE_VERSION_user = "7.0.0.2"
+                    IMAGE_VERSION_user = default_version
                     break
-                elif IMAGE_VERSION_user == "6.2.3.0" or \
-                        IMAGE_VERSION_user == "6.2.3.1" or \
-                        IMAGE_VERSION_user == "6.2.3.2" or \
-                        IMAGE_VERSION_user == "7.0.0.0" or \
-                        IMAGE_VERSION_user == "7.0.0.1" or \
-                        IMAGE_VERSION_user == "7.0.0.2" :
+                elif IMAGE_VERSION_user in known_versions:
                     break
+                elif len(known_versions) == 0 and version_key(IMAGE_VERSION_user) is not None:
+                    break
+                elif len(known_versions) == 0:
+                    print("Image version should be numbers separated by dots, as " + default_version + "\n")
                 else:
-                    print("Image name should be 6.2.3.0 or 6.2.3.1 or 6.2.3.2 or 7.0.0.0 or 7.0.0.1 or 7.0.0.2\n")
+                    print("Image name should be one of " + ", ".join(known_versions) + "\n")
             return IMAGE_VERSION_user
         except KeyboardInterrupt:
             print("")
@@ -423,7 +473,7 @@ class rclmgr_yml(object):
 
     def __write_YML_file(self):
         # We save original file as .bak and create new with gathered data
-        to_be_file = self.output_dir + self.filename + "_" + self.st_time
+        to_be_file = self.output_dir + os.path.basename(self.filename) + "_" + self.st_time
         self.run_log.debug(
             "Going to move " +
             self.filename +
@@ -596,15 +646,18 @@ class rclmgr_yml(object):
                 sys.exit(2)
 
     def __copy_rclmgr_into_classes(self):
-        if os.path.isfile("classes/rclmgr.py") == False:
+        script = os.path.join(self.tool_dir, "rclmgr")
+        module = os.path.join(self.tool_dir, "classes", "rclmgr.py")
+        if os.path.isfile(module) == False or \
+                not filecmp.cmp(script, module, shallow=False):
             self.run_log.debug(
-                "rclmgr.py does not exist inside classes directory"
+                "rclmgr.py does not exist inside classes directory or it is outdated"
             )
             self.run_log.debug(
                 "Going to copy rclmgr inside classes directory as rclmgr.py"
             )
             try:
-                shutil.copyfile("rclmgr", "classes/rclmgr.py")
+                shutil.copyfile(script, module)
                 self.run_log.debug(
                     "rclmgr is copied inside classes directory as rclmgr.py"
                 )
@@ -618,16 +671,20 @@ class rclmgr_yml(object):
                 sys.exit(21)
         else:
             self.run_log.debug(
-                "rclmgr.py does already exist inside classes directory"
+                "rclmgr.py does already exist inside classes directory and it is current"
             )
 
     def __start_logger(self):
         self.__create_output_dir()
         sv_log_format = '%(asctime)s %(levelname)-4s:\t %(message)s'
-        logging.basicConfig(level=logging.DEBUG,
-                            format=sv_log_format,
-                            filename=self.log_file,
-                            filemode='w')
+        root_log = logging.getLogger('')
+        # A process running several times, as through classes.rcl_api, logs
+        # every run to its own file and to the console once
+        for handler in rclmgr_yml.log_handlers:
+            root_log.removeHandler(handler)
+            handler.close()
+        log_file = logging.FileHandler(self.log_file, mode='w')
+        log_file.setFormatter(logging.Formatter(sv_log_format))
 
         console = logging.StreamHandler()
         if self.verbose:
@@ -635,8 +692,11 @@ class rclmgr_yml(object):
         else:
             console.setLevel(logging.INFO)
         console.setFormatter(logging.Formatter(sv_log_format))
-        logging.getLogger('').addHandler(console)
-        rclmgr_yml_log = logging.getLogger(self.filename)
+        root_log.setLevel(logging.DEBUG)
+        root_log.addHandler(log_file)
+        root_log.addHandler(console)
+        rclmgr_yml.log_handlers = [log_file, console]
+        rclmgr_yml_log = logging.getLogger(os.path.basename(self.filename))
         return rclmgr_yml_log
 
     def __load_yml_file(self):
@@ -682,42 +742,6 @@ class rclmgr_yml(object):
             cfg_loaded = False
         return (cfg_loaded, cfg)
 
-    def __is_valid_FQDN(self, hostname, domain):
-        # We check is RFC1035 + RFC3696 prefered options
-        self.run_log.debug(
-            "Going to merge hostname " +
-            hostname +
-            " and domain " +
-            domain
-        )
-        long_hostname = hostname + "." + domain
-        self.run_log.debug(
-            "hostname and domain merged as " +
-            long_hostname
-        )
-        RFC3696_pref = re.compile(
-            r'^(([a-zA-Z]{1})|([a-zA-Z]{1}[a-zA-Z]{1})|'
-            r'([a-zA-Z]{1}[0-9]{1})|([0-9]{1}[a-zA-Z]{1})|'
-            r'([a-zA-Z0-9][-.a-zA-Z0-9]{0,61}[a-zA-Z0-9]))\.'
-            r'([a-zA-Z]{2,13}|[a-zA-Z0-9-]{2,30}.[a-zA-Z]{2,3})$'
-        )
-        self.run_log.debug("Starting FQDN check for " + long_hostname)
-        good_FQDN = RFC3696_pref.match(long_hostname)
-        if good_FQDN:
-            self.run_log.debug(
-                "Completed FQDN check for " +
-                long_hostname +
-                " and it aligns with RFC1035 and RFC3696 prefered format"
-            )
-        else:
-            self.run_log.error(
-                "Completed FQDN check for " +
-                long_hostname +
-                " and it does not align with RFC1035 and " +
-                "RFC3696 prefered format"
-            )
-        return(good_FQDN)
-
     def __get_IP_address(self, interface, essnet):
         # First lets check is a good interface
         interface_exists = self.__check_interface_exists(interface)
@@ -788,138 +812,6 @@ class rclmgr_yml(object):
             # We terminate here
         return interface_exists
 
-    def __check_config_keys(self):
-        self.run_log.debug(
-            "Going to check if configurable keys exist on " +
-            self.filename
-        )
-        # We do not care about values just that all keys are there
-        for key in self.config_rclmgr_yml.keys():
-            try:  # In case key is missing in file
-                if self.container[key] == self.config_rclmgr_yml[key]:
-                    # We have the key, irrelevant value
-                    config_keys_OK = True
-                    self.run_log.debug(
-                        "Key " +
-                        key +
-                        " exists on " +
-                        self.filename +
-                        " and matches the file"
-                    )
-                else:
-                    config_keys_OK = True
-                    self.run_log.debug(
-                        "Key " +
-                        key +
-                        " exists on " +
-                        self.filename +
-                        " and does not match the file"
-                    )
-            except KeyError:
-                # we are missing some static key
-                config_keys_OK = False
-                self.run_log.error(
-                    "Key " +
-                    key +
-                    " does not exist on " +
-                    self.filename +
-                    ". We stop the checks for more keys here"
-                )
-            except BaseException:
-                # some other exception
-                self.run_log.error(
-                    "Some undetermined error when checking current YML " +
-                    "file happened. If available try to use a " +
-                    "previous version of rclmgr.yml file from ./logs/. " +
-                    "If that is not an option use the manufacturing base " +
-                    "file. And if that is neither fixing this, " +
-                    "contact IBM support and attach all the contents of " +
-                    "./logs directory into the case"
-                )
-                self.run_log.debug(
-                    "Going to terminate with RC 1"
-                )
-                sys.exit(1)
-        self.run_log.debug(
-            "Ending check if configurable keys exist on " +
-            self.filename
-        )
-        return config_keys_OK
-
-    def __merge_static_cfg(self):
-        if self.static_NOK:
-            self.run_log.error(
-                "Static entroes did not pass the test. " +
-                "Cannot merge them into the config to write"
-            )
-        else:
-            self.run_log.debug(
-                "Static entries passed the test. " +
-                "Merging them into the config to write"
-            )
-            self.merged_cfg.update(self.static_rclmgr_yml)
-            self.run_log.debug("Static entries merged into config to write")
-
-    def __check_static_vars(self):
-        self.run_log.debug(
-            "Going to check if static keys exist on " +
-            self.filename +
-            " and values are the expected ones"
-        )
-        # We do a check for the non configurable parameters
-        static_entries_error = False
-        for key in self.static_rclmgr_yml.keys():
-            try:  # In case key is missing in file
-                if str(self.container[key]) != str(self.static_rclmgr_yml[key]):
-                    # We have the key but is not the same
-                    static_entries_error = True
-                    self.total_errors += 1
-                    self.run_log.error(
-                        "Key " +
-                        key +
-                        " exists on " +
-                        self.filename +
-                        " but value " +
-                        str(self.container[key]) +
-                        " is not the expected one of " +
-                        self.static_rclmgr_yml[key]
-                    )
-                else:
-                    self.run_log.debug(
-                        "Key " +
-                        key +
-                        " exists on " +
-                        self.filename +
-                        " and value " +
-                        str(self.container[key]) +
-                        " is the expected one"
-                    )
-            except KeyError:
-                # we are missing some static key
-                static_entries_error = True
-                self.total_errors += 1
-                self.run_log.error(
-                    "Key " +
-                    key +
-                    " does not exist on " +
-                    self.filename +
-                    ". We stop the checks here"
-                )
-                break
-        if static_entries_error:
-            self.run_log.error(
-                "Ending check static keys exist on " +
-                self.filename +
-                " and values are not the expected ones"
-            )
-        else:
-            self.run_log.debug(
-                "Ending check static keys exist on " +
-                self.filename +
-                " and values are the expected ones"
-            )
-        return static_entries_error
-
     def __check_IP_in_netblock(self, IP, net_block):
         self.run_log.debug(
             "Going to check if IP " +
@@ -952,51 +844,6 @@ class rclmgr_yml(object):
             )
         return is_in
 
-    def __check_IP(self, IP_to_check):
-        self.run_log.debug(
-            "Going to check IP " +
-            IP_to_check
-        )
-        try:
-            IP_OK = True
-            ipadd = ipaddress.ip_address(IP_to_check)
-            self.run_log.debug(
-                "IP has valid format"
-            )
-            if ipadd.version == 4:
-                self.run_log.debug("IP has IPv4 format")
-            else:
-                IP_OK = False
-                self.run_log.debug("IP does not have IPv4 format")
-        except ValueError:
-            IP_OK = False
-            self.run_log.debug("IP does not have a valid format")
-        self.run_log.debug(
-            "Ending check IP " +
-            IP_to_check +
-            " and we return IP_OK=" +
-            str(IP_OK))
-        return IP_OK
-
-    def __check_FQDN(self, hostname, domain):
-        FQDN_to_check = hostname + "." + domain
-        self.run_log.debug(
-            "Going to check FQDN for " + FQDN_to_check)
-        FQDN_is_OK = self.__is_valid_FQDN(hostname, domain)
-        if FQDN_is_OK:
-            self.run_log.debug(
-                "Completed FQDN check for " +
-                FQDN_to_check +
-                " and we accept it"
-            )
-        else:
-            self.run_log.error(
-                "Completed FQDN check for " +
-                FQDN_to_check +
-                " and we do not accept it"
-            )
-        return FQDN_is_OK
-
     def __check_name_IP(self, hostname, ip_address):
         all_OK = True
         # Lets check here that IP and name mutually resolve each other
@@ -1146,99 +993,56 @@ class rclmgr_yml(object):
                 all_OK = False
         return all_OK
 
-    def __check_YML_entries(self):
-        if self.static_NOK:
+    def __validate_config(self, config):
+        self.run_log.debug(
+            "Going to validate " +
+            self.filename +
+            " against the schema"
+        )
+        violations = CONFIG_SCHEMA.validate(self.container, config)
+        for violation in violations:
             self.run_log.error(
-                "Static keys did not pass the test. " +
-                "Did you manually edit the file?"
+                violation +
+                " on " +
+                self.filename
             )
-            # We fail here, no further checks
-            config_entries_NOK = True
-            return config_entries_NOK
-        else:
-            self.__merge_static_cfg()
+        unknown_keys = CONFIG_SCHEMA.unknown_keys(self.container) if isinstance(self.container, dict) else []
+        if len(unknown_keys) > 0:
             self.run_log.debug(
-                "Static config passed the tests and been merged to be written"
+                "Keys not in the schema, they are dropped when the file is written: " +
+                ", ".join(str(key) for key in unknown_keys)
             )
-            config_entries_error = False
+        self.run_log.debug(
+            "Ending validation of " +
+            self.filename +
+            " with " +
+            str(len(violations)) +
+            " violations"
+        )
+        return violations
 
-        # Lets check we got all the needed entries
-        config_keys_OK = self.__check_config_keys()
-        if config_keys_OK:
-            config_entries_error = False
-            self.run_log.debug(
-                "The filename " +
-                self.filename +
-                " has all the required entries"
-            )
-        else:
-            # Not all keys there
-            config_entries_error = True
-            self.run_log.warning(
+    def __check_YML_entries(self):
+        # Every key, value and rule of the schema in one pass
+        violations = self.__validate_config(True)
+        if len(violations) > 0:
+            self.total_errors += len(violations)
+            self.run_log.error(
                 "The filename " +
                 self.filename +
-                " does not have all the required entries"
-            )
-            return config_entries_error
-
-        # We pass all the keys. Lets granular check
-        # Check the domain is a valid domian
-        domain_OK = self.__check_FQDN(
-            "anyhost",
-            self.container['CONTAINER_DOMAIN_NAME']
-        )
-        if domain_OK:
-            self.run_log.debug(
-                "The domain " +
-                self.container['CONTAINER_DOMAIN_NAME'] +
-                " passes basic the check"
+                " has " +
+                str(len(violations)) +
+                " entries that do not pass the checks. " +
+                "Did you manually edit the file?"
             )
-        else:
-            self.total_errors += 1
-            self.run_log.warning(
-                "The domain " +
-                self.container['CONTAINER_DOMAIN_NAME'] +
-                " does not pass the basic check"
-            )
-        # Lets check the container FQDN
-        FQDN_container_OK = self.__check_FQDN(
-            self.container['CONTAINER_HOSTNAME'],
-            self.container['CONTAINER_DOMAIN_NAME']
+            config_entries_NOK = True
+            return config_entries_NOK
+        self.merged_cfg.update(self.static_rclmgr_yml)
+        self.run_log.debug(
+            "The filename " +
+            self.filename +
+            " passes the checks of all its entries"
         )
-        if FQDN_container_OK:
-            self.run_log.debug(
-                "The container FQDN " +
-                self.container['CONTAINER_HOSTNAME'] +
-                '.' +
-                self.container['CONTAINER_DOMAIN_NAME'] +
-                " passes the basic check"
-            )
-        else:
-            self.total_errors += 1
-            self.run_log.warning(
-                "The container FQDN " +
-                self.container['CONTAINER_HOSTNAME'] +
-                '.' +
-                self.container['CONTAINER_DOMAIN_NAME'] +
-                " does not pass the basic check"
-            )
 
-        CAMPUS_IP_OK = self.__check_IP(
-            self.container['CAMPUS_INTERFACE_IP']
-        )
-        if CAMPUS_IP_OK:
-            self.run_log.debug(
-                "The CAMPUS IP " +
-                self.container['CAMPUS_INTERFACE_IP'] +
-                " passes the simple check"
-            )
-        else:
-            self.total_errors += 1
-            self.run_log.warning(
-                "The CAMPUS IP " +
-                self.container['CAMPUS_INTERFACE_IP'] +
-                " does not pass the simple check"
-            )
         # Now lets check that IP actually matches the reality
         self.run_log.debug(
             "Going to check if " +
@@ -1258,24 +1062,6 @@ class rclmgr_yml(object):
                 self.container['CAMPUS_INTERFACE_IP'] +
                 " does not exist in this system"
             )
-        RAS_IP_OK = self.__check_IP(
-            self.container['RAS_INTERFACE_IP']
-        )
-
-        if RAS_IP_OK:
-            self.run_log.debug(
-                "The RAS IP " +
-                self.container['RAS_INTERFACE_IP'] +
-                " passes the simple check"
-            )
-        else:
-            self.total_errors += 1
-            self.run_log.warning(
-                "The RAS IP " +
-                self.container['RAS_INTERFACE_IP'] +
-                " does not pass the simple check"
-            )
-
         # Now lets check that IP actually matches the reality
         self.run_log.debug(
             "Going to check if " +
@@ -1330,10 +1116,16 @@ class rclmgr_yml(object):
             )
             sys.exit(15)
 
-    def prep_container(self):
-        # Every start we check that not running already, if not running we delete the image
-        contIsUp = self.__alreadyUP("rcl-official")
-        if contIsUp:
+    def prep_container(self, upgrade=False):
+        # Every start we check that no container of an instance is running
+        # On upgrade the running container keeps serving while the new image is staged
+        self.__watch_events()
+        contIsUp = self.__alreadyUP()
+        if upgrade:
+            self.run_log.debug(
+                "Upgrade requested, the running image is kept and the new one staged."
+            )
+        elif contIsUp:
             self.run_log.error(
                 "We cannot start the RCL container as seems that is already UP."
             )
@@ -1341,29 +1133,12 @@ class rclmgr_yml(object):
                 "Going to exit with RC=9"
             )
             sys.exit(9)
-        else:
-            self.run_log.debug(
-                "Container is not UP, we will delete the image before start."
-            )
-            imgDeleted = self.__delete_image("rcl-official")
-            if imgDeleted:
-                self.run_log.debug(
-                    "RCL image has been deleted, we continue."
-                )
-            else:
-                self.run_log.error(
-                    "Could not delete container image."
-                )
-                self.run_log.debug(
-                    "Going to exit with RC=10"
-                )
-                sys.exit(10)
         # Users wants that we prep the container
         # This requires rclmgr -i, rclmgr -n
         self.run_log.debug(
             "Starting check if rclmgr exists"
         )
-        file_exists = os.path.isfile("rclmgr")
+        file_exists = os.path.isfile(os.path.join(self.tool_dir, "rclmgr"))
         if file_exists:
             self.run_log.debug(
                 "Completed check for rclmgr and exists"
@@ -1423,20 +1198,22 @@ class rclmgr_yml(object):
                 "Going to terminate with RC 22"
             )
             sys.exit(22)
+        # A forced install removes the image and with it any container
+        # using it, a stopped container of this version is kept to resume
+        force_install = not upgrade
+        if force_install and self.__resumable_container_exists():
+            self.run_log.info(
+                "A stopped container of version " +
+                self.IMAGE_VERSION +
+                " exists, its image is kept so it can be resumed."
+            )
+            force_install = False
         # We have rclmgr loaded now
-        input0 = argparse.Namespace(
-            config_file='rclmgr.yml',
-            force=True,
-            image_file_name=image_file,
-            install=True,
-            create_network=False,
-            network_name="ess_network",
-            run=False)
         self.run_log.debug(
             "Going to readconf with rclmgr"
         )
         try:
-            rclmgr.readconf(input0)
+            rclmgr.load_config(self.filename)
             self.run_log.debug(
                 "Success readconf with rclmgr"
             )
@@ -1451,14 +1228,33 @@ class rclmgr_yml(object):
         self.run_log.info(
             "The RCL container image installation is about to begin. No changes are applied if the image is already installed."
         )
+        self.run_log.info(
+            "Image version " +
+            self.IMAGE_VERSION +
+            " is " +
+            self.catalog.describe(self.IMAGE_VERSION)
+        )
         try:
             self.run_log.debug(
                 "Going to run rclmgr installimage"
             )
-            if input0.image_file_name is not None:
-                rclmgr.install_image_from_file(input0.image_file_name, input0.force)
-            else:
-                rclmgr.install_image_from_repo(input0.force)
+            with get_history().phase("image_install"):
+                record = prefetched(self.IMAGE_NAME, self.IMAGE_VERSION, self.runner) if image_file is None else None
+                if image_file is not None:
+                    rclmgr.install_image_from_file(image_file, force_install)
+                elif record is not None:
+                    # Verified at prefetch time and still the installed image
+                    self.run_log.info(
+                        "Image version " +
+                        self.IMAGE_VERSION +
+                        " was prefetched on " +
+                        record['ready_at'] +
+                        " with digest " +
+                        record['digest'] +
+                        ", it is not pulled again"
+                    )
+                else:
+                    rclmgr.install_image_from_repo(force_install)
             self.run_log.info(
                 "The container image installation completed successfully."
             )
@@ -1471,12 +1267,52 @@ class rclmgr_yml(object):
             )
             return False
 
+        # Old versions and stopped containers slow down every podman call
+        with get_history().phase("storage_gc"):
+            self.__collect_storage()
+        # Keep the catalog current for the next run
+        self.catalog.refresh_local()
+        self.catalog.save()
+
         # We are this far it run OK
         return True
 
-    def start_container(self):
+    def __collect_storage(self):
+        keep_previous = self.container.get(
+            'GC_KEEP_PREVIOUS',
+            self.optional_rclmgr_yml['GC_KEEP_PREVIOUS']
+        )
+        self.run_log.debug(
+            "Going to garbage collect podman storage keeping " +
+            str(keep_previous) +
+            " previous versions"
+        )
+        try:
+            gc = storage_gc(
+                self.IMAGE_NAME,
+                self.IMAGE_VERSION,
+                self.__instance_containers(),
+                keep_previous=keep_previous,
+                log=self.run_log,
+                runner=self.runner
+            )
+            gc.collect()
+        except BaseException:
+            # Never fail a run because of the clean up
+            self.run_log.warning(
+                "Podman storage garbage collection failed, we continue"
+            )
+
+    def __instance_containers(self):
+        # Names of the containers of every instance declared
+        return [
+            container_name_of(self.container, instance)
+            for instance in instance_names(self.container)
+        ]
+
+    def start_container(self, upgrade=False, instances=None, all_instances=False):
         # Users wants that we run the container
-        # We simulate rclmgr -r
+        # We simulate rclmgr -r, or rclmgr -u on upgrade
         try:
             self.run_log.debug(
                 "Going to import rclmgr"
@@ -1493,20 +1329,11 @@ class rclmgr_yml(object):
                 "Going to terminate with RC 22"
             )
             sys.exit(22)
-        input0 = argparse.Namespace(
-            config_file='rclmgr.yml',
-            force=True,
-            image_file_name=None,
-            install=False,
-            create_network=False,
-            network_name="ess_network",
-            run=True
-            )
         self.run_log.debug(
             "Going to readconf with rclmgr"
         )
         try:
-            rclmgr.readconf(input0)
+            rclmgr.load_config(self.filename)
             self.run_log.debug(
                 "Success readconf with essmgr"
             )
@@ -1522,12 +1349,61 @@ class rclmgr_yml(object):
             "The container is about to start. On later runs, use the 'startRCLContainer' " +
             "command to manage this container."
         )
+        if all_instances:
+            instances = instance_names(self.container)
+        elif instances is None:
+            instances = [DEFAULT_INSTANCE]
+        for instance in instances:
+            if instance not in instance_names(self.container):
+                self.run_log.error(
+                    "Instance " +
+                    instance +
+                    " is not declared under INSTANCES in " +
+                    self.filename
+                )
+                return False
+        self.run_log.debug(
+            "Going to handle instances " +
+            ", ".join(instances)
+        )
+
+        if upgrade:
+            self.run_log.info(
+                "The running container is upgraded to " +
+                self.IMAGE_VERSION +
+                " with a blue/green switch."
+            )
+            # One instance at a time, the others keep serving
+            upgrade_rc = 0
+            for instance in instances:
+                try:
+                    upgrade_rc += rclmgr.upgrade_container(instance=instance, events=self.events)
+                except BaseException:
+                    upgrade_rc += 1
+            if upgrade_rc != 0:
+                self.run_log.error(
+                    "The container upgrade did not complete. " +
+                    "Check the messages above."
+                )
+                return False
+            return True
 
         try:
             self.run_log.debug(
                 "Going to run rclmgr runcont"
             )
-            rclmgr.run_container(input0, True)
+            # Not forced, a stopped container that still matches the
+            # config is resumed instead of created again. Several
+            # instances are started concurrently
+            results = rclmgr.run_instances(instances, False, True, self.events)
+            failed = [instance for instance in instances if results[instance] != 0]
+            if len(failed) > 0:
+                self.run_log.error(
+                    "Instances " +
+                    ", ".join(failed) +
+                    " did not start"
+                )
+                sys.exit(24)
         except BaseException:
             # We are back
             self.run_log.error(
@@ -1543,8 +1419,219 @@ class rclmgr_yml(object):
         self.run_log.debug(
             "We are back from rclmgr runcont normal mode"
         )
+        with get_history().phase("ready"):
+            ready = self.__wait_ready(rclmgr, instances)
+        if not ready:
+            self.run_log.debug(
+                "Going to terminate with RC 25"
+            )
+            sys.exit(25)
+        self.__schedule_endpoint_ranking()
+        self.__schedule_image_prefetch()
+        self.__start_telemetry()
         return True
 
+    def __schedule_endpoint_ranking(self):
+        # Long running containers get the endpoint ranking refreshed when
+        # ENDPOINT_RANKING_INTERVAL asks for it, off when unset or 0
+        interval = int(self.container.get('ENDPOINT_RANKING_INTERVAL') or 0)
+        if interval == 0:
+            if os.path.isfile(os.path.join(user_unit_dir(), RANKING_TIMER + ".timer")):
+                remove_timer(RANKING_TIMER, runner=self.runner)
+                self.run_log.info(
+                    "No ENDPOINT_RANKING_INTERVAL, " +
+                    RANKING_TIMER +
+                    ".timer removed"
+                )
+            return
+        rc = install_timer(
+            RANKING_TIMER,
+            "Ranking of the IBM RCL endpoints",
+            sys.executable + " -m classes.endpoint_ranking",
+            interval,
+            self.tool_dir,
+            runner=self.runner
+        )
+        if rc != 0:
+            self.run_log.warning(
+                "Could not start " +
+                RANKING_TIMER +
+                ".timer, the endpoint ranking is only refreshed by startRCLContainer"
+            )
+        else:
+            self.run_log.debug(
+                "Endpoint ranking refreshed every " +
+                str(interval) +
+                " seconds by " +
+                RANKING_TIMER +
+                ".timer"
+            )
+
+    def __schedule_image_prefetch(self):
+        # The next version is downloaded in the window, not in the upgrade
+        version = self.container.get('PREFETCH_VERSION')
+        if version is None or str(version) == str(self.IMAGE_VERSION):
+            if os.path.isfile(os.path.join(user_unit_dir(), PREFETCH_TIMER + ".timer")):
+                remove_timer(PREFETCH_TIMER, runner=self.runner)
+                self.run_log.info(
+                    "No PREFETCH_VERSION to download, " +
+                    PREFETCH_TIMER +
+                    ".timer removed"
+                )
+            return
+        window = self.container.get('PREFETCH_WINDOW') or DEFAULT_WINDOW
+        rc = install_timer(
+            PREFETCH_TIMER,
+            "Prefetch of RCL image version " + str(version),
+            sys.executable + " -m classes.image_prefetch",
+            None,
+            self.tool_dir,
+            random_seconds=min(MAX_RANDOM_SECONDS, window_length(window) // 4),
+            runner=self.runner,
+            on_calendar=on_calendar(window)
+        )
+        if rc != 0:
+            self.run_log.warning(
+                "Could not start " +
+                PREFETCH_TIMER +
+                ".timer, version " +
+                str(version) +
+                " is downloaded by the upgrade run"
+            )
+        else:
+            self.run_log.info(
+                "Version " +
+                str(version) +
+                " is prefetched between " +
+                window.replace("-", " and ") +
+                " by " +
+                PREFETCH_TIMER +
+                ".timer"
+            )
+
+    def __start_telemetry(self):
+        # Samples of the running containers land in their LOG directories
+        # when TELEMETRY_INTERVAL asks for them, off when unset or 0
+        interval = int(self.container.get('TELEMETRY_INTERVAL') or 0)
+        if interval == 0:
+            if os.path.isfile(os.path.join(user_unit_dir(), TELEMETRY_SERVICE + ".service")):
+                remove_service(TELEMETRY_SERVICE, runner=self.runner)
+                self.run_log.info(
+                    "No TELEMETRY_INTERVAL, " +
+                    TELEMETRY_SERVICE +
+                    ".service removed"
+                )
+            return
+        # The interval is in the unit, a new one restarts the service
+        rc = install_service(
+            TELEMETRY_SERVICE,
+            "Resource telemetry of the RCL containers",
+            sys.executable + " -m classes.telemetry --collect --interval " + str(interval),
+            self.tool_dir,
+            runner=self.runner
+        )
+        if rc != 0:
+            self.run_log.warning(
+                "Could not start " +
+                TELEMETRY_SERVICE +
+                ".service, the resource use of the containers is not recorded"
+            )
+        else:
+            self.run_log.debug(
+                "Resource use of the containers sampled every " +
+                str(interval) +
+                " seconds by " +
+                TELEMETRY_SERVICE +
+                ".service"
+            )
+
+    def __wait_ready(self, rclmgr, instances):
+        # Started means sshd answers on the published port. The units are
+        # started by one systemctl call, which runs their jobs in parallel,
+        # then every instance is probed at the same time, each with its own
+        # READY_TIMEOUT counted from the start
+        units = ["container-" + instance_config(self.container, instance)['CONTAINER_NAME'] + ".service"
+                 for instance in instances]
+        started = time.monotonic()
+        # A fresh create only enables the units
+        if self.runner.call(["systemctl", "--user", "start"] + units) != 0:
+            self.run_log.error(
+                "Could not start " +
+                ", ".join(units)
+            )
+
+        running_at = {}
+
+        def probe(instance):
+            instance_cfg = instance_config(self.container, instance)
+            container_name = instance_cfg['CONTAINER_NAME']
+
+            def is_running():
+                if rclmgr.container_state(container_name, self.events) != "running":
+                    return False
+                running_at.setdefault(container_name, time.time())
+                return True
+            return readiness(
+                instance_cfg['SSH_PORT'],
+                timeout=READY_TIMEOUT,
+                log=self.run_log
+            ).wait(is_running, started=started)
+        with ThreadPoolExecutor(max_workers=len(instances)) as pool:
+            results = list(pool.map(probe, instances))
+        ready = True
+        for instance, unit, result in zip(instances, units, results):
+            instance_cfg = instance_config(self.container, instance)
+            container_name = instance_cfg['CONTAINER_NAME']
+            if container_name in running_at:
+                # The create of a fresh container ends once it runs
+                rclmgr.finish_lifecycle(container_name, self.events, running_at=running_at[container_name])
+            if result.ready:
+                timings = rclmgr.record_lifecycle_timing("ready", result.seconds)
+                self.run_log.info(
+                    "Container " +
+                    container_name +
+                    " is reachable on port " +
+                    str(instance_cfg['SSH_PORT']) +
+                    " (" +
+                    result.banner +
+                    ") " +
+                    str(timings['ready']['seconds']) +
+                    " seconds after it was started"
+                )
+                continue
+            ready = False
+            self.run_log.error(
+                "Container " +
+                container_name +
+                " did not answer SSH on port " +
+                str(instance_cfg['SSH_PORT']) +
+                " within " +
+                str(int(round(result.seconds))) +
+                " seconds, " +
+                str(result.attempts) +
+                " probes, last error: " +
+                str(result.error)
+            )
+            journal = unit_journal(unit, runner=self.runner)
+            if journal.strip() == "":
+                self.run_log.error(
+                    "No journal lines of " +
+                    unit +
+                    " could be read"
+                )
+            else:
+                self.run_log.error(
+                    "Last journal lines of " +
+                    unit +
+                    ":"
+                )
+                for line in journal.rstrip().splitlines():
+                    self.run_log.error(
+                        "    " +
+                        line
+                    )
+        return ready
+
     def __podman_bin_exists(self):
         self.run_log.debug(
             "Going to check if podman binary exists"
@@ -1676,45 +1763,105 @@ class rclmgr_yml(object):
             )
             sys.exit(7)
 
+    def __audit_storage(self):
+        self.run_log.debug(
+            "Going to check the podman storage driver"
+        )
+        info = storage_info(self.runner)
+        if info is None:
+            self.run_log.warning(
+                "Cannot read the podman storage driver, we continue"
+            )
+            return
+        self.run_log.debug(
+            "podman storage driver is " +
+            str(info['driver']) +
+            " on " +
+            str(info['backing_fs']) +
+            " at " +
+            str(info['graph_root'])
+        )
+        if info['driver'] not in COPYING_DRIVERS:
+            return
+        image_ref = self.IMAGE_NAME + ":" + str(self.IMAGE_VERSION)
+        sizes = layer_sizes(image_ref, self.runner)
+        if sizes:
+            cost = expected_cost(sizes)
+            self.run_log.warning(
+                "podman uses the " +
+                info['driver'] +
+                " storage driver, " +
+                image_ref +
+                " takes " +
+                format_size(cost['vfs_bytes']) +
+                " instead of " +
+                format_size(cost['overlay_bytes']) +
+                " and every container create copies " +
+                format_size(cost['copied_per_create'])
+            )
+        else:
+            self.run_log.warning(
+                "podman uses the " +
+                info['driver'] +
+                " storage driver, image load and container create copy every layer in full"
+            )
+        if overlay_support(info) is not None:
+            self.run_log.warning(
+                "Overlay is possible on this host, move to it with './startRCLContainer --migrate-storage'"
+            )
+        else:
+            self.run_log.warning(
+                "Overlay is not possible on this host, see './startRCLContainer --storage-audit'. We continue"
+            )
+
     def __reach_endpoints(self):
         self.run_log.debug(
             "Going to try to reach the IBM endpoints"
         )
 
-        portToCheck=22
-        reachedEndpoints = 0
+        portToCheck = RCL_PORT
         totalEndpoints = len(RCL_ENDPOINTS)
-        for endpoint_name in RCL_ENDPOINTS:
-            self.run_log.debug(
-                "Going to open network socket"
-            )
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.run_log.debug(
-                "Network socket is opened"
-            )
-            sock.settimeout(3)  # a 3 seconds timeout
-            try:
-                sock.connect((endpoint_name, portToCheck))
+        # All endpoints are timed at once, a refused connection is final,
+        # a timeout is sampled again
+        ranking = rank_endpoints(RCL_ENDPOINTS, portToCheck)
+        self.endpoint_ranking = ranking
+        reachedEndpoints = 0
+        for result in ranking:
+            if result['success_rate'] > 0:
                 self.run_log.debug(
                     "Connected to port " +
                     str(portToCheck) +
                     " at endpoint " +
-                    endpoint_name
+                    result['endpoint'] +
+                    ", median " +
+                    str(result['median_ms']) +
+                    " ms, success rate " +
+                    "%.2f" % result['success_rate']
                 )
                 reachedEndpoints = reachedEndpoints + 1
-
-                sock.close()
-                self.run_log.debug(
-                    "Network socket is closed"
-                )
             # We already checked we can resolve
-            except BaseException:
+            else:
                 self.run_log.warning(
                     "Could not reach port " +
                     str(portToCheck) +
                     " at endpoint " +
-                    endpoint_name
+                    result['endpoint'] +
+                    ": " +
+                    str(result['error'])
                 )
+        try:
+            ranking_file = write_ranking(ranking)
+            self.run_log.info(
+                "Endpoints ranked for the container, fastest first: " +
+                ", ".join(result['endpoint'] for result in ranking if result['success_rate'] > 0) +
+                " (" +
+                ranking_file +
+                ")"
+            )
+        except OSError:
+            self.run_log.warning(
+                "Cannot write the endpoint ranking, the container gets them unranked"
+            )
         if reachedEndpoints == totalEndpoints:
             self.run_log.info(
                 "All " +
@@ -1755,112 +1902,32 @@ class rclmgr_yml(object):
             )
             sys.exit(6)
 
-    def __delete_image(self, img_str_find):
-
-        images_list = self.__get_installed_containers()
-
-        if len(images_list) == 0:
-            self.run_log.info(
-                "No images are installed. No cleanup is required."
-            )
-            return True
+    def __watch_events(self):
+        # From here on container state comes from podman events
+        if self.events is not None:
+            return
+        events = podman_events(log=self.run_log, runner=self.runner)
+        if events.start():
+            self.events = events
         else:
             self.run_log.debug(
-                "There are images installed, proceeding further on clean up"
+                "podman events cannot be followed, container state is listed instead"
             )
-        # Lets iterate the images looking for our img_str_find only
-        image_ids_to_delete = []
-        try:
-            for image in images_list:
-                if image['names'] is None:
-                    self.run_log.debug(
-                        "Detected image with no name we are not going to clean this one"
-                    )
-                    continue
-                for image_alias_name in image['names']:
-                    # It is supported to have more than 1
-                    if img_str_find in image_alias_name:
-                        self.run_log.info(
-                            "Found image " +
-                            image_alias_name +
-                            " that we will try to delete"
-                        )
-                        short_id = image['id'][0:11]
-                        long_id = image['id']
-                        self.run_log.info(
-                            "The image " +
-                            image_alias_name +
-                            " has long ID " +
-                            long_id +
-                            " and short ID " +
-                            short_id
-                        )
-                        image_ids_to_delete.append(long_id)
-                    else:
-                        self.run_log.debug(
-                            "Found image" +
-                            image_alias_name +
-                            " that we won't delete"
-                        )
-        except BaseException:
-            self.run_log.debug(
-                "There were some issues cleaning images, we can continue"
-            )
-        if len(image_ids_to_delete) == 0:
-            self.run_log.info(
-                "There are no images related to " +
-                img_str_find +
-                " to be deleted"
-            )
-            return True
-        # We have at least 1 image ID to delete
-        delete_issues = 0
-        for image_id in set(image_ids_to_delete):
-            try:
-                self.run_log.info(
-                    "Going to delete image with ID " +
-                    image_id
-                )
-                delete_image_output = subprocess.check_output(
-                    ["/bin/podman", "image", "rm", "--force", image_id],
-                    stderr=subprocess.STDOUT
-                ).strip().decode()
-                self.run_log.info(
-                    "Image with ID " +
-                    image_id +
-                    " deleted"
-                )
-            except BaseException:
-                self.run_log.warn(
-                    "Could not clean delete image with ID " +
-                    image_id
-                )
-                try:
-                    if delete_image_output != "":
-                        self.run_log.warn(
-                            "The output was: \n" +
-                            delete_image_output
-                        )
-                except BaseException:
-                    self.run_log.debug(
-                        "We have no output from command"
-                    )
-                delete_issues += 1
-
-        if delete_issues > 0:
-            return False
-        else:
-            return True
 
     def __get_installed_containers(self):
         # Generates a JSON list of intalled containers
+        if self.events is not None and self.events.running:
+            self.run_log.debug(
+                "Containers taken from the podman events model"
+            )
+            return self.events.containers()
         self.run_log.debug(
             "Going to query the containers with podman ps command"
         )
-        containers_json_output = subprocess.check_output(
+        containers_json_output = self.runner.output(
             ["/bin/podman", "ps", "--all", "--format", "json"],
-            stderr=subprocess.STDOUT
-        ).strip().decode()
+            retries=2
+        )
         self.run_log.debug(
             "Got back from querying containers with podman ps command"
         )
@@ -1880,40 +1947,56 @@ class rclmgr_yml(object):
             container_list = []
         return container_list
 
-    def __alreadyUP(self, img_str_find):
+    def __resumable_container_exists(self):
+        # A stopped container of an instance on the image version we install
+        wanted_image = self.IMAGE_NAME + ":" + str(self.IMAGE_VERSION)
+        container_names = self.__instance_containers()
+        for pod in self.__get_installed_containers():
+            state = state_name(pod.get('State'))
+            found = [name for name in names_of(pod) if name in container_names]
+            if len(found) > 0 and pod.get('Image') == wanted_image and state in STOPPED_STATES:
+                self.run_log.debug(
+                    "Found " +
+                    state +
+                    " container " +
+                    found[0] +
+                    " on image " +
+                    wanted_image
+                )
+                return True
+        return False
+
+    def __alreadyUP(self):
+        # True when a container of an instance declared is running, matched
+        # by name as the image of a running container can be any version
         self.run_log.debug(
             "Method to reconnect to POD is called"
         )
-        installedPODs = self.__get_installed_containers()
-        # We might have more than one installed at this point
+        container_names = self.__instance_containers()
         isUP = False
-        for pod in installedPODs:
-            if pod['State'] == 3 or pod['State'] == "running":
-                imageContUp = pod['Image']
-                if pod['State'] == 3:
-                    imageContUpID = pod['ID']
-                else:
-                    imageContUpID = pod['Id']
+        for pod in self.__get_installed_containers():
+            state = state_name(pod.get('State'))
+            found = [name for name in names_of(pod) if name in container_names]
+            if len(found) == 0:
                 self.run_log.debug(
-                    "Found a POD with state = 3 (UP) " +
-                    "and image " +
-                    imageContUp +
-                    " and ID " +
-                    imageContUpID
+                    "Found container " +
+                    ",".join(names_of(pod)) +
+                    " which is not of an instance, state " +
+                    state
                 )
-                if img_str_find in pod['Image']:
-                    self.run_log.debug(
-                        "Found the POD image we are looking for in UP."
-                    )
-                    isUP = True
-                else:
-                    self.run_log.debug(
-                        "Although the POD image is UP, is not the one we are looking for."
-                    )
+            elif state == "running":
+                self.run_log.debug(
+                    "Found the container " +
+                    found[0] +
+                    " UP on image " +
+                    str(pod.get('Image'))
+                )
+                isUP = True
             else:
                 self.run_log.debug(
-                    "Found installed container on other state than 3 (UP) " +
-                    "and image " +
-                    pod['Image']
+                    "Found the container " +
+                    found[0] +
+                    " in state " +
+                    state
                 )
         return isUP
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: readiness.py
+# Description: Readiness of an RCL container, sshd answering with its banner
+#              on the published SSH port
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# IBM Service Portal reaches the container through the published SSH_PORT,
+# so a container is ready when a connection there is answered with an SSH
+# protocol banner, RFC 4253 section 4.2, not when podman reports it running.
+# -----------------------------------------------------------------------------
+
+import logging
+import socket
+import time
+
+from classes.command_runner import get_runner
+
+
+# Seconds a container has to get ready after it was started
+READY_TIMEOUT = 180
+
+# Seconds a single connection may take to return the banner
+PROBE_TIMEOUT = 3
+
+# Seconds between probes, growing up to the maximum
+PROBE_INTERVAL = 0.5
+PROBE_INTERVAL_MAX = 3
+
+# Journal lines of the unit shown when a container does not get ready
+JOURNAL_LINES = 50
+
+# A server may send other lines before the banner, the banner line itself
+# is at most 255 bytes
+BANNER_MAX_BYTES = 8192
+
+
+def ssh_banner(host, port, timeout=PROBE_TIMEOUT):
+    # The banner line, "SSH-2.0-OpenSSH_8.7", raises OSError or ValueError
+    # when there is none
+    with socket.create_connection((host, int(port)), timeout=timeout) as sock:
+        data = b""
+        while len(data) < BANNER_MAX_BYTES:
+            chunk = sock.recv(1024)
+            if chunk == b"":
+                break
+            data += chunk
+            for line in data.split(b"\n")[:-1]:
+                if line.startswith(b"SSH-"):
+                    return line.rstrip(b"\r").decode("ascii", errors="replace")
+    raise ValueError("no SSH banner returned")
+
+
+class readiness_result(object):
+    """
+        Outcome of readiness.wait
+    """
+
+    def __init__(self, ready, seconds, attempts, banner=None, error=None):
+        self.ready = ready
+        self.seconds = seconds
+        self.attempts = attempts
+        self.banner = banner
+        self.error = error
+
+
+class readiness(object):
+    """
+        Polls the published SSH port until sshd returns its banner
+
+        is_running, when given, is asked before every probe so a container
+        that is not running yet costs no connection. The probe interval
+        grows from PROBE_INTERVAL to PROBE_INTERVAL_MAX, the wait never goes
+        past timeout seconds.
+    """
+
+    def __init__(self, port, host="127.0.0.1", timeout=READY_TIMEOUT, log=None):
+        self.port = port
+        self.host = host
+        self.timeout = timeout
+        self.log = log or logging.getLogger("readiness")
+
+    def wait(self, is_running=None, started=None):
+        # started, a time.monotonic() stamp, is when the container was
+        # started, seconds and the timeout count from then
+        started = started if started is not None else time.monotonic()
+        deadline = started + self.timeout
+        interval = PROBE_INTERVAL
+        attempts = 0
+        error = "container is not running"
+        while True:
+            if is_running is None or is_running():
+                attempts += 1
+                probe_timeout = max(0.1, min(PROBE_TIMEOUT, deadline - time.monotonic()))
+                try:
+                    banner = ssh_banner(self.host, self.port, probe_timeout)
+                    seconds = time.monotonic() - started
+                    self.log.debug(
+                        "Port " +
+                        str(self.port) +
+                        " answered with " +
+                        banner +
+                        " after " +
+                        str(round(seconds, 1)) +
+                        " seconds"
+                    )
+                    return readiness_result(True, seconds, attempts, banner=banner)
+                except (OSError, ValueError) as err:
+                    error = str(err) or err.__class__.__name__
+            if time.monotonic() + interval >= deadline:
+                break
+            time.sleep(interval)
+            interval = min(PROBE_INTERVAL_MAX, interval * 2)
+        return readiness_result(False, time.monotonic() - started, attempts, error=error)
+
+
+def unit_journal(unit, lines=JOURNAL_LINES, runner=None):
+    # Last journal lines of a user unit, empty when they cannot be read
+    runner = runner or get_runner()
+    result = runner.run(
+        ["journalctl", "--user", "--no-pager", "-n", str(lines), "-u", unit],
+        timeout=30
+    )
+    return result.output if result.ok else ""
@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: resource_profile.py
+# Description: Resource limits of the RCL containers, checked against the
+#              host capacity, and the report of their peak usage
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# The profile is set in the CONTAINER section of rclmgr.yml, or per instance
+# under INSTANCES, and applied by podman create:
+#
+#   CONTAINER_MEMORY: 2g           --memory, swap limited to the same
+#   CONTAINER_CPUS: 2              --cpus
+#   CONTAINER_PIDS_LIMIT: 1024     --pids-limit
+#   CONTAINER_BLKIO_WEIGHT: 100    --blkio-weight, 10 to 1000
+#
+# A key left out is not limited. The peak usage of every container since it
+# started is shown by ./startRCLContainer --resources, to size the profile.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+
+import yaml
+
+from classes.command_runner import get_runner
+from classes.config_checks import CGROUP_ROOT, MIN_MEMORY, format_size
+from classes.rcl_instances import container_name_of, instance_names
+
+
+# rclmgr.yml key, podman create option
+RESOURCE_KEYS = [
+    ('CONTAINER_MEMORY', '--memory'),
+    ('CONTAINER_CPUS', '--cpus'),
+    ('CONTAINER_PIDS_LIMIT', '--pids-limit'),
+    ('CONTAINER_BLKIO_WEIGHT', '--blkio-weight')
+]
+
+# Suggested limit is the peak seen times this
+SIZING_HEADROOM = 1.5
+
+
+def create_options(resources):
+    options = []
+    for key, option in RESOURCE_KEYS:
+        if key in resources:
+            value = resources[key]
+            if key == 'CONTAINER_CPUS':
+                value = ("%.2f" % value).rstrip("0").rstrip(".")
+            options.append(option + "=" + str(value))
+    if 'CONTAINER_MEMORY' in resources:
+        # No swap on top of the memory limit, a swapping container slows
+        # the EMS VM down as much as one without a limit
+        options.append("--memory-swap=" + str(resources['CONTAINER_MEMORY']))
+    return options
+
+
+def resource_mismatches(host_config, resources):
+    # Differences between HostConfig of podman inspect and the profile
+    mismatches = []
+    memory = host_config.get("Memory") or 0
+    if memory != resources.get('CONTAINER_MEMORY', 0):
+        mismatches.append("memory limit " + str(memory) + " is not " + str(resources.get('CONTAINER_MEMORY', 0)))
+    nano_cpus = host_config.get("NanoCpus") or 0
+    if nano_cpus != int(round(resources.get('CONTAINER_CPUS', 0) * 1e9)):
+        mismatches.append("CPU limit " + str(nano_cpus / 1e9) + " is not " + str(resources.get('CONTAINER_CPUS', 0)))
+    # Unset, podman applies the pids limit and weight of containers.conf
+    if 'CONTAINER_PIDS_LIMIT' in resources and host_config.get("PidsLimit") != resources['CONTAINER_PIDS_LIMIT']:
+        mismatches.append("pids limit " + str(host_config.get("PidsLimit")) + " is not " +
+                          str(resources['CONTAINER_PIDS_LIMIT']))
+    if 'CONTAINER_BLKIO_WEIGHT' in resources and \
+            host_config.get("BlkioWeight") != resources['CONTAINER_BLKIO_WEIGHT']:
+        mismatches.append("IO weight " + str(host_config.get("BlkioWeight")) + " is not " +
+                          str(resources['CONTAINER_BLKIO_WEIGHT']))
+    return mismatches
+
+
+def read_cgroup(cgroup_dir, name):
+    try:
+        with open(os.path.join(cgroup_dir, name), "r") as cgroup_file:
+            return cgroup_file.read()
+    except OSError:
+        return None
+
+
+def read_number(cgroup_dir, name):
+    text = read_cgroup(cgroup_dir, name)
+    if text is None or text.strip() in ["", "max"]:
+        return None
+    return int(text.split()[0])
+
+
+def read_keyed(cgroup_dir, name):
+    # "key value" lines of memory.events or cpu.stat
+    values = {}
+    for line in (read_cgroup(cgroup_dir, name) or "").splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            values[fields[0]] = int(fields[1])
+    return values
+
+
+def read_io(cgroup_dir):
+    # Bytes read and written over all the devices of io.stat
+    read_bytes = 0
+    written_bytes = 0
+    for line in (read_cgroup(cgroup_dir, "io.stat") or "").splitlines():
+        for field in line.split()[1:]:
+            name, _, value = field.partition("=")
+            if name == "rbytes":
+                read_bytes += int(value)
+            elif name == "wbytes":
+                written_bytes += int(value)
+    return read_bytes, written_bytes
+
+
+def container_usage(container_name, runner=None):
+    # Usage of a running container out of its cgroup, None when not running
+    runner = runner or get_runner()
+    result = runner.run(
+        ["podman", "container", "inspect", "--format", "{{.State.Running}} {{.State.CgroupPath}}", container_name],
+        retries=2
+    )
+    fields = result.output.split()
+    if not result.ok or len(fields) != 2 or fields[0] != "true":
+        return None
+    cgroup_dir = CGROUP_ROOT + fields[1]
+    cpu_stat = read_keyed(cgroup_dir, "cpu.stat")
+    read_bytes, written_bytes = read_io(cgroup_dir)
+    return {
+        'memory_peak': read_number(cgroup_dir, "memory.peak"),
+        'memory_current': read_number(cgroup_dir, "memory.current"),
+        'memory_max': read_number(cgroup_dir, "memory.max"),
+        'oom_kills': read_keyed(cgroup_dir, "memory.events").get("oom_kill", 0),
+        'pids_peak': read_number(cgroup_dir, "pids.peak"),
+        'pids_current': read_number(cgroup_dir, "pids.current"),
+        'pids_max': read_number(cgroup_dir, "pids.max"),
+        'cpu_seconds': cpu_stat.get("usage_usec", 0) / 1e6,
+        'throttled': cpu_stat.get("nr_throttled", 0),
+        'throttled_seconds': cpu_stat.get("throttled_usec", 0) / 1e6,
+        'io_read': read_bytes,
+        'io_written': written_bytes
+    }
+
+
+def suggested_memory(peak):
+    # Peak with headroom, rounded up to 256 MiB, as a rclmgr.yml value
+    size = int(peak * SIZING_HEADROOM)
+    step = 256 * 1024 * 1024
+    size = max(MIN_MEMORY, ((size + step - 1) // step) * step)
+    return str(size // (1024 * 1024)) + "m"
+
+
+def usage_report(config_file="rclmgr.yml", runner=None, out=None):
+    out = out or sys.stdout
+    with open(config_file, "r") as config:
+        container_cfg = yaml.safe_load(config)['CONTAINER']
+    for instance in instance_names(container_cfg):
+        name = container_name_of(container_cfg, instance)
+        usage = container_usage(name, runner)
+        if usage is None:
+            out.write(name + ": not running\n")
+            continue
+        out.write(name + ":\n")
+        memory = usage['memory_peak']
+        memory_label = "peak"
+        if memory is None:
+            # memory.peak needs kernel 5.19
+            memory = usage['memory_current']
+            memory_label = "current"
+        if memory is not None:
+            line = "  memory  " + memory_label + " " + format_size(memory)
+            if usage['memory_max'] is not None:
+                line += " of " + format_size(usage['memory_max']) + \
+                    " (" + str(int(100.0 * memory / usage['memory_max'])) + "%)"
+            else:
+                line += ", not limited"
+            line += ", OOM kills " + str(usage['oom_kills'])
+            out.write(line + ", suggested CONTAINER_MEMORY: " + suggested_memory(memory) + "\n")
+        pids = usage['pids_peak'] if usage['pids_peak'] is not None else usage['pids_current']
+        if pids is not None:
+            out.write(
+                "  pids    " + ("peak " if usage['pids_peak'] is not None else "current ") + str(pids) +
+                (" of " + str(usage['pids_max']) if usage['pids_max'] is not None else ", not limited") + "\n"
+            )
+        out.write(
+            "  cpu     %.1fs used, throttled %d times for %.1fs\n" %
+            (usage['cpu_seconds'], usage['throttled'], usage['throttled_seconds'])
+        )
+        out.write(
+            "  io      " + format_size(usage['io_read']) + " read, " +
+            format_size(usage['io_written']) + " written\n"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(usage_report(sys.argv[1] if len(sys.argv) > 1 else "rclmgr.yml"))
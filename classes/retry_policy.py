@@ -0,0 +1,237 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: retry_policy.py
+# Description: Retry policies of the transient failures, per operation class,
+#              with backoff, jitter and a retry budget for the whole run
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# Commands take a policy from the command runner:
+#
+#   runner.call(["podman", "pull", image], policy=get_policy("pull"))
+#
+# Anything else, as the connects of the endpoint ranking, asks the policy
+# whether an error is transient:
+#
+#   get_policy("probe").classify_error(err)
+#
+# Every retry is logged as a warning with the error that caused it. All the
+# policies draw from one budget, so a host that keeps failing stops
+# retrying instead of multiplying its timeouts.
+# -----------------------------------------------------------------------------
+
+import errno
+import random
+import socket
+import threading
+
+
+# Output fragments of errors that are known to go away on a retry.
+# Mostly rootless podman storage locks and registry hiccups.
+TRANSIENT_ERRORS = [
+    "database is locked",
+    "error acquiring lock",
+    "resource temporarily unavailable",
+    "i/o timeout",
+    "connection reset by peer",
+    "tls handshake timeout",
+    "temporary failure in name resolution",
+    "502 bad gateway",
+    "503 service unavailable",
+    "504 gateway time"
+]
+
+# Registry and network errors of podman pull and skopeo
+REGISTRY_ERRORS = TRANSIENT_ERRORS + [
+    "429 too many requests",
+    "toomanyrequests",
+    "unexpected eof",
+    "context deadline exceeded",
+    "net/http: request canceled",
+    "no route to host",
+    "network is unreachable",
+    "server misbehaving"
+]
+
+# Lock contention of the rootless podman storage
+STORAGE_ERRORS = [
+    "database is locked",
+    "error acquiring lock",
+    "resource temporarily unavailable",
+    "device or resource busy",
+    "layer is in use by a container"
+]
+
+# Socket errors of a probe that may pass on the next attempt, a refused
+# connection is an answer and is not retried
+PROBE_ERRNOS = [
+    errno.ETIMEDOUT,
+    errno.ECONNRESET,
+    errno.EHOSTUNREACH,
+    errno.ENETUNREACH,
+    errno.EAGAIN
+]
+
+# Retries and seconds of backoff allowed to a whole run
+RUN_RETRIES = 20
+RUN_RETRY_SECONDS = 300
+
+
+class retry_budget(object):
+    """
+        Retries left to the run, shared by all the policies
+
+        A retry takes one retry and its delay from the budget, when either
+        is spent the failure is returned as it is.
+    """
+
+    def __init__(self, retries=RUN_RETRIES, seconds=RUN_RETRY_SECONDS):
+        self.full = (retries, seconds)
+        self.retries = retries
+        self.seconds = seconds
+        self.lock = threading.Lock()
+
+    def refill(self):
+        # A new run in the same process starts with the whole budget
+        with self.lock:
+            self.retries, self.seconds = self.full
+
+    def take(self, delay):
+        with self.lock:
+            if self.retries <= 0 or self.seconds < delay:
+                return False
+            self.retries -= 1
+            self.seconds -= delay
+            return True
+
+
+class retry_policy(object):
+    """
+        Declarative retry policy of an operation class
+
+        attempts       - runs in total, the first one included
+        base_delay     - seconds before the first retry, doubled per retry
+        max_delay      - cap of the delay before jitter
+        retryable      - output fragments of the retryable errors
+        retry_timeouts - whether a command killed by its timeout is retried
+        jitter         - fraction of the delay taken off at random, so
+                         several hosts do not retry against a registry at
+                         the same instant
+        budget         - retry_budget drawn from, None for no limit
+    """
+
+    def __init__(self, name, attempts, base_delay, max_delay, retryable=None,
+                 retry_timeouts=True, jitter=0.5, budget=None):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = [pattern.lower() for pattern in (retryable or [])]
+        self.retry_timeouts = retry_timeouts
+        self.jitter = jitter
+        self.budget = budget
+
+    def delay(self, retry):
+        # Seconds to wait before retry number retry, counted from 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        return round(delay * (1 - self.jitter * random.random()), 2)
+
+    def classify(self, result):
+        # The reason a failed command_result may be retried, None when not
+        if result.ok:
+            return None
+        if result.timed_out:
+            return "timeout" if self.retry_timeouts else None
+        text = (result.output + "\n" + result.error).lower()
+        for pattern in self.retryable:
+            if pattern in text:
+                return pattern
+        return None
+
+    def classify_error(self, err):
+        # Same as classify, for an exception raised by a probe
+        if isinstance(err, socket.timeout):
+            return "timeout" if self.retry_timeouts else None
+        if isinstance(err, OSError) and err.errno in PROBE_ERRNOS:
+            return errno.errorcode.get(err.errno, str(err.errno))
+        text = str(err).lower()
+        for pattern in self.retryable:
+            if pattern in text:
+                return pattern
+        return None
+
+    def next_delay(self, attempt, reason, what, log, remaining=None):
+        # Delay before the next attempt, None when the failure is final
+        if reason is None or attempt >= self.attempts:
+            return None
+        delay = self.delay(attempt)
+        if remaining is not None and remaining <= delay:
+            log.warning(
+                "Not retrying " +
+                what +
+                ", the global deadline is too close"
+            )
+            return None
+        if self.budget is not None and not self.budget.take(delay):
+            log.warning(
+                "Not retrying " +
+                what +
+                ", the retry budget of the run is spent"
+            )
+            return None
+        log.warning(
+            "Retrying " +
+            what +
+            " in " +
+            str(delay) +
+            " seconds, retry " +
+            str(attempt) +
+            " of " +
+            str(self.attempts - 1) +
+            " of the " +
+            self.name +
+            " policy, transient error: " +
+            reason
+        )
+        return delay
+
+
+_budget = retry_budget()
+
+POLICIES = {
+    # Image pulls and registry queries, a timed out pull is not retried as
+    # it already had LONG_TIMEOUT
+    'pull': retry_policy('pull', attempts=5, base_delay=5, max_delay=60,
+                         retryable=REGISTRY_ERRORS, retry_timeouts=False, budget=_budget),
+    # Reachability probes, short and cheap
+    'probe': retry_policy('probe', attempts=3, base_delay=1, max_delay=4, budget=_budget),
+    # podman image and container removal, load and prune, a command that
+    # waited on the storage lock for its whole timeout is not queued again
+    'storage': retry_policy('storage', attempts=4, base_delay=1, max_delay=15,
+                            retryable=STORAGE_ERRORS, retry_timeouts=False, budget=_budget),
+    # Everything else, queries of podman mostly
+    'default': retry_policy('default', attempts=3, base_delay=2, max_delay=30,
+                            retryable=TRANSIENT_ERRORS, budget=_budget)
+}
+
+
+def get_policy(name):
+    return POLICIES[name]
+
+
+def reset_budget():
+    _budget.refill()
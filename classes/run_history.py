@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: run_history.py
+# Description: sqlite history of the startRCLContainer runs, with the time
+#              of every phase, the return code and the host facts
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# A run is opened when startRCLContainer starts and closed with its return
+# code. Code in between times its phases with:
+#
+#   with get_history().phase("image_install"):
+#       ...
+#
+# Phases are kept in memory and written with the run in one transaction,
+# so a slow disk never adds to the phases measured.
+# -----------------------------------------------------------------------------
+
+import os
+import platform
+import re
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from classes.command_runner import get_runner
+
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".local", "share", "sssrcl", "run_history.db")
+
+HISTORY_FORMAT = 1
+
+# Days of each of the two windows compared by the trend view
+TREND_DAYS = 30
+
+# A phase whose median changed by more than this factor is pointed out
+TREND_FACTOR = 1.5
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tool TEXT NOT NULL,
+        argv TEXT,
+        started REAL NOT NULL,
+        ended REAL,
+        seconds REAL,
+        rc INTEGER,
+        rc_meaning TEXT,
+        image_name TEXT,
+        image_version TEXT,
+        image_digest TEXT,
+        hostname TEXT,
+        os_release TEXT,
+        kernel TEXT,
+        podman_version TEXT,
+        python_version TEXT,
+        cpus INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS phases (
+        run_id INTEGER NOT NULL REFERENCES runs(id),
+        name TEXT NOT NULL,
+        started REAL NOT NULL,
+        seconds REAL NOT NULL,
+        ok INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS runs_started ON runs(started)",
+    "CREATE INDEX IF NOT EXISTS runs_rc ON runs(rc)",
+    "CREATE INDEX IF NOT EXISTS phases_name_started ON phases(name, started)",
+    "CREATE INDEX IF NOT EXISTS phases_run ON phases(run_id)",
+    "PRAGMA user_version = " + str(HISTORY_FORMAT)
+]
+
+RC_LINE = re.compile(r'^\s*RC\s+(\d+)\s*=\s*(.+?)\s*$')
+
+
+def rc_table(docstring):
+    # {rc: meaning} out of the "RC n = meaning" lines of a docstring
+    table = {}
+    for line in (docstring or "").splitlines():
+        match = RC_LINE.match(line)
+        if match is not None and match.group(2) != "FREE":
+            table[int(match.group(1))] = match.group(2)
+    return table
+
+
+def os_release():
+    try:
+        with open("/etc/os-release", "r") as release:
+            for line in release:
+                if line.startswith("PRETTY_NAME="):
+                    return line.split("=", 1)[1].strip().strip('"')
+    except OSError:
+        pass
+    return None
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2 == 1:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+class run_history(object):
+    """
+        History of the runs in an indexed sqlite database
+
+        runs   - one row per run: start, end, return code and its meaning,
+                 image version and digest, host facts
+        phases - one row per timed phase of a run
+
+        Recording never fails a run, a database that cannot be opened or
+        written only costs the history of that run.
+    """
+
+    def __init__(self, history_file=HISTORY_FILE, runner=None):
+        self.history_file = history_file
+        self.runner = runner or get_runner()
+        self.run = None
+        self.phases = []
+        self.lock = threading.Lock()
+
+    def start(self, tool, argv=None):
+        self.run = {
+            'tool': tool,
+            'argv': " ".join(argv or sys.argv[1:]),
+            'started': time.time(),
+            'image_name': None,
+            'image_version': None
+        }
+        self.phases = []
+
+    def set_image(self, image_name, image_version):
+        if self.run is not None:
+            self.run['image_name'] = image_name
+            self.run['image_version'] = image_version
+
+    @contextmanager
+    def phase(self, name):
+        started = time.time()
+        clock = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        except SystemExit as exit_error:
+            ok = exit_error.code in [None, 0]
+            raise
+        finally:
+            with self.lock:
+                self.phases.append({
+                    'name': name,
+                    'started': started,
+                    'seconds': time.monotonic() - clock,
+                    'ok': 1 if ok else 0
+                })
+
+    def finish(self, rc, rc_meanings=None):
+        # Writes the run, returns its id or None when it could not be written
+        if self.run is None:
+            return None
+        run = self.run
+        self.run = None
+        run['ended'] = time.time()
+        run['seconds'] = run['ended'] - run['started']
+        run['rc'] = rc
+        run['rc_meaning'] = (rc_meanings or {}).get(rc, "OK" if rc == 0 else None)
+        run['image_digest'] = self.__image_digest(run['image_name'], run['image_version'])
+        run.update(self.__host_facts())
+        try:
+            connection = self.__connect()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO runs (" + ", ".join(sorted(run)) + ") VALUES (" +
+                    ", ".join("?" for _ in run) + ")",
+                    [run[column] for column in sorted(run)]
+                )
+                run_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO phases (run_id, name, started, seconds, ok) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, phase['name'], phase['started'], phase['seconds'], phase['ok'])
+                     for phase in self.phases]
+                )
+            connection.close()
+        except (sqlite3.Error, OSError):
+            return None
+        return run_id
+
+    def recent_runs(self, limit=10):
+        connection = self.__connect()
+        try:
+            runs = connection.execute(
+                "SELECT id, started, seconds, rc, rc_meaning, image_version, tool FROM runs " +
+                "ORDER BY started DESC LIMIT ?", (limit,)
+            ).fetchall()
+            phases = {}
+            for run_id, name, seconds in connection.execute(
+                    "SELECT run_id, name, seconds FROM phases WHERE run_id IN (" +
+                    ", ".join("?" for _ in runs) + ")", [run[0] for run in runs]):
+                phases.setdefault(run_id, []).append((name, seconds))
+        finally:
+            connection.close()
+        return runs, phases
+
+    def trends(self, days=TREND_DAYS, now=None):
+        # [(phase, recent median, runs, previous median, runs)] comparing
+        # the last days with the days before them, failed phases left out
+        now = now or time.time()
+        window = days * 86400.0
+        connection = self.__connect()
+        try:
+            rows = connection.execute(
+                "SELECT name, started, seconds FROM phases WHERE ok = 1 AND started >= ? " +
+                "ORDER BY name", (now - 2 * window,)
+            ).fetchall()
+        finally:
+            connection.close()
+        windows = {}
+        for name, started, seconds in rows:
+            recent, previous = windows.setdefault(name, ([], []))
+            (recent if started >= now - window else previous).append(seconds)
+        trends = []
+        for name in sorted(windows):
+            recent, previous = windows[name]
+            trends.append((
+                name,
+                median(recent) if recent else None, len(recent),
+                median(previous) if previous else None, len(previous)
+            ))
+        return trends
+
+    def rc_counts(self, days=TREND_DAYS, now=None):
+        now = now or time.time()
+        connection = self.__connect()
+        try:
+            return connection.execute(
+                "SELECT rc, rc_meaning, COUNT(*) FROM runs WHERE started >= ? " +
+                "GROUP BY rc ORDER BY COUNT(*) DESC", (now - days * 86400.0,)
+            ).fetchall()
+        finally:
+            connection.close()
+
+    def report(self, limit=10, days=TREND_DAYS, out=None):
+        out = out or sys.stdout
+        if not os.path.isfile(self.history_file):
+            out.write("No run history in " + self.history_file + "\n")
+            return
+        runs, phases = self.recent_runs(limit)
+        out.write("Last " + str(len(runs)) + " runs:\n")
+        for run_id, started, seconds, rc, rc_meaning, image_version, tool in runs:
+            out.write(
+                "  " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)) +
+                "  " + ("%8.1fs" % seconds if seconds is not None else "        -") +
+                "  RC " + str(rc) + " " + str(rc_meaning or "") +
+                "  " + str(image_version or "-") + "\n"
+            )
+            for name, phase_seconds in phases.get(run_id, []):
+                out.write("      " + name + " %.1fs" % phase_seconds + "\n")
+        out.write(
+            "\nPhase medians, last " + str(days) + " days against the " +
+            str(days) + " days before:\n"
+        )
+        for name, recent, recent_runs, previous, previous_runs in self.trends(days):
+            line = "  %-16s %9s (%d runs) %9s (%d runs)" % (
+                name,
+                "-" if recent is None else "%.1fs" % recent, recent_runs,
+                "-" if previous is None else "%.1fs" % previous, previous_runs
+            )
+            if recent is not None and previous is not None and previous > 0:
+                factor = recent / previous
+                if factor >= TREND_FACTOR:
+                    line += "  %.1fx slower" % factor
+                elif factor <= 1 / TREND_FACTOR:
+                    line += "  %.1fx faster" % (1 / factor)
+            out.write(line + "\n")
+        out.write("\nReturn codes, last " + str(days) + " days:\n")
+        for rc, rc_meaning, count in self.rc_counts(days):
+            out.write("  RC " + str(rc) + " " + str(rc_meaning or "") + ": " + str(count) + " runs\n")
+
+    def __connect(self):
+        directory = os.path.dirname(self.history_file)
+        if directory != "" and not os.path.isdir(directory):
+            os.makedirs(directory)
+        connection = sqlite3.connect(self.history_file, timeout=10)
+        if connection.execute("PRAGMA user_version").fetchone()[0] != HISTORY_FORMAT:
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+        return connection
+
+    def __image_digest(self, image_name, image_version):
+        if image_name is None or image_version is None:
+            return None
+        result = self.runner.run(
+            ["podman", "image", "inspect", "--format", "{{.Digest}}",
+             image_name + ":" + str(image_version)],
+            timeout=30
+        )
+        return result.output.strip() if result.ok and result.output.strip() != "" else None
+
+    def __host_facts(self):
+        result = self.runner.run(["podman", "--version"], timeout=30)
+        return {
+            'hostname': socket.gethostname(),
+            'os_release': os_release(),
+            'kernel': platform.release(),
+            'podman_version': result.output.strip().split()[-1] if result.ok and result.output.strip() else None,
+            'python_version': platform.python_version(),
+            'cpus': os.cpu_count()
+        }
+
+
+_history = None
+
+
+def get_history():
+    # One history per process, phases are timed from any module
+    global _history
+    if _history is None:
+        _history = run_history()
+    return _history
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: state_files.py
+# Description: Files the RCL tools keep for later runs, and their atomic
+#              replacement
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# State of the tools lives in ~/.local/share/sssrcl, resolved on use so HOME
+# is the one of the caller, a timer or a test. Files read by another process
+# while they change, a container, systemd or the next run, are written next
+# to their target and swapped in with one rename:
+#
+#   with atomic_write(data_path("endpoints", "ranked")) as ranking:
+#       ranking.write(...)
+# -----------------------------------------------------------------------------
+
+import contextlib
+import os
+
+
+def data_path(*parts):
+    return os.path.join(os.path.expanduser("~"), ".local", "share", "sssrcl", *parts)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w"):
+    # Yields the file to write, path is replaced when the block ends. A
+    # block that raises leaves path as it was
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    partial = path + ".new"
+    try:
+        with open(partial, mode) as new_file:
+            yield new_file
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
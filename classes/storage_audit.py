@@ -0,0 +1,488 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: storage_audit.py
+# Description: Audit of the rootless podman storage driver of rcladmin and
+#              its guided migration from vfs to overlay
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# Rootless podman falls back to the vfs driver when it cannot mount overlay,
+# for example on an old kernel without fuse-overlayfs installed. vfs stores
+# every layer as a full copy of the layer below it, and every container as a
+# full copy of its image, so image load and container create copy the image
+# many times over.
+#
+#   ./startRCLContainer --storage-audit      driver, overlay support and cost
+#   ./startRCLContainer --migrate-storage    benchmark, then move to overlay
+#
+# The benchmark loads the image tarball into scratch stores, one vfs and one
+# overlay, next to the real one so both write to the same filesystem. The
+# real store is left alone until the migration is confirmed.
+# -----------------------------------------------------------------------------
+
+import datetime
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from classes.command_runner import LONG_TIMEOUT, get_runner
+from classes.config_checks import format_size
+from classes.retry_policy import get_policy
+from classes.state_files import atomic_write
+from classes.systemd_user import user_unit_dir
+
+
+# Rootless overlay without fuse-overlayfs needs this kernel
+NATIVE_OVERLAY_KERNEL = (5, 13)
+
+FUSE_OVERLAYFS = "fuse-overlayfs"
+
+# Drivers that copy a layer in full instead of stacking it
+COPYING_DRIVERS = ["vfs"]
+
+# Network every podman has, created again by podman itself
+DEFAULT_NETWORK = "podman"
+
+
+def storage_conf_path():
+    return os.path.join(os.path.expanduser("~"), ".config", "containers", "storage.conf")
+
+
+def kernel_version(release):
+    # "5.14.0-362.el9.x86_64" is (5, 14)
+    match = re.match(r"(\d+)\.(\d+)", str(release or ""))
+    if match is None:
+        return None
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def storage_info(runner=None):
+    # The store as podman sees it, None when podman info fails
+    runner = runner or get_runner()
+    result = runner.run(["podman", "info", "--format", "json"], retries=2)
+    if not result.ok:
+        return None
+    try:
+        info = json.loads(result.output)
+    except ValueError:
+        return None
+    store = info.get('store') or {}
+    host = info.get('host') or {}
+    status = store.get('graphStatus') or {}
+    mount_program = (store.get('graphOptions') or {}).get('overlay.mount_program') or {}
+    return {
+        'driver': store.get('graphDriverName'),
+        'graph_root': store.get('graphRoot'),
+        'run_root': store.get('runRoot'),
+        'mount_program': mount_program.get('Executable'),
+        'backing_fs': status.get('Backing Filesystem'),
+        'd_type': status.get('Supports d_type'),
+        'images': (store.get('imageStore') or {}).get('number', 0),
+        'containers': (store.get('containerStore') or {}).get('number', 0),
+        'kernel': host.get('kernel')
+    }
+
+
+def overlay_support(info):
+    # How overlay would be mounted: "native", "fuse-overlayfs" or None
+    if info.get('d_type') == "false":
+        # overlay needs d_type, an XFS made with ftype=0 has none
+        return None
+    kernel = kernel_version(info.get('kernel'))
+    if kernel is not None and kernel >= NATIVE_OVERLAY_KERNEL:
+        return "native"
+    if shutil.which(FUSE_OVERLAYFS) is not None:
+        return FUSE_OVERLAYFS
+    return None
+
+
+def layer_sizes(image_ref, runner=None):
+    # Bytes of every non empty layer of the image, base layer first
+    runner = runner or get_runner()
+    result = runner.run(["podman", "history", "--format", "json", image_ref], retries=2)
+    if not result.ok:
+        return []
+    try:
+        history = json.loads(result.output) or []
+    except ValueError:
+        return []
+    sizes = [int(entry.get('size') or entry.get('Size') or 0) for entry in history]
+    return [size for size in reversed(sizes) if size > 0]
+
+
+def expected_cost(sizes, containers=1):
+    # Disk taken by the image and its containers under each driver. vfs
+    # copies all the layers below into every layer, and the whole image
+    # into every container
+    image_bytes = sum(sizes)
+    vfs_bytes = 0
+    below = 0
+    for size in sizes:
+        below += size
+        vfs_bytes += below
+    return {
+        'layers': len(sizes),
+        'overlay_bytes': image_bytes,
+        'vfs_bytes': vfs_bytes + containers * image_bytes,
+        'copied_per_create': image_bytes
+    }
+
+
+def audit_report(image_ref, runner=None, out=None):
+    # RC 0 when the store stacks layers, 1 when it copies them or cannot be read
+    out = out or sys.stdout
+    info = storage_info(runner)
+    if info is None:
+        out.write("podman info failed, the storage cannot be audited\n")
+        return 1
+    support = overlay_support(info)
+    out.write("driver        " + str(info['driver']) + "\n")
+    out.write("graph root    " + str(info['graph_root']) + " (" + str(info['backing_fs']) + ")\n")
+    if info['driver'] == "overlay":
+        out.write(
+            "overlay       " +
+            ("through " + info['mount_program'] if info['mount_program'] else "native") + "\n"
+        )
+    else:
+        out.write(
+            "overlay       " +
+            (support + " is possible" if support else "not possible, kernel " + str(info['kernel']) +
+             " and no " + FUSE_OVERLAYFS) + "\n"
+        )
+    out.write("store         " + str(info['images']) + " images, " + str(info['containers']) + " containers\n")
+    if info['driver'] not in COPYING_DRIVERS:
+        return 0
+    sizes = layer_sizes(image_ref, runner)
+    if sizes:
+        cost = expected_cost(sizes)
+        out.write(
+            image_ref + " has " + str(cost['layers']) + " layers, " +
+            format_size(cost['overlay_bytes']) + " on overlay, " +
+            format_size(cost['vfs_bytes']) + " on vfs with one container, and every container create copies " +
+            format_size(cost['copied_per_create']) + "\n"
+        )
+    else:
+        out.write(image_ref + " is not installed, vfs copies every layer and every container in full\n")
+    if support:
+        out.write("Move to overlay with ./startRCLContainer --migrate-storage\n")
+    else:
+        out.write("Install " + FUSE_OVERLAYFS + " or a kernel " + ".".join(str(part) for part in NATIVE_OVERLAY_KERNEL) +
+                  " or later, then run ./startRCLContainer --migrate-storage\n")
+    return 1
+
+
+def set_driver(text, driver, mount_program=None):
+    # storage.conf text with the driver, and the overlay mount program when
+    # given, set. Other settings are kept as they are
+    lines = text.splitlines()
+    section = None
+    driver_set = False
+    overlay_section = None
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            section = stripped
+            if section == "[storage.options.overlay]":
+                overlay_section = index
+        elif section == "[storage]" and re.match(r"driver\s*=", stripped):
+            lines[index] = 'driver = "' + driver + '"'
+            driver_set = True
+        elif section == "[storage.options.overlay]" and re.match(r"mount_program\s*=", stripped):
+            lines[index] = 'mount_program = "' + mount_program + '"' if mount_program else "#" + line
+            mount_program = None
+    if not driver_set:
+        if "[storage]" in [line.strip() for line in lines]:
+            at = [line.strip() for line in lines].index("[storage]")
+            lines.insert(at + 1, 'driver = "' + driver + '"')
+            if overlay_section is not None and overlay_section > at:
+                overlay_section += 1
+        else:
+            lines = ["[storage]", 'driver = "' + driver + '"'] + ([""] + lines if lines else [])
+            if overlay_section is not None:
+                overlay_section += 3
+    if mount_program:
+        if overlay_section is not None:
+            lines.insert(overlay_section + 1, 'mount_program = "' + mount_program + '"')
+        else:
+            lines += ["", "[storage.options.overlay]", 'mount_program = "' + mount_program + '"']
+    return "\n".join(lines) + "\n"
+
+
+def network_create_argv(network):
+    # podman network create argv of a podman network inspect entry, CNI or
+    # netavark, None when it cannot be told
+    name = network.get("name")
+    if "plugins" in network:
+        # CNI config list, podman 3
+        argv = None
+        for plugin in network.get("plugins") or []:
+            if plugin.get("type") in ["bridge", "macvlan", "ipvlan"]:
+                argv = ["podman", "network", "create", "--driver", plugin["type"]]
+                for ip_range in (plugin.get("ipam") or {}).get("ranges") or []:
+                    for entry in ip_range:
+                        argv += ["--subnet", entry["subnet"]]
+                        if entry.get("gateway"):
+                            argv += ["--gateway", entry["gateway"]]
+                if "mtu" in plugin:
+                    argv += ["--opt", "mtu=" + str(plugin["mtu"])]
+        return argv + [name] if argv is not None and name else None
+    if not name or not network.get("driver"):
+        return None
+    argv = ["podman", "network", "create", "--driver", network["driver"]]
+    for entry in network.get("subnets") or []:
+        argv += ["--subnet", entry["subnet"]]
+        if entry.get("gateway"):
+            argv += ["--gateway", entry["gateway"]]
+    for option, value in sorted((network.get("options") or {}).items()):
+        argv += ["--opt", option + "=" + str(value)]
+    if network.get("internal"):
+        argv.append("--internal")
+    if network.get("ipv6_enabled"):
+        argv.append("--ipv6")
+    return argv + [name]
+
+
+def saved_networks(runner=None):
+    # {name: create argv} of the networks of the user but the default one
+    runner = runner or get_runner()
+    listed = runner.run(["podman", "network", "ls", "--format", "{{.Name}}"], retries=2)
+    names = [name for name in listed.output.split() if name != DEFAULT_NETWORK] if listed.ok else []
+    networks = {}
+    for name in names:
+        result = runner.run(["podman", "network", "inspect", name], retries=2)
+        try:
+            networks[name] = network_create_argv(json.loads(result.output)[0]) if result.ok else None
+        except (ValueError, IndexError, KeyError, TypeError):
+            networks[name] = None
+    return networks
+
+
+def container_units(unit_dir=None):
+    # Units podman generate systemd wrote for the containers of the user
+    return sorted(
+        os.path.basename(path)
+        for path in glob.glob(os.path.join(unit_dir or user_unit_dir(), "container-*.service"))
+    )
+
+
+def benchmark_load(image_file, driver, scratch_dir, mount_program=None, runner=None):
+    # Seconds and bytes a load of image_file takes in a scratch store
+    runner = runner or get_runner()
+    root = os.path.join(scratch_dir, driver)
+    store = ["podman", "--root", root, "--runroot", root + "-run", "--storage-driver", driver]
+    if mount_program:
+        store += ["--storage-opt", "overlay.mount_program=" + mount_program]
+    result = runner.run(store + ["image", "load", "-i", image_file], timeout=LONG_TIMEOUT)
+    used = None
+    if result.ok:
+        # Files in the store belong to the subordinate ids
+        du = runner.run(["podman", "unshare", "du", "-s", "--block-size=1", root])
+        if du.ok and du.output.split():
+            used = int(du.output.split()[0])
+    # Not podman system reset, which also removes the networks, volumes and
+    # tmpdir shared with the real store of the user
+    runner.run(["podman", "unshare", "rm", "-rf", root, root + "-run"])
+    return {
+        'driver': driver,
+        'ok': result.ok,
+        'seconds': round(result.duration, 1),
+        'bytes': used,
+        'error': result.error.strip()
+    }
+
+
+class storage_migration(object):
+    """
+        Guided move of the rootless store of rcladmin from vfs to overlay
+
+        The image is saved to a tarball when none is given, and loaded into
+        scratch vfs and overlay stores to show what overlay saves. Once
+        confirmed, the store is reset, which removes every image, container,
+        pod, volume and network of rcladmin. The networks are created again
+        and the container units disabled, storage.conf is set to overlay and
+        the image is loaded again, timed as the after benchmark. The
+        containers are created again by the next ./startRCLContainer.
+    """
+
+    def __init__(self, image_ref, image_file=None, unattended=False, runner=None, out=None, log_dir="logs"):
+        self.image_ref = image_ref
+        self.image_file = image_file
+        self.unattended = unattended
+        self.runner = runner or get_runner()
+        self.out = out or sys.stdout
+        self.log_dir = log_dir
+        self.report = {'image': image_ref}
+
+    def migrate(self):
+        # RC 0 when the store is on overlay at the end
+        info = storage_info(self.runner)
+        if info is None:
+            return self.__fail("podman info failed, the storage cannot be audited")
+        if info['driver'] == "overlay":
+            self.out.write("The store already uses overlay, nothing to migrate\n")
+            return 0
+        support = overlay_support(info)
+        if support is None:
+            return self.__fail(
+                "overlay is not possible on this host, install " + FUSE_OVERLAYFS +
+                " or a kernel " + ".".join(str(part) for part in NATIVE_OVERLAY_KERNEL) + " or later"
+            )
+        mount_program = shutil.which(FUSE_OVERLAYFS) if support == FUSE_OVERLAYFS else None
+        running = self.runner.run(["podman", "ps", "--format", "{{.Names}}"], retries=2)
+        if not running.ok or running.output.strip():
+            return self.__fail(
+                "Stop the running containers first, the migration removes them: " +
+                (running.output.strip().replace("\n", ", ") or running.error.strip())
+            )
+        scratch_dir = tempfile.mkdtemp(prefix=".rcl-storage-", dir=os.path.dirname(info['graph_root']))
+        image_file = self.image_file
+        saved = None
+        if image_file is None:
+            # Out of the scratch stores, once the store is reset it is the
+            # only copy of the image left
+            saved = os.path.join(
+                os.path.dirname(info['graph_root']),
+                "rcl-image-" + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + ".tar"
+            )
+            image_file = saved
+        store_reset = False
+        migrated = False
+        try:
+            if saved is not None:
+                self.out.write("Saving " + self.image_ref + " to " + image_file + "\n")
+                if self.runner.call(["podman", "save", "-o", image_file, self.image_ref], timeout=LONG_TIMEOUT) != 0:
+                    return self.__fail("Cannot save " + self.image_ref + ", give its tarball with -f")
+            self.out.write("Loading the image into scratch vfs and overlay stores\n")
+            before = benchmark_load(image_file, info['driver'], scratch_dir, runner=self.runner)
+            overlay = benchmark_load(image_file, "overlay", scratch_dir, mount_program, self.runner)
+            self.report.update({'before': before, 'overlay_scratch': overlay, 'overlay': support})
+            self.__show("before, " + before['driver'], before)
+            self.__show("overlay", overlay)
+            if not overlay['ok']:
+                return self.__fail("overlay does not work in a scratch store: " + overlay['error'])
+            if not self.__confirm(info):
+                self.out.write("Migration cancelled, the store was not changed\n")
+                return 1
+            store_reset = True
+            rc = self.__switch(mount_program)
+            if rc != 0:
+                return rc
+            started = self.runner.run(
+                ["podman", "image", "load", "-i", image_file],
+                timeout=LONG_TIMEOUT, policy=get_policy("storage")
+            )
+            after = {
+                'driver': "overlay",
+                'ok': started.ok,
+                'seconds': round(started.duration, 1),
+                'bytes': None,
+                'error': started.error.strip()
+            }
+            self.report['after'] = after
+            self.__show("after, overlay", after)
+            if not after['ok']:
+                return self.__fail("The image could not be loaded again")
+            migrated = True
+            self.out.write(
+                "Migrated to overlay, image load went from " + str(before['seconds']) + "s to " +
+                str(after['seconds']) + "s. Run ./startRCLContainer to create the containers again\n"
+            )
+            return 0
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            if store_reset and not migrated:
+                self.out.write("Load the image again with ./startRCLContainer -f " + image_file + "\n")
+            elif saved is not None and os.path.isfile(saved):
+                os.remove(saved)
+            self.__write_report()
+
+    def __confirm(self, info):
+        self.out.write(
+            "The migration removes the " + str(info['images']) + " images, " + str(info['containers']) +
+            " containers and all the pods and volumes of this user, then loads " + self.image_ref + " again\n"
+        )
+        networks = saved_networks(self.runner)
+        if networks:
+            self.out.write("The networks " + ", ".join(sorted(networks)) + " are removed and created again\n")
+        units = container_units()
+        if units:
+            self.out.write(
+                "The units " + ", ".join(units) + " are disabled until ./startRCLContainer creates the containers\n"
+            )
+        if self.unattended:
+            return True
+        if not sys.stdin.isatty():
+            self.out.write("Without a terminal the migration needs -y\n")
+            return False
+        answer = input("Migrate the store to overlay? [y/N] ")
+        return answer.strip().lower() in ["y", "yes"]
+
+    def __switch(self, mount_program):
+        # The old driver resets its own store, then storage.conf changes. Not
+        # podman unshare rm -rf of graphRoot as benchmark_load does: graphRoot
+        # also holds the libpod database, which records the driver, and the
+        # network definitions, so the networks are saved and created again
+        networks = saved_networks(self.runner)
+        for unit in container_units():
+            # Their containers are gone, the next start would only fail
+            self.runner.call(["systemctl", "--user", "disable", unit])
+        if self.runner.call(["podman", "system", "reset", "--force"], timeout=LONG_TIMEOUT) != 0:
+            return self.__fail("podman system reset failed, storage.conf was not changed")
+        conf = storage_conf_path()
+        text = ""
+        if os.path.isfile(conf):
+            with open(conf, "r") as conf_file:
+                text = conf_file.read()
+            shutil.copy(conf, conf + ".bak-" + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
+        with atomic_write(conf) as conf_file:
+            conf_file.write(set_driver(text, "overlay", mount_program))
+        info = storage_info(self.runner)
+        if info is None or info['driver'] != "overlay":
+            return self.__fail("podman does not use overlay with the new " + conf + ", check it")
+        self.report['networks'] = {}
+        for name, argv in sorted(networks.items()):
+            created = argv is not None and self.runner.call(argv) == 0
+            self.report['networks'][name] = created
+            if not created:
+                self.out.write("The network " + name + " could not be created again, create it by hand\n")
+        return 0
+
+    def __show(self, label, benchmark):
+        self.out.write(
+            "  " + label.ljust(16) +
+            (str(benchmark['seconds']) + "s" if benchmark['ok'] else "failed") +
+            (", " + format_size(benchmark['bytes']) if benchmark['bytes'] is not None else "") + "\n"
+        )
+
+    def __fail(self, message):
+        self.report['error'] = message
+        self.out.write(message + "\n")
+        return 1
+
+    def __write_report(self):
+        if not os.path.isdir(self.log_dir):
+            return
+        path = os.path.join(
+            self.log_dir,
+            "storage_migration_" + datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + ".json"
+        )
+        with open(path, "w") as report_file:
+            json.dump(self.report, report_file, indent=2)
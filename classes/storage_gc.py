@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: storage_gc.py
+# Description: Garbage collector for the rootless podman storage of rcladmin
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+
+import json
+import logging
+import time
+
+from classes.command_runner import get_runner
+from classes.config_checks import version_key
+from classes.retry_policy import get_policy
+
+
+# Number of RCL versions older than the current one kept by default
+DEFAULT_KEEP_PREVIOUS = 1
+
+# Container states that are safe to prune
+STOPPED_STATES = ["exited", "created", "stopped", "configured"]
+
+
+def field(entry, *keys):
+    # podman changed the case of its JSON keys between releases
+    for key in keys:
+        if key in entry:
+            return entry[key]
+    return None
+
+
+def names_of(entry):
+    names = field(entry, 'Names', 'names')
+    if names is None:
+        return []
+    if isinstance(names, str):
+        return [names]
+    return names
+
+
+def split_image_ref(image_ref):
+    # "cp.icr.io/cp/scalesystem/sss_rcl:7.0.0.2" -> (repository, tag)
+    last = image_ref.rsplit('/', 1)[-1]
+    if ':' not in last:
+        return image_ref, None
+    repository, tag = image_ref.rsplit(':', 1)
+    return repository, tag
+
+
+def remove_images(runner, log, image_ids):
+    # All IDs in one podman call, one by one only if the batch is refused
+    image_ids = sorted(set(image_ids))
+    if len(image_ids) == 0:
+        return 0
+    result = runner.run(["podman", "image", "rm", "--force"] + image_ids, policy=get_policy("storage"))
+    if result.ok:
+        return 0
+    log.debug(
+        "Batch removal of " +
+        str(len(image_ids)) +
+        " images failed, removing them one by one"
+    )
+    failed = 0
+    for image_id in image_ids:
+        if runner.call(["podman", "image", "rm", "--force", image_id], policy=get_policy("storage")) != 0:
+            failed += 1
+            log.warning("Could not remove image with ID " + image_id)
+    return failed
+
+
+class storage_gc(object):
+    """
+        Reclaims rootless podman storage used by old RCL versions
+
+        Policy:
+        - the current IMAGE_VERSION and the keep_previous versions before it
+          are kept, as any version newer than the current one
+        - images used by a container that is kept are kept
+        - stopped containers of the RCL image other than the current
+          containers, one per configured instance, are pruned
+        - dangling layers are pruned
+
+        Removals are batched into one podman call per object type.
+    """
+
+    def __init__(self, image_name, current_version, current_container,
+                 keep_previous=DEFAULT_KEEP_PREVIOUS, log=None, runner=None):
+        self.image_name = image_name
+        self.current_version = str(current_version)
+        # One container name or the names of all configured instances
+        if isinstance(current_container, str):
+            current_container = [current_container]
+        self.current_containers = list(current_container)
+        self.keep_previous = int(keep_previous)
+        self.log = log or logging.getLogger("storage_gc")
+        self.runner = runner or get_runner()
+
+    def collect(self):
+        started = time.monotonic()
+        before = self.__storage_bytes()
+        containers = self.__list_json(["podman", "ps", "--all", "--format", "json"])
+        images = self.__list_json(["podman", "images", "--format", "json"])
+
+        containers_to_remove = self.__plan_containers(containers)
+        kept_image_ids = set()
+        for container in containers:
+            if field(container, 'Id', 'ID', 'id') not in containers_to_remove:
+                image_id = field(container, 'ImageID', 'ImageId')
+                if image_id:
+                    kept_image_ids.add(image_id)
+        images_to_remove = self.__plan_images(images, kept_image_ids)
+
+        failed = 0
+        if len(containers_to_remove) > 0:
+            self.log.info(
+                "Pruning " +
+                str(len(containers_to_remove)) +
+                " stopped RCL containers"
+            )
+            result = self.runner.run(
+                ["podman", "container", "rm", "--force"] + sorted(containers_to_remove),
+                policy=get_policy("storage")
+            )
+            if not result.ok:
+                failed += 1
+                self.log.warning("Some stopped containers could not be pruned")
+        if len(images_to_remove) > 0:
+            self.log.info(
+                "Removing " +
+                str(len(images_to_remove)) +
+                " RCL images outside of the retention policy"
+            )
+            failed += remove_images(self.runner, self.log, images_to_remove)
+        if self.runner.call(["podman", "image", "prune", "--force"], policy=get_policy("storage")) != 0:
+            failed += 1
+            self.log.warning("Dangling layers could not be pruned")
+
+        after = self.__storage_bytes()
+        elapsed = time.monotonic() - started
+        reclaimed = None
+        if before is not None and after is not None:
+            reclaimed = max(0, before - after)
+            self.log.info(
+                "Storage GC reclaimed " +
+                str(round(reclaimed / (1024 * 1024), 1)) +
+                " MB in " +
+                str(round(elapsed, 2)) +
+                " seconds"
+            )
+        else:
+            self.log.info(
+                "Storage GC finished in " +
+                str(round(elapsed, 2)) +
+                " seconds, reclaimed space is unknown"
+            )
+        return {
+            'containers_removed': len(containers_to_remove),
+            'images_removed': len(images_to_remove),
+            'failures': failed,
+            'reclaimed_bytes': reclaimed,
+            'seconds': round(elapsed, 3)
+        }
+
+    def __plan_containers(self, containers):
+        to_remove = set()
+        for container in containers:
+            state = str(field(container, 'State', 'state')).lower()
+            image = str(field(container, 'Image', 'image'))
+            if state not in STOPPED_STATES:
+                continue
+            if split_image_ref(image)[0] != self.image_name:
+                continue
+            current = [name for name in names_of(container) if name in self.current_containers]
+            if len(current) > 0:
+                self.log.debug(
+                    "Keeping stopped current container " +
+                    current[0]
+                )
+                continue
+            self.log.debug(
+                "Stopped container " +
+                ",".join(names_of(container)) +
+                " of image " +
+                image +
+                " will be pruned"
+            )
+            to_remove.add(field(container, 'Id', 'ID', 'id'))
+        to_remove.discard(None)
+        return to_remove
+
+    def __plan_images(self, images, kept_image_ids):
+        current_key = version_key(self.current_version)
+        versions = {}
+        for image in images:
+            image_id = field(image, 'Id', 'ID', 'id')
+            for name in names_of(image):
+                repository, tag = split_image_ref(name)
+                if repository != self.image_name or tag is None:
+                    continue
+                key = version_key(tag)
+                if key is None:
+                    continue
+                versions.setdefault(key, set()).add(image_id)
+        if current_key is None:
+            self.log.debug(
+                "Current version " +
+                self.current_version +
+                " is not numeric, no versions are removed"
+            )
+            return []
+        older = sorted([key for key in versions if key < current_key], reverse=True)
+        keep = set(key for key in versions if key >= current_key)
+        keep.update(older[0:self.keep_previous])
+        keep_ids = set(kept_image_ids)
+        for key in keep:
+            keep_ids.update(versions[key])
+        to_remove = []
+        for key in versions:
+            if key in keep:
+                continue
+            for image_id in versions[key]:
+                if image_id in keep_ids:
+                    continue
+                self.log.debug(
+                    "Image version " +
+                    ".".join(str(part) for part in key) +
+                    " with ID " +
+                    image_id +
+                    " is outside of the retention policy"
+                )
+                to_remove.append(image_id)
+        return to_remove
+
+    def __list_json(self, argv):
+        result = self.runner.run(argv, retries=2)
+        if not result.ok:
+            return []
+        try:
+            listing = json.loads(result.output)
+        except ValueError:
+            return []
+        return listing or []
+
+    def __storage_bytes(self):
+        result = self.runner.run(["podman", "system", "df", "--format", "json"], retries=2)
+        if not result.ok:
+            return None
+        try:
+            usage = json.loads(result.output)
+            return sum(int(field(entry, 'RawSize', 'rawSize') or 0) for entry in usage)
+        except (ValueError, TypeError):
+            return None
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: systemd_user.py
+# Description: Periodic jobs of the RCL tools as systemd user timers
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# A job is a oneshot service and its timer, both in ~/.config/systemd/user.
+# Units are only rewritten and reloaded when their text changes, so calling
+# install_timer on every run costs two file reads and one systemctl call.
+# install_service does the same for a long running service.
+# -----------------------------------------------------------------------------
+
+import os
+
+from classes.command_runner import get_runner
+from classes.state_files import atomic_write
+
+
+SERVICE_TEMPLATE = """[Unit]
+Description={description}
+Wants=network-online.target
+After=network-online.target
+
+[Service]
+Type=oneshot
+WorkingDirectory={working_directory}
+ExecStart={exec_start}
+"""
+
+TIMER_TEMPLATE = """[Unit]
+Description={description} timer
+
+[Timer]
+OnBootSec={boot_seconds}
+OnUnitActiveSec={every_seconds}
+RandomizedDelaySec={random_seconds}
+
+[Install]
+WantedBy=timers.target
+"""
+
+# A run missed while the host was down is not made up at boot, it would
+# land outside of the calendar window
+CALENDAR_TIMER_TEMPLATE = """[Unit]
+Description={description} timer
+
+[Timer]
+OnCalendar={on_calendar}
+RandomizedDelaySec={random_seconds}
+Persistent=false
+
+[Install]
+WantedBy=timers.target
+"""
+
+# Long running collectors yield the CPU and the disk to everything else
+DAEMON_TEMPLATE = """[Unit]
+Description={description}
+
+[Service]
+Type=simple
+WorkingDirectory={working_directory}
+ExecStart={exec_start}
+Restart=on-failure
+RestartSec=30
+Nice=19
+IOSchedulingClass=idle
+
+[Install]
+WantedBy=default.target
+"""
+
+
+def user_unit_dir():
+    return os.path.join(os.path.expanduser("~"), ".config", "systemd", "user")
+
+
+def write_unit(path, text):
+    # True when the file changed, swapped in one rename
+    try:
+        with open(path, "r") as unit:
+            if unit.read() == text:
+                return False
+    except OSError:
+        pass
+    with atomic_write(path) as unit:
+        unit.write(text)
+    return True
+
+
+def install_timer(name, description, exec_start, every_seconds, working_directory,
+                  boot_seconds=120, random_seconds=60, runner=None, unit_dir=None, on_calendar=None):
+    # Installs and starts <name>.timer running <name>.service, returns the RC.
+    # With on_calendar, "*-*-* 01:00:00", it runs then instead of every_seconds
+    runner = runner or get_runner()
+    unit_dir = unit_dir or user_unit_dir()
+    if not os.path.isdir(unit_dir):
+        os.makedirs(unit_dir)
+    changed = write_unit(
+        os.path.join(unit_dir, name + ".service"),
+        SERVICE_TEMPLATE.format(
+            description=description,
+            working_directory=working_directory,
+            exec_start=exec_start
+        )
+    )
+    if on_calendar is not None:
+        timer = CALENDAR_TIMER_TEMPLATE.format(
+            description=description,
+            on_calendar=on_calendar,
+            random_seconds=str(random_seconds) + "s"
+        )
+    else:
+        timer = TIMER_TEMPLATE.format(
+            description=description,
+            boot_seconds=str(boot_seconds) + "s",
+            every_seconds=str(every_seconds) + "s",
+            random_seconds=str(random_seconds) + "s"
+        )
+    changed = write_unit(os.path.join(unit_dir, name + ".timer"), timer) or changed
+    if changed:
+        runner.call(["systemctl", "--user", "daemon-reload"])
+    return runner.call(["systemctl", "--user", "enable", "--now", name + ".timer"])
+
+
+def remove_timer(name, runner=None, unit_dir=None):
+    runner = runner or get_runner()
+    unit_dir = unit_dir or user_unit_dir()
+    runner.call(["systemctl", "--user", "disable", "--now", name + ".timer"])
+    for suffix in [".timer", ".service"]:
+        path = os.path.join(unit_dir, name + suffix)
+        if os.path.isfile(path):
+            os.remove(path)
+    runner.call(["systemctl", "--user", "daemon-reload"])
+
+
+def install_service(name, description, exec_start, working_directory, runner=None, unit_dir=None):
+    # Installs and starts the long running <name>.service, returns the RC. A
+    # changed unit restarts the service
+    runner = runner or get_runner()
+    unit_dir = unit_dir or user_unit_dir()
+    if not os.path.isdir(unit_dir):
+        os.makedirs(unit_dir)
+    changed = write_unit(
+        os.path.join(unit_dir, name + ".service"),
+        DAEMON_TEMPLATE.format(
+            description=description,
+            working_directory=working_directory,
+            exec_start=exec_start
+        )
+    )
+    if changed:
+        runner.call(["systemctl", "--user", "daemon-reload"])
+        runner.call(["systemctl", "--user", "enable", name + ".service"])
+        return runner.call(["systemctl", "--user", "restart", name + ".service"])
+    return runner.call(["systemctl", "--user", "enable", "--now", name + ".service"])
+
+
+def remove_service(name, runner=None, unit_dir=None):
+    runner = runner or get_runner()
+    unit_dir = unit_dir or user_unit_dir()
+    runner.call(["systemctl", "--user", "disable", "--now", name + ".service"])
+    path = os.path.join(unit_dir, name + ".service")
+    if os.path.isfile(path):
+        os.remove(path)
+    runner.call(["systemctl", "--user", "daemon-reload"])
@@ -0,0 +1,637 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: telemetry.py
+# Description: CPU, memory, IO and network samples of the RCL containers in
+#              a fixed size ring file, and the query of their percentiles
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# startRCLContainer starts the rcl-telemetry systemd user service when
+# TELEMETRY_INTERVAL of rclmgr.yml is set, it samples every running
+# container each TELEMETRY_INTERVAL seconds, unset or 0 stops it. A --collect
+# run by hand samples every 10 seconds without the key. Samples go to
+# <LOG>/<container name>.telemetry, a memory mapped ring of one week of
+# samples, 16 MiB at most, that never grows.
+#
+#   python3 -m classes.telemetry --collect     what the service runs
+#   python3 -m classes.telemetry --last 2h
+#   python3 -m classes.telemetry --since "2026-10-19 09:00" --until 10:30
+#   python3 -m classes.telemetry --file case/rcl.telemetry --csv
+#
+# The query shows, per container, the percentiles of CPU use and
+# throttling, memory and swap, block IO, network and the pressure stall
+# shares, which tell whether a slow service was short of CPU, memory or IO.
+#
+# A sample reads a few cgroup v2 files and /proc/<pid>/net/dev, no process
+# is spawned. podman is only asked for the cgroup when a container starts.
+# -----------------------------------------------------------------------------
+
+import argparse
+import csv
+import datetime
+import logging
+import math
+import mmap
+import os
+import re
+import signal
+import struct
+import sys
+import threading
+import time
+
+import yaml
+
+from classes.command_runner import command_runner
+from classes.rcl_instances import container_name_of, instance_config, instance_names
+from classes.config_checks import CGROUP_ROOT, format_size
+from classes.resource_profile import read_cgroup, read_io, read_keyed, read_number
+from classes.state_files import atomic_write
+
+
+# systemd user service running the collector
+TELEMETRY_SERVICE = "rcl-telemetry"
+
+SAMPLE_SECONDS = 10
+RETENTION_SECONDS = 7 * 24 * 3600
+
+# A short interval keeps less than RETENTION_SECONDS rather than a bigger
+# ring
+MAX_RING_BYTES = 16 * 1024 * 1024
+
+# podman is asked again for the cgroup of a stopped container at most this
+# often, in seconds
+RESOLVE_SECONDS = 60
+
+# Samples further apart than this many intervals are a gap, no rate is
+# computed over them
+GAP_INTERVALS = 3
+
+# Entries kept in the command ledger of the collector, it runs for months
+LEDGER_KEPT = 100
+
+MAGIC = b"RCLTELE1"
+FORMAT_VERSION = 1
+
+# magic, format version, record size, capacity, interval, created, written
+HEADER = struct.Struct("<8sIIIIdQ")
+HEADER_SIZE = 64
+WRITTEN_OFFSET = 32
+
+# Counters are cumulative as the kernel keeps them, rates are computed by
+# the query. seq is the sample number, 0 while the slot is being written
+FIELDS = [
+    ('seq', 'Q'),
+    ('time', 'd'),
+    ('cpu_usec', 'Q'),
+    ('throttled_usec', 'Q'),
+    ('memory', 'Q'),
+    ('swap', 'Q'),
+    ('major_faults', 'Q'),
+    ('io_read', 'Q'),
+    ('io_written', 'Q'),
+    ('net_rx', 'Q'),
+    ('net_tx', 'Q'),
+    ('cpu_stall_usec', 'Q'),
+    ('memory_stall_usec', 'Q'),
+    ('io_stall_usec', 'Q'),
+    ('pids', 'I'),
+    ('oom_kills', 'I')
+]
+FIELD_NAMES = [name for name, _ in FIELDS]
+RECORD = struct.Struct("<" + "".join(code for _, code in FIELDS))
+
+DURATION = re.compile(r'^\s*(\d+)\s*([smhd])\s*$')
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_PERCENTILES = [50, 95, 99]
+
+
+def ring_path(log_dir, container_name):
+    return os.path.join(log_dir, container_name + ".telemetry")
+
+
+def capacity_for(interval, retention=RETENTION_SECONDS):
+    return max(1, min(retention // max(1, int(interval)), (MAX_RING_BYTES - HEADER_SIZE) // RECORD.size))
+
+
+class telemetry_ring(object):
+    """
+        Fixed size ring of samples in one memory mapped file
+
+        The header holds the number of samples written, the slot of sample
+        n is (n - 1) % capacity. The collector is the only writer, a slot
+        gets seq 0 while it is rewritten so a query reading at the same
+        time skips it instead of returning half a sample.
+    """
+
+    def __init__(self, path, writable=False, capacity=None, interval=SAMPLE_SECONDS):
+        self.path = path
+        self.writable = writable
+        self.file = None
+        self.map = None
+        if writable:
+            self.__open_writable(capacity or capacity_for(interval), interval)
+        else:
+            self.__open_readonly()
+
+    @property
+    def written(self):
+        return struct.unpack_from("<Q", self.map, WRITTEN_OFFSET)[0]
+
+    def append(self, sample):
+        # sample has every field of FIELDS but seq
+        seq = self.written + 1
+        offset = HEADER_SIZE + ((seq - 1) % self.capacity) * RECORD.size
+        struct.pack_into("<Q", self.map, offset, 0)
+        RECORD.pack_into(self.map, offset, 0, *[sample.get(name, 0) for name in FIELD_NAMES[1:]])
+        struct.pack_into("<Q", self.map, offset, seq)
+        struct.pack_into("<Q", self.map, WRITTEN_OFFSET, seq)
+        return seq
+
+    def samples(self, since=None, until=None):
+        # Samples in the order they were taken, as dicts of FIELDS
+        written = self.written
+        samples = []
+        for seq in range(max(1, written - self.capacity + 1), written + 1):
+            offset = HEADER_SIZE + ((seq - 1) % self.capacity) * RECORD.size
+            values = RECORD.unpack_from(self.map, offset)
+            # Skipped when the collector rewrote the slot while it was read
+            if values[0] != seq or struct.unpack_from("<Q", self.map, offset)[0] != seq:
+                continue
+            if since is not None and values[1] < since:
+                continue
+            if until is not None and values[1] > until:
+                continue
+            samples.append(dict(zip(FIELD_NAMES, values)))
+        return samples
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __read_header(self):
+        magic, version, record_size, capacity, interval, created, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size or capacity == 0:
+            return None
+        if len(self.map) < HEADER_SIZE + capacity * RECORD.size:
+            return None
+        return capacity, interval, created
+
+    def __open_readonly(self):
+        self.file = open(self.path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.close()
+            raise ValueError(self.path + " is empty")
+        header = self.__read_header()
+        if header is None:
+            self.close()
+            raise ValueError(self.path + " is not a telemetry ring of format " + str(FORMAT_VERSION))
+        self.capacity, self.interval, self.created = header
+
+    def __open_writable(self, capacity, interval):
+        # A ring of another format, capacity or interval is started over
+        size = HEADER_SIZE + capacity * RECORD.size
+        if os.path.isfile(self.path) and os.path.getsize(self.path) == size:
+            self.file = open(self.path, "r+b")
+            self.map = mmap.mmap(self.file.fileno(), size)
+            header = self.__read_header()
+            if header is not None and header[0] == capacity and header[1] == interval:
+                self.capacity, self.interval, self.created = header
+                return
+            self.close()
+        with atomic_write(self.path, "wb") as ring:
+            ring.truncate(size)
+            ring.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, capacity, interval, time.time(), 0))
+        self.file = open(self.path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.capacity = capacity
+        self.interval = interval
+        self.created = time.time()
+
+
+def read_pressure(cgroup_dir, name):
+    # Microseconds some task of the cgroup stalled on cpu, memory or io,
+    # the total= of the "some" line. 0 without PSI in the kernel
+    for line in (read_cgroup(cgroup_dir, name) or "").splitlines():
+        fields = line.split()
+        if fields and fields[0] == "some":
+            for field in fields[1:]:
+                key, _, value = field.partition("=")
+                if key == "total":
+                    return int(value)
+    return 0
+
+
+def read_net(pid):
+    # Bytes received and sent on the interfaces of the network namespace of
+    # pid, loopback left out
+    received = 0
+    sent = 0
+    try:
+        with open("/proc/" + str(pid) + "/net/dev", "r") as net_dev:
+            lines = net_dev.read().splitlines()[2:]
+    except OSError:
+        return 0, 0
+    for line in lines:
+        name, _, counters = line.partition(":")
+        fields = counters.split()
+        if name.strip() == "lo" or len(fields) < 9:
+            continue
+        received += int(fields[0])
+        sent += int(fields[8])
+    return received, sent
+
+
+def cgroup_sample(cgroup_dir, pid, now=None):
+    # One sample of a running container, None when its cgroup is gone
+    cpu_stat = read_keyed(cgroup_dir, "cpu.stat")
+    if not cpu_stat:
+        return None
+    read_bytes, written_bytes = read_io(cgroup_dir)
+    net_rx, net_tx = read_net(pid)
+    return {
+        'time': now or time.time(),
+        'cpu_usec': cpu_stat.get("usage_usec", 0),
+        'throttled_usec': cpu_stat.get("throttled_usec", 0),
+        'memory': read_number(cgroup_dir, "memory.current") or 0,
+        'swap': read_number(cgroup_dir, "memory.swap.current") or 0,
+        'major_faults': read_keyed(cgroup_dir, "memory.stat").get("pgmajfault", 0),
+        'io_read': read_bytes,
+        'io_written': written_bytes,
+        'net_rx': net_rx,
+        'net_tx': net_tx,
+        'cpu_stall_usec': read_pressure(cgroup_dir, "cpu.pressure"),
+        'memory_stall_usec': read_pressure(cgroup_dir, "memory.pressure"),
+        'io_stall_usec': read_pressure(cgroup_dir, "io.pressure"),
+        'pids': read_number(cgroup_dir, "pids.current") or 0,
+        'oom_kills': read_keyed(cgroup_dir, "memory.events").get("oom_kill", 0)
+    }
+
+
+class telemetry_collector(object):
+    """
+        Samples the RCL containers of rclmgr.yml into their rings
+
+        rclmgr.yml is read again when it changes. The cgroup and PID of a
+        container are asked to podman once and kept until the cgroup or the
+        process goes away, as they do when the container restarts.
+    """
+
+    def __init__(self, config_file="rclmgr.yml", interval=SAMPLE_SECONDS, capacity=None, log=None, runner=None):
+        self.config_file = config_file
+        self.interval = interval
+        self.capacity = capacity or capacity_for(interval)
+        self.log = log or logging.getLogger("telemetry")
+        self.runner = runner or command_runner(log=self.log)
+        self.config_mtime = None
+        self.targets = {}
+        self.rings = {}
+        self.cgroups = {}
+        self.resolved_at = {}
+        self.failed = set()
+
+    def sample_once(self):
+        # Number of containers sampled
+        self.__reload()
+        sampled = 0
+        for container_name, path in sorted(self.targets.items()):
+            cgroup = self.__cgroup(container_name)
+            if cgroup is None:
+                continue
+            sample = cgroup_sample(cgroup[0], cgroup[1])
+            if sample is None:
+                self.cgroups[container_name] = None
+                continue
+            ring = self.__ring(path)
+            if ring is not None:
+                ring.append(sample)
+                sampled += 1
+        del self.runner.ledger[:-LEDGER_KEPT]
+        return sampled
+
+    def run(self, stop=None):
+        # Samples on a fixed beat until stop is set, a late beat is skipped
+        # rather than caught up
+        stop = stop or threading.Event()
+        self.log.info(
+            "Sampling the RCL containers every " +
+            str(self.interval) +
+            " seconds, " +
+            str(self.capacity) +
+            " samples kept"
+        )
+        beat = time.monotonic()
+        while not stop.is_set():
+            self.sample_once()
+            beat += self.interval
+            if beat < time.monotonic():
+                beat = time.monotonic() + self.interval
+            stop.wait(beat - time.monotonic())
+        self.close()
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+
+    def __reload(self):
+        try:
+            mtime = os.stat(self.config_file).st_mtime
+        except OSError:
+            return
+        if mtime == self.config_mtime:
+            return
+        self.config_mtime = mtime
+        try:
+            with open(self.config_file, "r") as config:
+                container_cfg = yaml.safe_load(config)['CONTAINER']
+            targets = {}
+            for instance in instance_names(container_cfg):
+                name = container_name_of(container_cfg, instance)
+                targets[name] = ring_path(instance_config(container_cfg, instance)['LOG'], name)
+        except (OSError, yaml.YAMLError, KeyError, TypeError, AttributeError) as err:
+            self.log.warning("Cannot read " + self.config_file + ", the containers sampled stay the same: " + str(err))
+            return
+        for path in set(self.rings) - set(targets.values()):
+            self.rings.pop(path).close()
+        self.targets = targets
+        self.failed = set()
+
+    def __cgroup(self, container_name):
+        # (cgroup directory, PID) of a running container, else None
+        cached = self.cgroups.get(container_name)
+        if cached is not None and os.path.isdir(cached[0]) and os.path.isdir("/proc/" + cached[1]):
+            return cached
+        if cached is None and time.monotonic() - self.resolved_at.get(container_name, -RESOLVE_SECONDS) < \
+                RESOLVE_SECONDS:
+            return None
+        self.resolved_at[container_name] = time.monotonic()
+        result = self.runner.run(
+            ["podman", "container", "inspect", "--format",
+             "{{.State.Running}} {{.State.Pid}} {{.State.CgroupPath}}", container_name]
+        )
+        fields = result.output.split()
+        if not result.ok or len(fields) != 3 or fields[0] != "true":
+            self.cgroups[container_name] = None
+            return None
+        self.cgroups[container_name] = (CGROUP_ROOT + fields[2], fields[1])
+        self.log.info(container_name + " is sampled from " + CGROUP_ROOT + fields[2])
+        return self.cgroups[container_name]
+
+    def __ring(self, path):
+        # Warns once per path that cannot be written, not at every beat
+        if path in self.rings:
+            return self.rings[path]
+        if path in self.failed:
+            return None
+        try:
+            self.rings[path] = telemetry_ring(path, writable=True, capacity=self.capacity, interval=self.interval)
+        except (OSError, ValueError) as err:
+            self.failed.add(path)
+            self.log.warning("Cannot write the telemetry ring " + path + ": " + str(err))
+            return None
+        return self.rings[path]
+
+
+def rates(samples, interval):
+    # Per pair of consecutive samples: the shares, rates and levels of the
+    # second one. A pair with a gap or a counter going back, the container
+    # restarted, starts over. Returns (rows, gaps)
+    rows = []
+    gaps = 0
+    for previous, sample in zip(samples, samples[1:]):
+        seconds = sample['time'] - previous['time']
+        if seconds <= 0 or seconds > GAP_INTERVALS * interval or sample['cpu_usec'] < previous['cpu_usec']:
+            gaps += 1
+            continue
+        usec = seconds * 1e6
+
+        def delta(name):
+            return max(0, sample[name] - previous[name])
+        rows.append({
+            'time': sample['time'],
+            'cpu %': 100.0 * delta('cpu_usec') / usec,
+            'throttled %': 100.0 * delta('throttled_usec') / usec,
+            'cpu stall %': 100.0 * delta('cpu_stall_usec') / usec,
+            'memory': sample['memory'],
+            'swap': sample['swap'],
+            'memory stall %': 100.0 * delta('memory_stall_usec') / usec,
+            'major faults/s': delta('major_faults') / seconds,
+            'io read/s': delta('io_read') / seconds,
+            'io write/s': delta('io_written') / seconds,
+            'io stall %': 100.0 * delta('io_stall_usec') / usec,
+            'net rx/s': delta('net_rx') / seconds,
+            'net tx/s': delta('net_tx') / seconds,
+            'pids': sample['pids'],
+            'oom kills': delta('oom_kills')
+        })
+    return rows, gaps
+
+
+# Metric, formatter of its values
+METRICS = [
+    ('cpu %', lambda value: "%.1f" % value),
+    ('throttled %', lambda value: "%.1f" % value),
+    ('cpu stall %', lambda value: "%.1f" % value),
+    ('memory', lambda value: format_size(int(value))),
+    ('swap', lambda value: format_size(int(value))),
+    ('memory stall %', lambda value: "%.1f" % value),
+    ('major faults/s', lambda value: "%.1f" % value),
+    ('io read/s', lambda value: format_size(int(value))),
+    ('io write/s', lambda value: format_size(int(value))),
+    ('io stall %', lambda value: "%.1f" % value),
+    ('net rx/s', lambda value: format_size(int(value))),
+    ('net tx/s', lambda value: format_size(int(value))),
+    ('pids', lambda value: str(int(value)))
+]
+
+
+def percentile(values, share):
+    # Nearest rank of sorted values
+    rank = int(math.ceil(share / 100.0 * len(values)))
+    return values[min(len(values) - 1, max(0, rank - 1))]
+
+
+def parse_duration(value):
+    match = DURATION.match(str(value))
+    if match is None:
+        raise ValueError("not a duration as 90m, 2h or 1d: " + str(value))
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def parse_time(value, now=None):
+    # Local time, "2026-10-19 09:00[:00]", the ISO form or "09:00" of today
+    now = now or datetime.datetime.now()
+    value = str(value).strip().replace("T", " ")
+    for pattern in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]:
+        try:
+            return time.mktime(datetime.datetime.strptime(value, pattern).timetuple())
+        except ValueError:
+            pass
+    for pattern in ["%H:%M:%S", "%H:%M"]:
+        try:
+            clock = datetime.datetime.strptime(value, pattern)
+            return time.mktime(now.replace(hour=clock.hour, minute=clock.minute, second=clock.second,
+                                           microsecond=0).timetuple())
+        except ValueError:
+            pass
+    raise ValueError("not a time as 2026-10-19 09:00 or 09:00: " + value)
+
+
+def format_time(stamp):
+    return datetime.datetime.fromtimestamp(stamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def report(name, ring, since=None, until=None, percentiles=None, out=None):
+    out = out or sys.stdout
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    samples = ring.samples(since, until)
+    rows, gaps = rates(samples, ring.interval)
+    if not rows:
+        out.write(name + ": no samples in the range\n")
+        return
+    out.write(
+        name + ": " + str(len(samples)) + " samples every " + str(ring.interval) + "s, " +
+        format_time(samples[0]['time']) + " to " + format_time(samples[-1]['time']) +
+        (", " + str(gaps) + " gaps" if gaps else "") + "\n"
+    )
+    heads = ["min"] + ["p" + ("%g" % share) for share in percentiles] + ["max"]
+    out.write("  %-15s" % "metric" + "".join("%12s" % head for head in heads) + "\n")
+    for metric, formatter in METRICS:
+        values = sorted(row[metric] for row in rows)
+        columns = [values[0]] + [percentile(values, share) for share in percentiles] + [values[-1]]
+        out.write("  %-15s" % metric + "".join("%12s" % formatter(value) for value in columns) + "\n")
+    oom_kills = sum(row['oom kills'] for row in rows)
+    if oom_kills:
+        out.write("  OOM kills in the range: " + str(oom_kills) + "\n")
+
+
+def write_csv(rings, since=None, until=None, out=None):
+    # One row per sample pair and container, for a spreadsheet or a plot
+    writer = csv.writer(out or sys.stdout)
+    writer.writerow(["container", "time"] + [metric for metric, _ in METRICS] + ["oom kills"])
+    for name, ring in rings:
+        rows, _ = rates(ring.samples(since, until), ring.interval)
+        for row in rows:
+            writer.writerow(
+                [name, format_time(row['time'])] +
+                ["%.3f" % row[metric] if isinstance(row[metric], float) else row[metric] for metric, _ in METRICS] +
+                [row['oom kills']]
+            )
+
+
+def config_rings(config_file, container=None):
+    # [(container name, ring path)] of rclmgr.yml
+    with open(config_file, "r") as config:
+        container_cfg = yaml.safe_load(config)['CONTAINER']
+    paths = []
+    for instance in instance_names(container_cfg):
+        name = container_name_of(container_cfg, instance)
+        if container is None or container in [name, instance]:
+            paths.append((name, ring_path(instance_config(container_cfg, instance)['LOG'], name)))
+    return paths
+
+
+def collect(config_file, interval):
+    collector = telemetry_collector(config_file, interval)
+    stop = threading.Event()
+    # systemctl stop sends SIGTERM, the last beat is finished first
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    collector.run(stop)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Percentiles of the CPU, memory, IO and network samples of the RCL containers.')
+    parser.add_argument('--collect', action='store_true', dest='collect', default=False,
+                        help='Sample the containers until stopped, as the ' + TELEMETRY_SERVICE + ' service does.')
+    parser.add_argument('--interval', action='store', dest='interval', type=int, default=None,
+                        help='Seconds between samples of --collect. Default: TELEMETRY_INTERVAL of rclmgr.yml, else ' +
+                        str(SAMPLE_SECONDS))
+    parser.add_argument('--config', action='store', dest='config', default='rclmgr.yml',
+                        help='rclmgr.yml naming the containers and their LOG directories.')
+    parser.add_argument('--container', action='store', dest='container', default=None,
+                        help='Container or instance name, all of rclmgr.yml by default.')
+    parser.add_argument('--file', action='append', dest='files', default=None,
+                        help='Query this ring file instead of the ones of rclmgr.yml, may be repeated.')
+    parser.add_argument('--since', action='store', dest='since', default=None,
+                        help='Start of the range, local time as "2026-10-19 09:00" or 09:00 for today.')
+    parser.add_argument('--until', action='store', dest='until', default=None,
+                        help='End of the range, same forms as --since.')
+    parser.add_argument('--last', action='store', dest='last', default=None,
+                        help='Range ending now, as 90m, 2h or 1d.')
+    parser.add_argument('--percentiles', action='store', dest='percentiles', default=None,
+                        help='Comma separated percentiles. Default: ' + ",".join(str(p) for p in DEFAULT_PERCENTILES))
+    parser.add_argument('--csv', action='store_true', dest='csv', default=False,
+                        help='Write the rates of every sample as CSV instead of the percentiles.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.collect:
+        interval = args.interval
+        if interval is None:
+            with open(args.config, "r") as config:
+                interval = yaml.safe_load(config)['CONTAINER'].get('TELEMETRY_INTERVAL')
+        interval = SAMPLE_SECONDS if interval is None else int(interval)
+        if interval <= 0:
+            logging.info("TELEMETRY_INTERVAL is 0, nothing is sampled")
+            return 0
+        return collect(args.config, interval)
+
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        if args.last:
+            since = time.time() - parse_duration(args.last)
+        percentiles = [float(share) for share in args.percentiles.split(",")] if args.percentiles else None
+    except ValueError as err:
+        logging.error(str(err))
+        return 2
+    if args.files:
+        paths = [(os.path.basename(path).rsplit(".", 1)[0], path) for path in args.files]
+    else:
+        paths = config_rings(args.config, args.container)
+        if not paths:
+            logging.error("No container or instance " + str(args.container) + " in " + args.config)
+            return 1
+    rings = []
+    for name, path in paths:
+        try:
+            rings.append((name, telemetry_ring(path)))
+        except (OSError, ValueError) as err:
+            logging.warning(name + ": no telemetry, " + str(err))
+    if args.csv:
+        write_csv(rings, since, until)
+    else:
+        for name, ring in rings:
+            report(name, ring, since, until, percentiles)
+    for _, ring in rings:
+        ring.close()
+    return 0 if rings else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: perf_gate.py
+# Description: Performance regression gate of the container lifecycle
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# Runs the lifecycle scenarios of rclmgr against the stand-ins of
+# standin.py and compares the time and the number of processes spawned by
+# every phase with perf/baselines.json.
+#
+#   python3 perf/perf_gate.py              compare, RC 1 on a regression
+#   python3 perf/perf_gate.py --update     store the measures as baselines
+#
+# Process counts come from the command ledger and are exact, any extra
+# process is a regression. Times regress when they exceed the baseline by
+# more than the tolerance and by more than MIN_SECONDS_DELTA.
+# -----------------------------------------------------------------------------
+
+import argparse
+import datetime
+import importlib.machinery
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from contextlib import redirect_stdout
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(PERF_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from classes.command_runner import get_runner
+
+BASELINES_FILE = os.path.join(PERF_DIR, "baselines.json")
+BASELINES_FORMAT = 1
+
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are noise of the machine, in seconds
+MIN_SECONDS_DELTA = 0.3
+
+STANDIN_TOOLS = ["podman", "systemctl", "loginctl", "sudo", "nft"]
+
+IMAGE_NAME = "cp.icr.io/cp/scalesystem/sss_rcl"
+IMAGE_VERSION = "7.0.0.2"
+
+CONFIG = """CONTAINER:
+    CONTAINER_HOSTNAME: utilityBareMetal-rcl-official
+    CONTAINER_DOMAIN_NAME: gpfs.local
+    UTILITY_HOSTNAME: utilityBareMetal
+    CAMPUS_INTERFACE: campus
+    CAMPUS_INTERFACE_IP: 192.168.100.10
+    RAS_INTERFACE: virbr1
+    RAS_INTERFACE_IP: 10.23.16.1
+    SSH_PORT: 10022
+    IMAGE_NAME: """ + IMAGE_NAME + """
+    IMAGE_VERSION: """ + IMAGE_VERSION + """
+    LOG: {workdir}/log
+    BKUP: {workdir}/backup
+"""
+
+
+class perf_scenario(object):
+    """
+        One lifecycle scenario run in its own work directory
+
+        The work directory holds rclmgr.yml, the stand-in state and is
+        HOME, so the systemd units land there too. rclmgr is loaded fresh
+        for every scenario.
+    """
+
+    def __init__(self, name, workdir):
+        self.name = name
+        self.workdir = workdir
+        self.phases = {}
+        self.rclmgr = None
+
+    def prepare(self):
+        bin_dir = os.path.join(self.workdir, "bin")
+        os.makedirs(bin_dir)
+        for tool in STANDIN_TOOLS:
+            os.symlink(os.path.join(PERF_DIR, "standin.py"), os.path.join(bin_dir, tool))
+        with open(os.path.join(self.workdir, "rclmgr.yml"), "w") as config:
+            config.write(CONFIG.format(workdir=self.workdir))
+        # podman image load reads the image reference out of the stand-in tarball
+        with open(os.path.join(self.workdir, "SSSRCL.tar"), "w") as tarball:
+            tarball.write(IMAGE_NAME + ":" + IMAGE_VERSION + "\n")
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+        os.environ["HOME"] = self.workdir
+        os.environ["PERF_STATE"] = os.path.join(self.workdir, "state.json")
+        os.chdir(self.workdir)
+
+        loader = importlib.machinery.SourceFileLoader("rclmgr", os.path.join(REPO_DIR, "rclmgr"))
+        self.rclmgr = types.ModuleType(loader.name)
+        loader.exec_module(self.rclmgr)
+        with redirect_stdout(io.StringIO()):
+            self.rclmgr.load_config("rclmgr.yml")
+
+    def phase(self, phase_name, func, *args):
+        runner = get_runner()
+        first = len(runner.ledger)
+        started = time.monotonic()
+        with redirect_stdout(io.StringIO()):
+            func(*args)
+        seconds = time.monotonic() - started
+        processes = sum(entry['attempts'] for entry in runner.ledger[first:])
+        self.phases[phase_name] = {'seconds': round(seconds, 3), 'processes': processes}
+
+    def setup(self, *steps):
+        # Brings the stand-ins to the starting point, not measured
+        with redirect_stdout(io.StringIO()):
+            for step in steps:
+                step()
+
+    def start_unit(self):
+        subprocess.call(["systemctl", "--user", "start", "container-utilityBareMetal-rcl-official.service"])
+
+    def stop_unit(self):
+        subprocess.call(["systemctl", "--user", "stop", "container-utilityBareMetal-rcl-official.service"])
+
+    def install(self):
+        self.rclmgr.install_image_from_file("SSSRCL.tar", False)
+
+    def run(self):
+        events = self.rclmgr.watch_podman_events()
+        try:
+            self.rclmgr.run_instances(["default"], False, True, events)
+        finally:
+            if events is not None:
+                events.stop()
+
+
+def fresh_install(scenario):
+    scenario.phase("install_image", scenario.install)
+    scenario.phase("storage_gc", scenario.rclmgr.collect_storage)
+    scenario.phase("run_container", scenario.run)
+
+
+def restart(scenario):
+    scenario.setup(scenario.install, scenario.run, scenario.start_unit, scenario.stop_unit)
+    scenario.phase("run_container", scenario.run)
+
+
+def already_up(scenario):
+    scenario.setup(scenario.install, scenario.run, scenario.start_unit)
+    scenario.phase("run_container", scenario.run)
+
+
+def nft_cleanup(scenario):
+    scenario.phase("clean_nftables", scenario.rclmgr.clean_nftables)
+
+
+SCENARIOS = {
+    'fresh_install': fresh_install,
+    'restart': restart,
+    'already_up': already_up,
+    'nft_cleanup': nft_cleanup
+}
+
+
+def run_scenario(name, repeat):
+    # The fastest of repeat runs, processes do not vary between runs
+    best = {}
+    cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix="rcl_perf_" + name + "_")
+        scenario = perf_scenario(name, workdir)
+        try:
+            scenario.prepare()
+            SCENARIOS[name](scenario)
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+            shutil.rmtree(workdir, ignore_errors=True)
+        for phase_name, measure in scenario.phases.items():
+            if phase_name not in best or measure['seconds'] < best[phase_name]['seconds']:
+                best[phase_name] = measure
+    return best
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_FILE, "r") as baselines_file:
+            baselines = json.load(baselines_file)
+    except (OSError, ValueError):
+        return None
+    if baselines.get('format') != BASELINES_FORMAT:
+        return None
+    return baselines
+
+
+def compare(results, baselines, tolerance):
+    regressions = []
+    print("%-14s %-15s %9s %9s %6s %6s  %s" % (
+        "scenario", "phase", "seconds", "baseline", "procs", "base", "status"))
+    for scenario_name in sorted(results):
+        for phase_name, measure in sorted(results[scenario_name].items()):
+            base = baselines['scenarios'].get(scenario_name, {}).get(phase_name)
+            status = "new"
+            if base is not None:
+                status = "ok"
+                slower = measure['seconds'] - base['seconds']
+                if measure['processes'] > base['processes']:
+                    status = "REGRESSED processes"
+                elif slower > MIN_SECONDS_DELTA and measure['seconds'] > base['seconds'] * (1 + tolerance):
+                    status = "REGRESSED seconds"
+                elif measure['processes'] < base['processes'] or -slower > MIN_SECONDS_DELTA:
+                    status = "improved, consider --update"
+            if status.startswith("REGRESSED"):
+                regressions.append(scenario_name + "/" + phase_name)
+            print("%-14s %-15s %9.3f %9s %6d %6s  %s" % (
+                scenario_name, phase_name, measure['seconds'],
+                "-" if base is None else "%.3f" % base['seconds'],
+                measure['processes'],
+                "-" if base is None else str(base['processes']),
+                status))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Performance regression gate of the RCL container lifecycle.')
+    parser.add_argument('--update', action='store_true', dest='update', default=False,
+                        help='Store the measures as the new baselines.')
+    parser.add_argument('--scenario', action='append', dest='scenarios', default=None,
+                        choices=sorted(SCENARIOS.keys()),
+                        help='Scenario to run, can be repeated. Default: all')
+    parser.add_argument('--repeat', action='store', dest='repeat', type=int, default=3,
+                        help='Runs of every scenario, the fastest counts. Default: 3')
+    parser.add_argument('--tolerance', action='store', dest='tolerance', type=float, default=None,
+                        help='Allowed slowdown as a fraction of the baseline. Default: from ' +
+                        'baselines.json or ' + str(DEFAULT_TOLERANCE))
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios or sorted(SCENARIOS.keys()):
+        results[name] = run_scenario(name, args.repeat)
+
+    baselines = load_baselines()
+    if args.update:
+        if baselines is None:
+            baselines = {'format': BASELINES_FORMAT, 'tolerance': DEFAULT_TOLERANCE, 'scenarios': {}}
+        if args.tolerance is not None:
+            baselines['tolerance'] = args.tolerance
+        baselines['updated'] = datetime.datetime.now().isoformat(timespec='seconds')
+        baselines['standin_delay'] = float(os.environ.get("PERF_STANDIN_DELAY", "0.02"))
+        baselines['scenarios'].update(results)
+        with open(BASELINES_FILE, "w") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+            baselines_file.write("\n")
+        print("Baselines written to " + BASELINES_FILE)
+        return 0
+    if baselines is None:
+        print("No baselines in " + BASELINES_FILE + ", run with --update first")
+        return 1
+
+    tolerance = args.tolerance if args.tolerance is not None else baselines.get('tolerance', DEFAULT_TOLERANCE)
+    regressions = compare(results, baselines, tolerance)
+    if len(regressions) > 0:
+        print("Performance regressions: " + ", ".join(regressions))
+        return 1
+    print("No performance regressions, tolerance " + str(int(tolerance * 100)) + "%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
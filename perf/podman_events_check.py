@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: podman_events_check.py
+# Description: Check of the podman events model against a recorded stream
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# perf/fixtures/podman_events.jsonl is an upgrade as podman records it: the
+# old container is created, started, killed, dies and is removed, the new
+# one is created under a temporary name, started and renamed. An instance
+# container is renamed without the oldName attribute some podman releases
+# leave out, then stopped. It holds an image event, a line that is not
+# JSON, and both the Time and the timeNano forms of the timestamps.
+#
+#   python3 perf/podman_events_check.py     RC 1 when a check fails
+# -----------------------------------------------------------------------------
+
+import calendar
+import datetime
+import os
+import sys
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(PERF_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from classes.podman_events import parse_event, podman_events
+
+FIXTURE = os.path.join(PERF_DIR, "fixtures", "podman_events.jsonl")
+
+OFFICIAL = "utilityBareMetal-rcl-official"
+INSTANCE = "utilityBareMetal-rcl-official-bb2"
+NEW_ID = "b2e1d4c3f5a6b7988977665544332211ffeeddccbbaa00998877665544332211"
+
+
+def utc(text, offset_hours=2):
+    # Seconds since the epoch of a local time of the fixture
+    parsed = datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S.%f")
+    return calendar.timegm(parsed.timetuple()) + parsed.microsecond / 1e6 - offset_hours * 3600
+
+
+def check(failures, name, got, expected):
+    if isinstance(expected, float) and isinstance(got, float):
+        ok = abs(got - expected) < 1e-3
+    else:
+        ok = got == expected
+    print("%-44s %s" % (name, "ok" if ok else "FAILED got " + str(got) + ", expected " + str(expected)))
+    if not ok:
+        failures.append(name)
+
+
+def main():
+    failures = []
+
+    # Step by step: a kill is only a signal, the container runs until died
+    stepped = podman_events()
+    with open(FIXTURE, "r") as events_file:
+        for line in events_file:
+            event = parse_event(line)
+            if event is None:
+                continue
+            stepped.apply(event)
+            if event['name'] == OFFICIAL and event['status'] == "kill":
+                check(failures, "running after kill", stepped.state(OFFICIAL), "running")
+            if event['name'] == OFFICIAL and event['status'] == "died":
+                check(failures, "exited after died", stepped.state(OFFICIAL), "exited")
+
+    # The whole stream through replay
+    events = podman_events()
+    events.replay(FIXTURE)
+    states = dict(
+        (container['Names'][0], (container['State'], container['Id']))
+        for container in events.containers()
+    )
+    check(failures, "containers after replay", sorted(states), sorted([OFFICIAL, INSTANCE]))
+    check(failures, OFFICIAL + " state", states.get(OFFICIAL), ("running", NEW_ID))
+    check(failures, INSTANCE + " state", states.get(INSTANCE, (None,))[0], "exited")
+    check(failures, "temporary name gone", events.state(OFFICIAL + "-new"), None)
+    check(failures, "events applied", events.events_seen, 14)
+    check(failures, "image model", sorted(events.image_model), ["cp.icr.io/cp/scalesystem/sss_rcl:7.0.0.2"])
+
+    # wait_for returns the time podman recorded, at once as the stream ended
+    check(failures, "wait_for running, Time with offset",
+          events.wait_for(OFFICIAL, "running", 0), utc("2026-10-19 10:06:21.750000"))
+    check(failures, "wait_for exited, timeNano",
+          events.wait_for(INSTANCE, ["exited", "stopped"], 0), 1792397260.5)
+    check(failures, "wait_for removed of a renamed name",
+          events.wait_for(OFFICIAL + "-new", "removed", 0) is not None, True)
+    check(failures, "wait_for a state never reached", events.wait_for(OFFICIAL, "paused", 0), None)
+
+    if failures:
+        print("podman events checks failed: " + ", ".join(failures))
+        return 1
+    print("podman events model matches the recorded stream")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
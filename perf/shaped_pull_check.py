@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: shaped_pull_check.py
+# Description: Check of the shaped image pulls against a throttled local
+#              registry stand-in
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# A simulated uplink of LINK_RATE with LINK_QUEUE bytes of buffer carries the
+# blob of a registry stand-in on 127.0.0.1 and the round trips of an RCL
+# endpoint stand-in, so a download filling the uplink delays the endpoint
+# the way a full buffer delays the support tunnel.
+#
+#   python3 perf/shaped_pull_check.py     RC 1 when a scenario fails
+#
+#   unshaped   blob pulled directly, the endpoint round trip grows
+#   capped     pulled through the proxy capped below the uplink, over CONNECT
+#              as podman does for https, the rate stays at the cap and the
+#              round trip stays low
+#   adaptive   capped above the uplink, the proxy has to back off on the
+#              round trip alone
+# -----------------------------------------------------------------------------
+
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(PERF_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from classes.pull_shaper import shaped_proxy
+
+MIB = 1024 * 1024
+
+LINK_RATE = 2 * MIB
+# Half a second of buffer at LINK_RATE, a modest bufferbloat
+LINK_QUEUE = MIB
+BLOB_BYTES = 8 * MIB
+CHUNK_BYTES = 8192
+# Segment size of a WAN, loopback ones are 64 KiB and open the window in
+# bursts no uplink would see
+WAN_MSS = 1448
+
+# Round trip of the endpoint stand-in on an idle uplink, in seconds
+BASE_RTT = 0.01
+
+# A capped pull may be this much off its cap
+RATE_TOLERANCE = 0.2
+
+# Round trips above this while pulling fail the capped scenario, in seconds
+MAX_CAPPED_RTT = 0.1
+
+BLOB_PATH = "/v2/cp/scalesystem/sss_rcl/blobs/sha256:perf"
+
+
+class link(object):
+    """
+        Uplink stand-in, one FIFO drained at rate with a bounded buffer
+    """
+
+    def __init__(self, rate, queue_bytes):
+        self.rate = float(rate)
+        self.queue_bytes = queue_bytes
+        self.free_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def enqueue(self, count):
+        # Waits for room in the buffer, returns when the bytes leave the link
+        with self.lock:
+            now = time.monotonic()
+            self.free_at = max(now, self.free_at) + count / self.rate
+            leaves = self.free_at
+        room_at = leaves - self.queue_bytes / self.rate
+        if room_at > time.monotonic():
+            time.sleep(room_at - time.monotonic())
+        return leaves
+
+    def rtt(self):
+        # Round trip of a small packet queued behind what is in the buffer
+        started = time.monotonic()
+        leaves = self.enqueue(64)
+        if leaves > time.monotonic():
+            time.sleep(leaves - time.monotonic())
+        return time.monotonic() - started + BASE_RTT
+
+
+class threaded_server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_MAXSEG, WAN_MSS)
+        HTTPServer.server_bind(self)
+
+
+def registry_handler(uplink, blob_bytes):
+    class handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            # What the registry has written counts as sent on the uplink,
+            # its own socket buffer is kept out of the way
+            self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, CHUNK_BYTES)
+            BaseHTTPRequestHandler.setup(self)
+
+        def do_GET(self):
+            # The path comes in absolute form through a plain http proxy
+            path = "/" + self.path.split("://", 1)[-1].split("/", 1)[-1] if "://" in self.path else self.path
+            size = blob_bytes if path == BLOB_PATH else 2
+            self.send_response(200)
+            self.send_header("Content-Length", str(size))
+            self.send_header("Connection", "close")
+            self.end_headers()
+            if size == 2:
+                self.wfile.write(b"{}")
+                return
+            sent = 0
+            while sent < size:
+                count = min(CHUNK_BYTES, size - sent)
+                uplink.enqueue(count)
+                self.wfile.write(b"\0" * count)
+                sent += count
+
+        def log_message(self, *args):
+            pass
+    return handler
+
+
+def fetch_blob(registry, proxy_url=None):
+    # Bytes read from the blob, over a CONNECT tunnel when there is a proxy
+    if proxy_url is not None:
+        host, port = proxy_url.rsplit("/", 1)[-1].split(":")
+        sock = socket.create_connection((host, int(port)))
+        sock.sendall(("CONNECT " + registry + " HTTP/1.1\r\nHost: " + registry + "\r\n\r\n").encode("ascii"))
+        reply = b""
+        while b"\r\n\r\n" not in reply:
+            reply += sock.recv(1024)
+        if b" 200 " not in reply.split(b"\r\n", 1)[0]:
+            raise OSError("CONNECT refused: " + reply.split(b"\r\n", 1)[0].decode("latin-1"))
+    else:
+        host, port = registry.split(":")
+        sock = socket.create_connection((host, int(port)))
+    sock.sendall(("GET " + BLOB_PATH + " HTTP/1.1\r\nHost: " + registry +
+                  "\r\nConnection: close\r\n\r\n").encode("ascii"))
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(CHUNK_BYTES)
+        if chunk == b"":
+            break
+        data += chunk
+    received = len(data.split(b"\r\n\r\n", 1)[-1])
+    while True:
+        chunk = sock.recv(CHUNK_BYTES)
+        if chunk == b"":
+            break
+        received += len(chunk)
+    sock.close()
+    return received
+
+
+def sample_rtts(uplink, stop, rtts):
+    while not stop.wait(0.25):
+        rtts.append(uplink.rtt())
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0.0
+
+
+def run(name, registry, uplink, blob_bytes, cap=None, interval=0.5):
+    proxy = None
+    if cap is not None:
+        proxy = shaped_proxy(cap, rtt_probe=uplink.rtt, interval=interval, next_hop=False)
+        proxy.start()
+    rtts = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_rtts, args=(uplink, stop, rtts))
+    sampler.start()
+    started = time.monotonic()
+    try:
+        received = fetch_blob(registry, proxy.url if proxy else None)
+        if proxy is not None:
+            # Plain http registries get absolute form requests
+            opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': proxy.url}))
+            opener.open("http://" + registry + "/v2/", timeout=10).read()
+    finally:
+        seconds = time.monotonic() - started
+        stop.set()
+        sampler.join()
+        if proxy is not None:
+            proxy.stop()
+    # The second half shows where the adaptation settled
+    return {
+        'name': name,
+        'complete': received == blob_bytes,
+        'rate': received / seconds,
+        'rtt': median(rtts[len(rtts) // 2:]),
+        'backoffs': proxy.backoffs if proxy is not None else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check of the shaped image pulls against a throttled registry stand-in.')
+    parser.add_argument('--blob-mb', action='store', dest='blob_mb', type=int, default=BLOB_BYTES // MIB,
+                        help='Size of the blob pulled, in MiB. Default: ' + str(BLOB_BYTES // MIB))
+    parser.add_argument('--verbose', action='store_true', dest='verbose', default=False,
+                        help='Show the rate changes of the proxy.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format='%(message)s')
+    blob_bytes = args.blob_mb * MIB
+
+    uplink = link(LINK_RATE, LINK_QUEUE)
+    server = threaded_server(("127.0.0.1", 0), registry_handler(uplink, blob_bytes))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    registry = "127.0.0.1:" + str(server.server_address[1])
+
+    cap = LINK_RATE // 2
+    results = [
+        run("unshaped", registry, uplink, blob_bytes),
+        run("capped", registry, uplink, blob_bytes, cap=cap),
+        run("adaptive", registry, uplink, blob_bytes, cap=LINK_RATE * 2)
+    ]
+    server.shutdown()
+
+    unshaped_rtt = results[0]['rtt']
+    failures = []
+    print("%-10s %8s %8s %9s  %s" % ("scenario", "MiB/s", "rtt ms", "backoffs", "status"))
+    for result in results:
+        status = "ok"
+        if not result['complete']:
+            status = "FAILED incomplete download"
+        elif result['name'] == "capped" and abs(result['rate'] - cap) > cap * RATE_TOLERANCE:
+            status = "FAILED rate is not the cap of %.2f MiB/s" % (cap / float(MIB))
+        elif result['name'] == "capped" and result['rtt'] > MAX_CAPPED_RTT:
+            status = "FAILED round trip grew under the cap"
+        elif result['name'] == "adaptive" and (result['backoffs'] == 0 or result['rtt'] >= unshaped_rtt):
+            status = "FAILED no back off on the round trip"
+        if status != "ok":
+            failures.append(result['name'])
+        print("%-10s %8.2f %8.1f %9d  %s" % (
+            result['name'], result['rate'] / MIB, result['rtt'] * 1000, result['backoffs'], status))
+    if failures:
+        print("Shaped pull checks failed: " + ", ".join(failures))
+        return 1
+    print("Shaped pulls keep the round trip low, uplink %.1f MiB/s" % (LINK_RATE / float(MIB)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
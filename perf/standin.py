@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+# -----------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+#
+# (C) Copyright IBM Corp.  2024  All Rights Reserved
+#
+# US Government Users Restricted Rights - Use, duplication or disclosure
+# restricted by GSA ADP Schedule Contract with IBM Corp.
+#
+# -----------------------------------------------------------------------------
+#
+# File name: standin.py
+# Description: Local stand-in for podman, systemctl, loginctl, sudo and nft
+#              used by the performance regression gate
+# -----------------------------------------------------------------------------
+#
+# Changelog:
+# YYYY/MM/DD
+# 2026/10/19 Initial creation
+#
+# -----------------------------------------------------------------------------
+#
+# perf_gate.py links this file under the name of each tool. The behaviour
+# depends on the name it is called with. State is kept in the JSON file of
+# PERF_STATE and podman events are appended to PERF_STATE.events. Every call
+# sleeps PERF_STANDIN_DELAY seconds, the cost of spawning the real tool.
+# -----------------------------------------------------------------------------
+
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+
+
+STATE_FILE = os.environ.get("PERF_STATE", "perf_state.json")
+EVENTS_FILE = STATE_FILE + ".events"
+DELAY = float(os.environ.get("PERF_STANDIN_DELAY", "0.02"))
+SERIAL = "PERF0000001"
+
+NFT_NAT_TABLE = """table ip nat { # handle 1
+\tchain PREROUTING { # handle 1
+\t\ttype nat hook prerouting priority dstnat; policy accept;
+\t\tfib daddr type local jump NETAVARK-HOSTPORT-DNAT # handle 10
+\t}
+\tchain POSTROUTING { # handle 2
+\t\ttype nat hook postrouting priority srcnat; policy accept;
+\t\tjump NETAVARK-HOSTPORT-MASQ # handle 11
+\t}
+\tchain NETAVARK-HOSTPORT-DNAT { # handle 3
+\t}
+\tchain NETAVARK-HOSTPORT-MASQ { # handle 4
+\t}
+}
+"""
+
+
+def digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_state(state_file):
+    try:
+        return json.load(state_file)
+    except ValueError:
+        return {'containers': {}, 'images': {}, 'networks': {}}
+
+
+def emit(status, name, container_id, image):
+    with open(EVENTS_FILE, "a") as events_file:
+        events_file.write(json.dumps({
+            'ID': container_id, 'Name': name, 'Image': image, 'Status': status,
+            'Type': "container", 'timeNano': int(time.time() * 1e9)
+        }) + "\n")
+
+
+def option_values(argv, option):
+    values = []
+    for index, arg in enumerate(argv):
+        if arg == option and index + 1 < len(argv):
+            values.append(argv[index + 1])
+        elif arg.startswith(option + "="):
+            values.append(arg.split("=", 1)[1])
+    return values
+
+
+def podman_create(state, argv):
+    name = option_values(argv, "--name")[0]
+    if name in state['containers']:
+        sys.stderr.write("the container name " + name + " is already in use\n")
+        return 125
+    image = argv[-1]
+    container_id = digest(name + str(time.time()))
+    ports = {}
+    for port in option_values(argv, "-p"):
+        host_port, container_port = port.split(":", 1)
+        ports.setdefault(container_port, []).append({'HostIp': "", 'HostPort': host_port})
+    mounts = []
+    for volume in option_values(argv, "-v"):
+        source, destination = volume.split(":")[0:2]
+        mounts.append({'Source': source, 'Destination': destination})
+    network = option_values(argv, "--net")[0]
+    state['containers'][name] = {
+        'Id': container_id,
+        'Image': image,
+        'State': "created",
+        'inspect': {
+            'Id': container_id,
+            'Name': name,
+            'ImageName': image,
+            'Config': {'Hostname': option_values(argv, "--hostname")[0], 'Env': option_values(argv, "--env")},
+            'HostConfig': {'PortBindings': ports},
+            'Mounts': mounts,
+            'NetworkSettings': {'Networks': {network: {}}}
+        }
+    }
+    emit("create", name, container_id, image)
+    print(container_id)
+    return 0
+
+
+def podman(state, argv):
+    containers = state['containers']
+    if argv[0] == "--version":
+        print("podman version 4.9.4-standin")
+    elif argv[0] == "ps":
+        if "json" in argv:
+            print(json.dumps([
+                {'Names': [name], 'Id': entry['Id'], 'Image': entry['Image'], 'State': entry['State']}
+                for name, entry in sorted(containers.items())
+            ]))
+    elif argv[0:2] == ["container", "inspect"]:
+        name = argv[-1]
+        if name not in containers:
+            sys.stderr.write("no such container " + name + "\n")
+            return 125
+        if "--format" in argv:
+            template = option_values(argv, "--format")[0]
+            print(containers[name]['State'] if "State" in template else containers[name]['Image'])
+        else:
+            print(json.dumps([containers[name]['inspect']]))
+    elif argv[0] == "create":
+        return podman_create(state, argv)
+    elif argv[0:2] == ["container", "rm"]:
+        for name in [arg for arg in argv[2:] if not arg.startswith("-")]:
+            for known_name, entry in list(containers.items()):
+                if name in [known_name, entry['Id']]:
+                    del containers[known_name]
+                    emit("remove", known_name, entry['Id'], entry['Image'])
+    elif argv[0:2] == ["generate", "systemd"]:
+        name = option_values(argv, "--name")[0]
+        with open("container-" + name + ".service", "w") as unit:
+            unit.write("[Service]\nExecStart=/usr/bin/podman start " + name + "\n")
+    elif argv[0:2] == ["image", "load"]:
+        with open(option_values(argv, "-i")[0], "r") as tarball:
+            image = tarball.read().strip()
+        state['images'][image] = "sha256:" + digest(image)
+        print("Loaded image: " + image)
+    elif argv[0] == "pull":
+        state['images'][argv[1]] = "sha256:" + digest(argv[1])
+    elif argv[0] == "images":
+        if "json" in argv:
+            print(json.dumps([
+                {'Id': image_id, 'Names': [image], 'Size': 1024 * 1024 * 1024}
+                for image, image_id in sorted(state['images'].items())
+            ]))
+        elif argv[-1] in state['images']:
+            print(state['images'][argv[-1]][7:19])
+    elif argv[0:2] in [["image", "rm"], ["image", "prune"]]:
+        for image in [arg for arg in argv[2:] if not arg.startswith("-")]:
+            for known_image, image_id in list(state['images'].items()):
+                if image in [known_image, image_id]:
+                    del state['images'][known_image]
+    elif argv[0:2] == ["system", "df"]:
+        print(json.dumps([{'Type': "Images", 'RawSize': 1024 * 1024 * 1024 * len(state['images'])}]))
+    elif argv[0] == "network":
+        networks = state['networks']
+        if argv[1] in ["exists", "inspect"] and argv[2] not in networks:
+            return 1
+        if argv[1] == "inspect":
+            print(json.dumps([networks[argv[2]]]))
+        elif argv[1] == "create":
+            subnet = (option_values(argv, "--subnet") or ["10.89.0.0/24"])[0]
+            gateway = (option_values(argv, "--gateway") or [None])[0]
+            networks[argv[-1]] = {'name': argv[-1], 'driver': "bridge",
+                                  'subnets': [{'subnet': subnet, 'gateway': gateway}]}
+        elif argv[1] == "remove":
+            networks.pop(argv[2], None)
+    return 0
+
+
+def podman_events():
+    # Follows the events file until killed, as "podman events" does
+    position = 0
+    while True:
+        if os.path.isfile(EVENTS_FILE):
+            with open(EVENTS_FILE, "r") as events_file:
+                events_file.seek(position)
+                for line in events_file:
+                    sys.stdout.write(line)
+                position = events_file.tell()
+            sys.stdout.flush()
+        time.sleep(0.02)
+
+
+def systemctl(state, argv):
+    units = [arg for arg in argv if arg.startswith("container-")]
+    if len(units) == 0:
+        return 0
+    name = units[0][len("container-"):].replace(".service", "")
+    entry = state['containers'].get(name)
+    if entry is None:
+        return 5 if "start" in argv else 1
+    if "start" in argv and entry['State'] != "running":
+        entry['State'] = "running"
+        emit("start", name, entry['Id'], entry['Image'])
+    elif "stop" in argv and entry['State'] == "running":
+        entry['State'] = "exited"
+        emit("died", name, entry['Id'], entry['Image'])
+    return 0
+
+
+def nft(state, argv):
+    if argv[0:3] == ["-a", "list", "table"]:
+        if argv[3:5] == ["ip", "nat"] and not state.get('nft_cleaned'):
+            sys.stdout.write(NFT_NAT_TABLE)
+    elif argv[0:2] == ["-f", "-"]:
+        sys.stdin.read()
+        state['nft_cleaned'] = True
+    return 0
+
+
+def main():
+    tool = os.path.basename(sys.argv[0])
+    argv = sys.argv[1:]
+    time.sleep(DELAY)
+    if tool == "podman" and len(argv) > 0 and argv[0] == "events":
+        return podman_events()
+    if tool == "sudo":
+        print(SERIAL)
+        return 0
+    if tool == "loginctl":
+        return 0
+    handler = {'podman': podman, 'systemctl': systemctl, 'nft': nft}.get(tool)
+    if handler is None:
+        sys.stderr.write("standin does not know " + tool + "\n")
+        return 127
+    # One tool at a time changes the state, as podman locks its storage
+    with open(STATE_FILE, "a+") as state_file:
+        fcntl.flock(state_file, fcntl.LOCK_EX)
+        state_file.seek(0)
+        state = load_state(state_file)
+        rc = handler(state, argv)
+        state_file.seek(0)
+        state_file.truncate()
+        json.dump(state, state_file)
+    return rc
+
+
+if __name__ == '__main__':
+    sys.exit(main())